@@ -1,15 +1,41 @@
-from flask import Flask, request, session, jsonify
+from flask import Flask, request, session, jsonify, has_request_context
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
-import mysql.connector
-from mysql.connector import Error
+from werkzeug.middleware.proxy_fix import ProxyFix
+from mysql.connector import Error, errorcode
 from datetime import datetime, timedelta
 import logging
+import random
+import time
+import threading
 from functools import wraps
 from config import Config
+from db_pool import ConnectionPool
+from audit_writer import AuditWriter
+from pagination import get_page_args, paginate, InvalidPageRequest
+from streaming import get_stream_format, stream_query
+from cache import VersionedCache
+from conditional import make_etag, not_modified, with_etag
+from validators import fetch_validators
+from dashboard_stats import compute_stats, stats_role, freshness
+from password_hashing import password_hasher, HashingBusy
+from principal_cache import PrincipalCache
+from query_budget import max_queries
+import query_budget
+import unit_of_work
+import rate_limit
+import session_store
+import query_stats
+import metrics
 
 app = Flask(__name__)
 app.config.from_object(Config)
+if Config.PROXY_FIX_X_FOR:
+    # Client addresses (rate limits, audit log) come from the trusted proxies' X-Forwarded-For
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.PROXY_FIX_X_FOR)
+# Sessions live on the server; created at import so workers forked later share revocations
+app.session_interface = session_store.create_session_interface(
+    Config.SESSION_BACKEND, Config.SESSION_SQLITE_PATH, Config.SESSION_CACHE_SIZE, Config.SESSION_CACHE_TTL
+)
 CORS(app, supports_credentials=True, origins=["http://localhost:5173"])
 
 # Configure Logging
@@ -20,37 +46,98 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Database Connection Pool
+db_pool = ConnectionPool(
+    Config.DB_CONFIG,
+    size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+    timeout=Config.DB_POOL_TIMEOUT,
+    recycle=Config.DB_POOL_RECYCLE,
+    pre_ping=Config.DB_POOL_PRE_PING
+)
+unit_of_work.init_app(app, db_pool)
+query_stats.init_app(app, db_pool)
+query_budget.init_app(app)
+
+# Rate Limiting (created at import so a 'shared' backend exists before workers fork)
+rate_limiter = rate_limit.RateLimiter(
+    rate_limit.create_backend(Config.RATELIMIT_BACKEND, Config.RATELIMIT_MAX_KEYS),
+    {'auth': Config.RATELIMIT_AUTH, 'auth_address': Config.RATELIMIT_AUTH_ADDRESS,
+     'reads': Config.RATELIMIT_READS, 'writes': Config.RATELIMIT_WRITES}
+)
+rate_limit.init_app(app, rate_limiter)
+
 # Database Connection
+# Inside a request every caller shares the request's unit of work: one connection,
+# one transaction, committed before the response is sent (rolled back on errors).
 def get_db_connection():
     try:
-        conn = mysql.connector.connect(**Config.DB_CONFIG)
+        if has_request_context():
+            return unit_of_work.get_unit_of_work().connection()
+        conn = db_pool.connect()
         return conn
     except Error as e:
         logger.error(f"Database connection error: {e}")
         return None
 
+# Audit Log Writer
+AUDIT_INSERT = "INSERT INTO audit_log (user_id, action, table_name, record_id, old_value, new_value, ip_address) VALUES (%s, %s, %s, %s, %s, %s, %s)"
+
+def write_audit_rows(rows):
+    conn = db_pool.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany(AUDIT_INSERT, rows)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+audit_writer = AuditWriter(
+    write_audit_rows,
+    batch_size=Config.AUDIT_BATCH_SIZE,
+    flush_interval=Config.AUDIT_FLUSH_INTERVAL_MS / 1000,
+    max_queue=Config.AUDIT_QUEUE_SIZE,
+    enqueue_timeout=Config.AUDIT_ENQUEUE_TIMEOUT_MS / 1000
+)
+app.extensions['audit_writer'] = audit_writer
+
 # Audit Log Function
+# Entries are queued only once the request's transaction commits, so rolled back
+# changes never show up in the audit trail.
 def log_audit(user_id, action, table_name, record_id, old_value=None, new_value=None):
-    try:
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor()
-            ip_address = request.remote_addr
-            cursor.execute(
-                "INSERT INTO audit_log (user_id, action, table_name, record_id, old_value, new_value, ip_address) VALUES (%s, %s, %s, %s, %s, %s, %s)",
-                (user_id, action, table_name, record_id, old_value, new_value, ip_address)
-            )
-            conn.commit()
-            cursor.close()
-            conn.close()
-    except Error as e:
-        logger.error(f"Audit log error: {e}")
+    if not has_request_context():
+        audit_writer.enqueue((user_id, action, table_name, record_id, old_value, new_value, None))
+        return
+    row = (user_id, action, table_name, record_id, old_value, new_value, request.remote_addr)
+    unit_of_work.get_unit_of_work().after_commit(lambda: audit_writer.enqueue(row))
+
+# Principal Cache
+# The decorators check the user's current role and active flag, not the copy
+# taken at login, at the cost of a dictionary lookup on most requests.
+def load_principal(user_id):
+    with db_pool.connect() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT role, is_active FROM users WHERE id = %s", (user_id,))
+        row = cursor.fetchone()
+        cursor.close()
+    return (row['role'], bool(row['is_active'])) if row else None
+
+principal_cache = PrincipalCache(load_principal, maxsize=Config.PRINCIPAL_CACHE_SIZE, ttl=Config.PRINCIPAL_CACHE_TTL)
+app.extensions['principal_cache'] = principal_cache
+
+def current_principal():
+    """(role, is_active) of the logged in user, or None if there is none or they were removed"""
+    if 'user_id' not in session:
+        return None
+    return principal_cache.get(session['user_id'])
 
 # Authentication Decorators
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        principal = current_principal()
+        if not principal or not principal[1]:
             return jsonify({'error': 'Unauthorized access', 'code': 401}), 401
         return f(*args, **kwargs)
     return decorated_function
@@ -59,9 +146,10 @@ def role_required(*roles):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if 'user_id' not in session:
+            principal = current_principal()
+            if not principal or not principal[1]:
                 return jsonify({'error': 'Unauthorized access', 'code': 401}), 401
-            if session.get('role') not in roles:
+            if principal[0] not in roles:
                 return jsonify({'error': 'Access denied', 'code': 403}), 403
             return f(*args, **kwargs)
         return decorated_function
@@ -69,7 +157,15 @@ def role_required(*roles):
 
 # ============ AUTH ROUTES ============
 
+def hashing_busy():
+    """503 sent when the password hashing queue is full"""
+    logger.warning("Password hashing queue full, rejecting request")
+    response = jsonify({'error': 'Server is busy, please try again shortly'})
+    response.headers['Retry-After'] = str(Config.PASSWORD_HASH_RETRY_AFTER)
+    return response, 503
+
 @app.route('/api/auth/register', methods=['POST'])
+@max_queries(2)
 def register():
     try:
         data = request.get_json()
@@ -86,6 +182,10 @@ def register():
         if role not in ['student', 'teacher', 'admin']:
             return jsonify({'error': 'Invalid role'}), 400
         
+        # Hash before taking a connection so it is not held while we wait
+        password_hash = password_hasher.generate(password)
+        security_answer_hash = password_hasher.generate(security_answer) if security_answer else None
+        
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
@@ -99,14 +199,10 @@ def register():
             conn.close()
             return jsonify({'error': 'Username or email already exists'}), 409
         
-        password_hash = generate_password_hash(password)
-        security_answer_hash = generate_password_hash(security_answer) if security_answer else None
-        
         cursor.execute(
             "INSERT INTO users (username, email, password_hash, role, security_question, security_answer_hash) VALUES (%s, %s, %s, %s, %s, %s)",
             (username, email, password_hash, role, security_question, security_answer_hash)
         )
-        conn.commit()
         user_id = cursor.lastrowid
         
         log_audit(user_id, 'CREATE', 'users', user_id, None, f"User {username} registered")
@@ -117,11 +213,34 @@ def register():
         
         return jsonify({'message': 'Registration successful', 'userId': user_id}), 201
     
+    except HashingBusy:
+        return hashing_busy()
     except Exception as e:
         logger.error(f"Registration error: {e}")
         return jsonify({'error': 'Registration failed'}), 500
 
+def rehash_if_needed(user, password):
+    """Store the password under the current hash policy after a successful login"""
+    try:
+        if not password_hasher.needs_rehash(user['password_hash']):
+            return
+        new_hash = password_hasher.generate(password)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        # Skip it if the password was changed since we read it
+        cursor.execute(
+            "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s",
+            (new_hash, user['id'], user['password_hash'])
+        )
+        cursor.close()
+        conn.close()
+        logger.info(f"Password rehashed for user: {user['username']}")
+    except Exception as e:
+        # The login itself succeeded; the upgrade is retried next time
+        logger.warning(f"Password rehash skipped for user {user['username']}: {e}")
+
 @app.route('/api/auth/login', methods=['POST'])
+@max_queries(2)
 def login():
     try:
         data = request.get_json()
@@ -131,27 +250,28 @@ def login():
         if not all([username, password]):
             return jsonify({'error': 'Missing credentials'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id, username, email, password_hash, role, is_active FROM users WHERE username = %s",
-            (username,)
-        )
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        # A short checkout of its own: the request's connection would stay
+        # checked out while the hash is verified
+        with db_pool.connect() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                "SELECT id, username, email, password_hash, role, is_active FROM users WHERE username = %s",
+                (username,)
+            )
+            user = cursor.fetchone()
+            cursor.close()
         
-        if not user or not check_password_hash(user['password_hash'], password):
+        if not user or not password_hasher.check(user['password_hash'], password):
             logger.warning(f"Failed login attempt for username: {username}")
             return jsonify({'error': 'Invalid credentials'}), 401
         
         if not user['is_active']:
             return jsonify({'error': 'Account is inactive'}), 403
         
-        # Create session
+        rehash_if_needed(user, password)
+        
+        # Create session under a fresh id
+        session.regenerate()
         session.permanent = True
         session['user_id'] = user['id']
         session['username'] = user['username']
@@ -172,12 +292,15 @@ def login():
             }
         }), 200
     
+    except HashingBusy:
+        return hashing_busy()
     except Exception as e:
         logger.error(f"Login error: {e}")
         return jsonify({'error': 'Login failed'}), 500
 
 @app.route('/api/auth/logout', methods=['POST'])
 @login_required
+@max_queries(1)
 def logout():
     try:
         user_id = session.get('user_id')
@@ -194,6 +317,7 @@ def logout():
         return jsonify({'error': 'Logout failed'}), 500
 
 @app.route('/api/auth/session', methods=['GET'])
+@max_queries(0)
 def check_session():
     if 'user_id' in session:
         return jsonify({
@@ -208,6 +332,7 @@ def check_session():
     return jsonify({'authenticated': False}), 200
 
 @app.route('/api/auth/recover', methods=['POST'])
+@max_queries(2)
 def recover_password():
     try:
         data = request.get_json()
@@ -218,33 +343,39 @@ def recover_password():
         if not all([email, security_answer, new_password]):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id, username, security_answer_hash FROM users WHERE email = %s",
-            (email,)
-        )
-        user = cursor.fetchone()
+        # Read on a short checkout and hash with no connection held; the
+        # request's connection is only taken for the write
+        with db_pool.connect() as read_conn:
+            cursor = read_conn.cursor(dictionary=True)
+            cursor.execute(
+                "SELECT id, username, security_answer_hash FROM users WHERE email = %s",
+                (email,)
+            )
+            user = cursor.fetchone()
+            cursor.close()
         
         if not user or not user['security_answer_hash']:
-            cursor.close()
-            conn.close()
             return jsonify({'error': 'Invalid email or security question not set'}), 404
         
-        if not check_password_hash(user['security_answer_hash'], security_answer):
-            cursor.close()
-            conn.close()
+        if not password_hasher.check(user['security_answer_hash'], security_answer):
             return jsonify({'error': 'Incorrect security answer'}), 401
         
-        new_password_hash = generate_password_hash(new_password)
+        new_password_hash = password_hasher.generate(new_password)
+        
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = conn.cursor()
+        # Only if the security answer checked above is still the current one
         cursor.execute(
-            "UPDATE users SET password_hash = %s WHERE id = %s",
-            (new_password_hash, user['id'])
+            "UPDATE users SET password_hash = %s WHERE id = %s AND security_answer_hash = %s",
+            (new_password_hash, user['id'], user['security_answer_hash'])
         )
-        conn.commit()
+        if not cursor.rowcount:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Security answer changed, please try again'}), 409
         
         log_audit(user['id'], 'UPDATE', 'users', user['id'], None, 'Password recovered')
         logger.info(f"Password recovered for user: {user['username']}")
@@ -254,58 +385,117 @@ def recover_password():
         
         return jsonify({'message': 'Password reset successful'}), 200
     
+    except HashingBusy:
+        return hashing_busy()
     except Exception as e:
         logger.error(f"Password recovery error: {e}")
         return jsonify({'error': 'Password recovery failed'}), 500
 
 # ============ COURSE ROUTES ============
 
-@app.route('/api/courses', methods=['GET'])
-@login_required
-def get_courses():
+# Course catalog cache, keyed by (search, semester, page). Course writes and
+# enrollment writes bump its version after commit since seat counts are part
+# of the payload.
+catalog_cache = VersionedCache(
+    maxsize=Config.CATALOG_CACHE_SIZE,
+    ttl=Config.CATALOG_CACHE_TTL,
+    serve_stale=Config.CATALOG_CACHE_SERVE_STALE,
+    name='catalog cache'
+)
+
+def invalidate_catalog():
+    unit_of_work.get_unit_of_work().after_commit(catalog_cache.bump)
+
+def load_course_catalog(search, semester, limit, after, include_total):
+    """Query one catalog page and return it as a serialized JSON body.
+
+    Runs on the request's own connection, so a cache miss never holds a second
+    pool connection; a background stale refresh has no request and checks one out.
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise Error("Database connection failed")
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
         cursor = conn.cursor(dictionary=True)
         
-        search = request.args.get('search', '')
-        semester = request.args.get('semester', '')
-        
-        query = """
-            SELECT c.*, u.username as teacher_name,
-            (SELECT COUNT(*) FROM enrollments WHERE course_id = c.id AND is_deleted = FALSE) as enrolled_count
-            FROM courses c
-            LEFT JOIN users u ON c.teacher_id = u.id
-            WHERE c.is_active = TRUE
-        """
+        where = " WHERE c.is_active = TRUE"
         params = []
         
         if search:
-            query += " AND (c.course_code LIKE %s OR c.course_name LIKE %s)"
+            where += " AND (c.course_code LIKE %s OR c.course_name LIKE %s)"
             params.extend([f"%{search}%", f"%{search}%"])
         
         if semester:
-            query += " AND c.semester = %s"
+            where += " AND c.semester = %s"
             params.append(semester)
         
-        query += " ORDER BY c.course_code"
+        total = None
+        if include_total:
+            cursor.execute("SELECT COUNT(*) as count FROM courses c" + where, params)
+            total = cursor.fetchone()['count']
+        
+        # Keyset pagination on the unique course code
+        if after:
+            where += " AND c.course_code > %s"
+            params.append(after[0])
+        
+        query = """
+            SELECT c.*, u.username as teacher_name
+            FROM courses c
+            LEFT JOIN users u ON c.teacher_id = u.id
+        """ + where + " ORDER BY c.course_code LIMIT %s"
+        params.append(limit + 1)
         
         cursor.execute(query, params)
-        courses = cursor.fetchall()
+        courses, next_cursor = paginate(cursor.fetchall(), limit, lambda c: [c['course_code']])
+        cursor.close()
+    finally:
+        conn.close()
+    
+    response = {'courses': courses, 'nextCursor': next_cursor}
+    if include_total:
+        response['total'] = total
+    return app.json.dumps(response)
+
+@app.route('/api/courses', methods=['GET'])
+@login_required
+@max_queries(4)
+def get_courses():
+    try:
+        search = request.args.get('search', '')
+        semester = request.args.get('semester', '')
+        limit, after, include_total = get_page_args(1)
+        
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
         
+        cursor = conn.cursor(dictionary=True)
+        last_modified = fetch_validators(cursor, 'catalog')
         cursor.close()
         conn.close()
         
-        return jsonify({'courses': courses}), 200
+        page = (search, semester, limit, request.args.get('cursor'), include_total)
+        etag = make_etag('courses', last_modified, page)
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        
+        # Keyed on the validator too, so a body is never paired with a newer ETag
+        body = catalog_cache.get_or_load(
+            (last_modified, page), lambda: load_course_catalog(search, semester, limit, after, include_total)
+        )
+        return with_etag(app.response_class(body, mimetype='application/json'), etag), 200
     
+    except InvalidPageRequest as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Get courses error: {e}")
         return jsonify({'error': 'Failed to fetch courses'}), 500
 
 @app.route('/api/courses/<int:course_id>', methods=['GET'])
 @login_required
+@max_queries(3)
 def get_course(course_id):
     try:
         conn = get_db_connection()
@@ -313,9 +503,23 @@ def get_course(course_id):
             return jsonify({'error': 'Database connection failed'}), 500
         
         cursor = conn.cursor(dictionary=True)
+        
+        cursor.execute("SELECT updated_at FROM courses WHERE id = %s", (course_id,))
+        row = cursor.fetchone()
+        if not row:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Course not found'}), 404
+        
+        etag = make_etag('course', course_id, row['updated_at'])
+        unchanged = not_modified(etag)
+        if unchanged:
+            cursor.close()
+            conn.close()
+            return unchanged
+        
         cursor.execute("""
-            SELECT c.*, u.username as teacher_name,
-            (SELECT COUNT(*) FROM enrollments WHERE course_id = c.id AND is_deleted = FALSE) as enrolled_count
+            SELECT c.*, u.username as teacher_name
             FROM courses c
             LEFT JOIN users u ON c.teacher_id = u.id
             WHERE c.id = %s
@@ -325,10 +529,7 @@ def get_course(course_id):
         cursor.close()
         conn.close()
         
-        if not course:
-            return jsonify({'error': 'Course not found'}), 404
-        
-        return jsonify({'course': course}), 200
+        return with_etag(jsonify({'course': course}), etag), 200
     
     except Exception as e:
         logger.error(f"Get course error: {e}")
@@ -336,6 +537,7 @@ def get_course(course_id):
 
 @app.route('/api/courses', methods=['POST'])
 @role_required('admin', 'teacher')
+@max_queries(3)
 def create_course():
     try:
         data = request.get_json()
@@ -357,7 +559,7 @@ def create_course():
             conn.close()
             return jsonify({'error': 'Course code already exists'}), 409
         
-        teacher_id = data.get('teacherId') if session['role'] == 'admin' else session['user_id']
+        teacher_id = data.get('teacherId') if current_principal()[0] == 'admin' else session['user_id']
         
         cursor.execute("""
             INSERT INTO courses (course_code, course_name, description, credits, teacher_id, semester, max_students)
@@ -372,9 +574,9 @@ def create_course():
             data['maxStudents']
         ))
         
-        conn.commit()
         course_id = cursor.lastrowid
         
+        invalidate_catalog()
         log_audit(session['user_id'], 'CREATE', 'courses', course_id, None, f"Course {data['courseCode']} created")
         logger.info(f"Course created: {data['courseCode']} by user {session['username']}")
         
@@ -389,6 +591,7 @@ def create_course():
 
 @app.route('/api/courses/<int:course_id>', methods=['PUT'])
 @role_required('admin', 'teacher')
+@max_queries(3)
 def update_course(course_id):
     try:
         data = request.get_json()
@@ -408,7 +611,7 @@ def update_course(course_id):
             conn.close()
             return jsonify({'error': 'Course not found'}), 404
         
-        if session['role'] == 'teacher' and course['teacher_id'] != session['user_id']:
+        if current_principal()[0] == 'teacher' and course['teacher_id'] != session['user_id']:
             cursor.close()
             conn.close()
             return jsonify({'error': 'Access denied'}), 403
@@ -435,10 +638,10 @@ def update_course(course_id):
         
         if update_fields:
             params.append(course_id)
-            query = f"UPDATE courses SET {', '.join(update_fields)} WHERE id = %s"
+            query = f"UPDATE courses SET {', '.join(update_fields)}, version = version + 1 WHERE id = %s"
             cursor.execute(query, params)
-            conn.commit()
             
+            invalidate_catalog()
             log_audit(session['user_id'], 'UPDATE', 'courses', course_id, str(course), str(data))
             logger.info(f"Course updated: {course['course_code']} by user {session['username']}")
         
@@ -453,6 +656,7 @@ def update_course(course_id):
 
 @app.route('/api/courses/<int:course_id>', methods=['DELETE'])
 @role_required('admin')
+@max_queries(3)
 def delete_course(course_id):
     try:
         conn = get_db_connection()
@@ -470,9 +674,9 @@ def delete_course(course_id):
             return jsonify({'error': 'Course not found'}), 404
         
         # Soft delete
-        cursor.execute("UPDATE courses SET is_active = FALSE WHERE id = %s", (course_id,))
-        conn.commit()
+        cursor.execute("UPDATE courses SET is_active = FALSE, version = version + 1 WHERE id = %s", (course_id,))
         
+        invalidate_catalog()
         log_audit(session['user_id'], 'DELETE', 'courses', course_id, str(course), None)
         logger.info(f"Course deleted: {course['course_code']} by user {session['username']}")
         
@@ -487,18 +691,69 @@ def delete_course(course_id):
 
 # ============ ENROLLMENT ROUTES ============
 
+# Deadlock victim / lock wait timeout: safe to retry the whole transaction
+RETRYABLE_LOCK_ERRORS = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+
+def take_seat(cursor, student_id, course_id):
+    """Claim a seat and create (or restore) the enrollment in the current transaction.
+
+    The conditional UPDATE both checks capacity and row-locks the course, so
+    concurrent enrollments for one course queue up instead of oversubscribing it.
+    Returns (outcome, enrollment_id); any outcome but 'enrolled' must be rolled back.
+    """
+    cursor.execute(
+        "UPDATE courses SET enrolled_count = enrolled_count + 1, version = version + 1 "
+        "WHERE id = %s AND is_active = TRUE AND enrolled_count < max_students",
+        (course_id,)
+    )
+    if not cursor.rowcount:
+        # A student already enrolled in a full course is told so, not that it is full
+        cursor.execute(
+            "SELECT c.id, e.id as enrollment_id FROM courses c "
+            "LEFT JOIN enrollments e ON e.course_id = c.id AND e.student_id = %s AND e.is_deleted = FALSE "
+            "WHERE c.id = %s AND c.is_active = TRUE",
+            (student_id, course_id)
+        )
+        course = cursor.fetchone()
+        if not course:
+            return 'not_found', None
+        if course['enrollment_id']:
+            return 'duplicate', course['enrollment_id']
+        return 'full', None
+    
+    try:
+        cursor.execute(
+            "INSERT INTO enrollments (student_id, course_id, status) VALUES (%s, %s, 'enrolled')",
+            (student_id, course_id)
+        )
+        return 'enrolled', cursor.lastrowid
+    except Error as e:
+        if e.errno != errorcode.ER_DUP_ENTRY:
+            raise
+    
+    # Existing row: restore it if it was soft-deleted
+    cursor.execute(
+        "SELECT id, is_deleted FROM enrollments WHERE student_id = %s AND course_id = %s",
+        (student_id, course_id)
+    )
+    existing = cursor.fetchone()
+    if not existing['is_deleted']:
+        return 'duplicate', existing['id']
+    cursor.execute(
+        "UPDATE enrollments SET is_deleted = FALSE, status = 'enrolled', grade = NULL, version = version + 1 "
+        "WHERE id = %s",
+        (existing['id'],)
+    )
+    return 'enrolled', existing['id']
+
 @app.route('/api/enrollments', methods=['GET'])
 @login_required
+@max_queries(4)
 def get_enrollments():
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
-        role = session['role']
+        role = current_principal()[0]
         user_id = session['user_id']
+        limit, after, include_total = get_page_args(2)
         
         if role == 'student':
             query = """
@@ -507,9 +762,9 @@ def get_enrollments():
                 JOIN courses c ON e.course_id = c.id
                 LEFT JOIN users u ON c.teacher_id = u.id
                 WHERE e.student_id = %s AND e.is_deleted = FALSE
-                ORDER BY e.enrollment_date DESC
             """
-            cursor.execute(query, (user_id,))
+            count_query = "SELECT COUNT(*) as count FROM enrollments e WHERE e.student_id = %s AND e.is_deleted = FALSE"
+            params = [user_id]
         
         elif role == 'teacher':
             query = """
@@ -518,9 +773,13 @@ def get_enrollments():
                 JOIN courses c ON e.course_id = c.id
                 JOIN users s ON e.student_id = s.id
                 WHERE c.teacher_id = %s AND e.is_deleted = FALSE
-                ORDER BY e.enrollment_date DESC
             """
-            cursor.execute(query, (user_id,))
+            count_query = """
+                SELECT COUNT(*) as count FROM enrollments e
+                JOIN courses c ON e.course_id = c.id
+                WHERE c.teacher_id = %s AND e.is_deleted = FALSE
+            """
+            params = [user_id]
         
         else:  # admin
             query = """
@@ -531,23 +790,67 @@ def get_enrollments():
                 JOIN users s ON e.student_id = s.id
                 LEFT JOIN users t ON c.teacher_id = t.id
                 WHERE e.is_deleted = FALSE
-                ORDER BY e.enrollment_date DESC
             """
-            cursor.execute(query)
+            count_query = "SELECT COUNT(*) as count FROM enrollments e WHERE e.is_deleted = FALSE"
+            params = []
+        
+        # Full export as a stream (?stream=true or NDJSON) instead of a page
+        stream_format = get_stream_format()
+        if stream_format:
+            query += " ORDER BY e.enrollment_date DESC, e.id DESC"
+            return stream_query(db_pool, query, params, 'enrollments', stream_format)
+        
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = conn.cursor(dictionary=True)
+        
+        # Conditional GET: the role's enrollment rows and the courses they join
+        etag = make_etag(
+            'enrollments', role, user_id, limit, request.args.get('cursor'), include_total,
+            fetch_validators(cursor, stats_role(role), params)
+        )
+        unchanged = not_modified(etag, per_user=True)
+        if unchanged:
+            cursor.close()
+            conn.close()
+            return unchanged
         
-        enrollments = cursor.fetchall()
+        total = None
+        if include_total:
+            cursor.execute(count_query, params)
+            total = cursor.fetchone()['count']
+        
+        # Keyset pagination on (enrollment_date, id), newest first
+        if after:
+            query += " AND (e.enrollment_date < %s OR (e.enrollment_date = %s AND e.id < %s))"
+            params.extend([after[0], after[0], after[1]])
+        query += " ORDER BY e.enrollment_date DESC, e.id DESC LIMIT %s"
+        params.append(limit + 1)
+        
+        cursor.execute(query, params)
+        enrollments, next_cursor = paginate(
+            cursor.fetchall(), limit, lambda e: [e['enrollment_date'], e['id']]
+        )
         
         cursor.close()
         conn.close()
         
-        return jsonify({'enrollments': enrollments}), 200
+        response = {'enrollments': enrollments, 'nextCursor': next_cursor}
+        if include_total:
+            response['total'] = total
+        return with_etag(jsonify(response), etag, per_user=True), 200
     
+    except InvalidPageRequest as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Get enrollments error: {e}")
         return jsonify({'error': 'Failed to fetch enrollments'}), 500
 
 @app.route('/api/enrollments', methods=['POST'])
 @login_required
+@max_queries(5)
 def create_enrollment():
     try:
         data = request.get_json()
@@ -556,7 +859,7 @@ def create_enrollment():
         if not course_id:
             return jsonify({'error': 'Missing course ID'}), 400
         
-        student_id = data.get('studentId') if session['role'] == 'admin' else session['user_id']
+        student_id = data.get('studentId') if current_principal()[0] == 'admin' else session['user_id']
         
         conn = get_db_connection()
         if not conn:
@@ -564,47 +867,32 @@ def create_enrollment():
         
         cursor = conn.cursor(dictionary=True)
         
-        # Check if course exists and is active
-        cursor.execute("SELECT * FROM courses WHERE id = %s AND is_active = TRUE", (course_id,))
-        course = cursor.fetchone()
-        
-        if not course:
-            cursor.close()
-            conn.close()
-            return jsonify({'error': 'Course not found or inactive'}), 404
-        
-        # Check if already enrolled
-        cursor.execute(
-            "SELECT id FROM enrollments WHERE student_id = %s AND course_id = %s AND is_deleted = FALSE",
-            (student_id, course_id)
-        )
-        if cursor.fetchone():
+        # Deadlock victims and lock wait timeouts are retried with jittered backoff
+        for attempt in range(Config.ENROLLMENT_MAX_RETRIES + 1):
+            try:
+                outcome, enrollment_id = take_seat(cursor, student_id, course_id)
+                break
+            except Error as e:
+                if e.errno not in RETRYABLE_LOCK_ERRORS or attempt == Config.ENROLLMENT_MAX_RETRIES:
+                    raise
+                conn.rollback()
+                backoff_ms = Config.ENROLLMENT_RETRY_BACKOFF_MS * (2 ** attempt)
+                time.sleep(random.uniform(0, backoff_ms) / 1000)
+        
+        if outcome != 'enrolled':
+            conn.rollback()  # Give the seat back and release the course row lock
             cursor.close()
             conn.close()
+            if outcome == 'not_found':
+                return jsonify({'error': 'Course not found or inactive'}), 404
+            if outcome == 'full':
+                return jsonify({'error': 'Course is full'}), 400
             return jsonify({'error': 'Already enrolled in this course'}), 409
         
-        # Check course capacity
-        cursor.execute(
-            "SELECT COUNT(*) as count FROM enrollments WHERE course_id = %s AND is_deleted = FALSE",
-            (course_id,)
-        )
-        result = cursor.fetchone()
-        if result['count'] >= course['max_students']:
-            cursor.close()
-            conn.close()
-            return jsonify({'error': 'Course is full'}), 400
-        
-        # Create enrollment
-        cursor.execute(
-            "INSERT INTO enrollments (student_id, course_id, status) VALUES (%s, %s, 'enrolled')",
-            (student_id, course_id)
-        )
-        conn.commit()
-        enrollment_id = cursor.lastrowid
-        
+        invalidate_catalog()
         log_audit(session['user_id'], 'CREATE', 'enrollments', enrollment_id, None, 
                  f"Student {student_id} enrolled in course {course_id}")
-        logger.info(f"Enrollment created: Student {student_id} in course {course['course_code']}")
+        logger.info(f"Enrollment created: Student {student_id} in course {course_id}")
         
         cursor.close()
         conn.close()
@@ -617,6 +905,7 @@ def create_enrollment():
 
 @app.route('/api/enrollments/<int:enrollment_id>', methods=['PUT'])
 @role_required('admin', 'teacher')
+@max_queries(3)
 def update_enrollment(enrollment_id):
     try:
         data = request.get_json()
@@ -641,7 +930,7 @@ def update_enrollment(enrollment_id):
             conn.close()
             return jsonify({'error': 'Enrollment not found'}), 404
         
-        if session['role'] == 'teacher' and enrollment['teacher_id'] != session['user_id']:
+        if current_principal()[0] == 'teacher' and enrollment['teacher_id'] != session['user_id']:
             cursor.close()
             conn.close()
             return jsonify({'error': 'Access denied'}), 403
@@ -659,9 +948,8 @@ def update_enrollment(enrollment_id):
         
         if update_fields:
             params.append(enrollment_id)
-            query = f"UPDATE enrollments SET {', '.join(update_fields)} WHERE id = %s"
+            query = f"UPDATE enrollments SET {', '.join(update_fields)}, version = version + 1 WHERE id = %s"
             cursor.execute(query, params)
-            conn.commit()
             
             log_audit(session['user_id'], 'UPDATE', 'enrollments', enrollment_id, str(enrollment), str(data))
             logger.info(f"Enrollment updated: ID {enrollment_id} by user {session['username']}")
@@ -677,6 +965,7 @@ def update_enrollment(enrollment_id):
 
 @app.route('/api/enrollments/<int:enrollment_id>', methods=['DELETE'])
 @login_required
+@max_queries(5)
 def delete_enrollment(enrollment_id):
     try:
         conn = get_db_connection()
@@ -694,15 +983,28 @@ def delete_enrollment(enrollment_id):
             return jsonify({'error': 'Enrollment not found'}), 404
         
         # Check permissions
-        if session['role'] == 'student' and enrollment['student_id'] != session['user_id']:
+        if current_principal()[0] == 'student' and enrollment['student_id'] != session['user_id']:
             cursor.close()
             conn.close()
             return jsonify({'error': 'Access denied'}), 403
         
-        # Soft delete
-        cursor.execute("UPDATE enrollments SET is_deleted = TRUE WHERE id = %s", (enrollment_id,))
-        conn.commit()
+        # Lock the course before the enrollment, in the same order as take_seat,
+        # so a drop and an enrollment in the same course cannot deadlock
+        cursor.execute("SELECT id FROM courses WHERE id = %s FOR UPDATE", (enrollment['course_id'],))
+        cursor.fetchall()
         
+        # Soft delete (only a live enrollment frees a seat)
+        cursor.execute(
+            "UPDATE enrollments SET is_deleted = TRUE, version = version + 1 WHERE id = %s AND is_deleted = FALSE",
+            (enrollment_id,)
+        )
+        if cursor.rowcount:
+            cursor.execute(
+                "UPDATE courses SET enrolled_count = enrolled_count - 1, version = version + 1 WHERE id = %s",
+                (enrollment['course_id'],)
+            )
+        
+        invalidate_catalog()
         log_audit(session['user_id'], 'DELETE', 'enrollments', enrollment_id, str(enrollment), None)
         logger.info(f"Enrollment deleted: ID {enrollment_id} by user {session['username']}")
         
@@ -719,44 +1021,71 @@ def delete_enrollment(enrollment_id):
 
 @app.route('/api/users', methods=['GET'])
 @role_required('admin')
+@max_queries(3)
 def get_users():
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        
         role_filter = request.args.get('role', '')
         search = request.args.get('search', '')
+        limit, after, include_total = get_page_args(2)
         
-        query = "SELECT id, username, email, role, created_at, is_active FROM users WHERE 1=1"
+        where = " WHERE 1=1"
         params = []
         
         if role_filter:
-            query += " AND role = %s"
+            where += " AND role = %s"
             params.append(role_filter)
         
         if search:
-            query += " AND (username LIKE %s OR email LIKE %s)"
+            where += " AND (username LIKE %s OR email LIKE %s)"
             params.extend([f"%{search}%", f"%{search}%"])
         
-        query += " ORDER BY created_at DESC"
+        # Full export as a stream (?stream=true or NDJSON) instead of a page
+        stream_format = get_stream_format()
+        if stream_format:
+            query = "SELECT id, username, email, role, created_at, is_active FROM users" + where
+            query += " ORDER BY created_at DESC, id DESC"
+            return stream_query(db_pool, query, params, 'users', stream_format)
+        
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = conn.cursor(dictionary=True)
+        
+        total = None
+        if include_total:
+            cursor.execute("SELECT COUNT(*) as count FROM users" + where, params)
+            total = cursor.fetchone()['count']
+        
+        # Keyset pagination on (created_at, id), newest first
+        if after:
+            where += " AND (created_at < %s OR (created_at = %s AND id < %s))"
+            params.extend([after[0], after[0], after[1]])
+        
+        query = "SELECT id, username, email, role, created_at, is_active FROM users" + where
+        query += " ORDER BY created_at DESC, id DESC LIMIT %s"
+        params.append(limit + 1)
         
         cursor.execute(query, params)
-        users = cursor.fetchall()
+        users, next_cursor = paginate(cursor.fetchall(), limit, lambda u: [u['created_at'], u['id']])
         
         cursor.close()
         conn.close()
         
-        return jsonify({'users': users}), 200
+        response = {'users': users, 'nextCursor': next_cursor}
+        if include_total:
+            response['total'] = total
+        return jsonify(response), 200
     
+    except InvalidPageRequest as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Get users error: {e}")
         return jsonify({'error': 'Failed to fetch users'}), 500
 
 @app.route('/api/users/<int:user_id>', methods=['PUT'])
 @role_required('admin')
+@max_queries(3)
 def update_user(user_id):
     try:
         data = request.get_json()
@@ -789,10 +1118,16 @@ def update_user(user_id):
             params.append(user_id)
             query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = %s"
             cursor.execute(query, params)
-            conn.commit()
             
             log_audit(session['user_id'], 'UPDATE', 'users', user_id, str(user), str(data))
             logger.info(f"User updated: {user['username']} by admin {session['username']}")
+            
+            unit_of_work.get_unit_of_work().after_commit(principal_cache.invalidate)
+            # Deactivated users and role changes are signed out everywhere once this commits
+            if ('isActive' in data and not data['isActive']) or data.get('role', user['role']) != user['role']:
+                unit_of_work.get_unit_of_work().after_commit(
+                    lambda: app.session_interface.store.delete_user(user_id)
+                )
         
         cursor.close()
         conn.close()
@@ -805,66 +1140,157 @@ def update_user(user_id):
 
 # ============ DASHBOARD/STATS ROUTES ============
 
+# Global admin totals change constantly but only need to be roughly current
+admin_stats_cache = VersionedCache(maxsize=1, ttl=Config.DASHBOARD_STATS_TTL, name='admin stats cache')
+
+def load_admin_stats():
+    with db_pool.connect() as conn:
+        cursor = conn.cursor(dictionary=True)
+        stats = compute_stats(cursor, 'admin')
+        cursor.close()
+    return stats, time.time()
+
 @app.route('/api/dashboard/stats', methods=['GET'])
 @login_required
+@max_queries(3)
 def get_dashboard_stats():
     try:
+        role = stats_role(current_principal()[0])
+        user_id = session['user_id']
+        
+        if role == 'admin':
+            # Served from the short-TTL cache; the ETag follows the cached snapshot
+            stats, computed_at = admin_stats_cache.get_or_load('admin', load_admin_stats)
+            etag = make_etag('stats', role, computed_at)
+            unchanged = not_modified(etag, per_user=True)
+            if unchanged:
+                return unchanged
+            fresh = freshness(computed_at, time.time(), cached=True, max_age=Config.DASHBOARD_STATS_TTL)
+            return with_etag(jsonify({'stats': stats, 'freshness': fresh}), etag, per_user=True), 200
+        
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
         
         cursor = conn.cursor(dictionary=True)
         
-        role = session['role']
-        user_id = session['user_id']
-        
-        stats = {}
-        
-        if role == 'student':
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM enrollments WHERE student_id = %s AND is_deleted = FALSE",
-                (user_id,)
-            )
-            stats['enrolledCourses'] = cursor.fetchone()['count']
-            
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM courses WHERE is_active = TRUE"
-            )
-            stats['availableCourses'] = cursor.fetchone()['count']
-        
-        elif role == 'teacher':
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM courses WHERE teacher_id = %s AND is_active = TRUE",
-                (user_id,)
-            )
-            stats['myCourses'] = cursor.fetchone()['count']
-            
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM enrollments e
-                JOIN courses c ON e.course_id = c.id
-                WHERE c.teacher_id = %s AND e.is_deleted = FALSE
-            """, (user_id,))
-            stats['totalStudents'] = cursor.fetchone()['count']
-        
-        else:  # admin
-            cursor.execute("SELECT COUNT(*) as count FROM users WHERE is_active = TRUE")
-            stats['totalUsers'] = cursor.fetchone()['count']
-            
-            cursor.execute("SELECT COUNT(*) as count FROM courses WHERE is_active = TRUE")
-            stats['totalCourses'] = cursor.fetchone()['count']
-            
-            cursor.execute("SELECT COUNT(*) as count FROM enrollments WHERE is_deleted = FALSE")
-            stats['totalEnrollments'] = cursor.fetchone()['count']
+        # Conditional GET: the role's counters are one indexed query, so they are their own validator
+        stats = compute_stats(cursor, role, user_id)
         
         cursor.close()
         conn.close()
         
-        return jsonify({'stats': stats}), 200
+        etag = make_etag('stats', role, user_id, stats)
+        unchanged = not_modified(etag, per_user=True)
+        if unchanged:
+            return unchanged
+        
+        now = time.time()
+        fresh = freshness(now, now, cached=False)
+        return with_etag(jsonify({'stats': stats, 'freshness': fresh}), etag, per_user=True), 200
     
     except Exception as e:
         logger.error(f"Get dashboard stats error: {e}")
         return jsonify({'error': 'Failed to fetch stats'}), 500
 
+# ============ METRICS ============
+
+app_metrics = metrics.Metrics(Config.METRICS_DIR, metrics.parse_buckets(Config.METRICS_BUCKETS))
+metrics.init_app(app, app_metrics)
+
+def runtime_gauges():
+    pool = db_pool.stats()
+    audit = audit_writer.stats()
+    return {
+        'campushub_db_pool_open': pool['open'],
+        'campushub_db_pool_idle': pool['idle'],
+        'campushub_db_pool_checked_out': pool['checked_out'],
+        'campushub_db_pool_overflow': pool['overflow'],
+        'campushub_db_pool_timeouts': pool['timeouts'],
+        'campushub_audit_queue_depth': audit['queue_depth'],
+        'campushub_audit_dropped': audit['dropped'],
+        'campushub_audit_failed': audit['failed'],
+        'campushub_password_hash_pending': password_hasher.pending,
+    }
+
+app_metrics.add_gauges(runtime_gauges)
+rate_limiter.add_limit_hook(lambda route_class: app_metrics.inc('campushub_rate_limited_total', {'class': route_class}))
+
+@app.route('/metrics', methods=['GET'])
+@rate_limiter.exempt
+@max_queries(1)
+def get_metrics():
+    if not metrics.scrape_allowed():
+        return jsonify({'error': 'Access denied', 'code': 403}), 403
+    return app.response_class(app_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# ============ HEALTH CHECKS AND LIFECYCLE ============
+
+# Set while this process should get traffic. serve.py clears it until a worker
+# has warmed up and again once it starts draining; under app.run() it stays set.
+readiness = threading.Event()
+readiness.set()
+
+@app.route('/healthz', methods=['GET'])
+@rate_limiter.exempt
+@max_queries(0)
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'ok'}), 200
+
+@app.route('/readyz', methods=['GET'])
+@rate_limiter.exempt
+@max_queries(0)
+def readyz():
+    """Readiness: warmed up, not draining, and the database answers"""
+    if not readiness.is_set():
+        return jsonify({'status': 'not ready'}), 503
+    try:
+        with db_pool.connect() as conn:
+            conn.ping(reconnect=False)
+    except Error as e:
+        logger.warning(f"Readiness check failed: {e}")
+        return jsonify({'status': 'database unavailable'}), 503
+    return jsonify({'status': 'ready'}), 200
+
+def warm_catalog():
+    """Load the unfiltered first catalog page under the key get_courses looks it up by"""
+    with app.test_request_context('/api/courses'):
+        limit, after, include_total = get_page_args(1)
+        # The request's unit of work: load_course_catalog reuses its connection
+        conn = unit_of_work.get_unit_of_work().connection()
+        cursor = conn.cursor(dictionary=True)
+        last_modified = fetch_validators(cursor, 'catalog')
+        cursor.close()
+        page = ('', '', limit, None, include_total)
+        catalog_cache.get_or_load(
+            (last_modified, page), lambda: load_course_catalog('', '', limit, after, include_total)
+        )
+
+def warm_up():
+    """Open this process's pool connections and fill its caches before it takes traffic.
+
+    Each step is best effort: a worker that cannot reach the database still
+    starts, and /readyz reports it as unavailable until the database answers.
+    """
+    steps = [
+        ('database pool', db_pool.prefill),
+        ('password hashing pool', password_hasher.warm_up),
+        ('course catalog', warm_catalog),
+        ('admin stats', lambda: admin_stats_cache.get_or_load('admin', load_admin_stats)),
+    ]
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up of the {name} failed: {e}")
+
+def shutdown():
+    """Flush queued audit rows and release this process's pools; call once requests have drained"""
+    audit_writer.close()
+    password_hasher.shutdown(wait=True)
+    db_pool.dispose()
+
 # ============ ERROR HANDLERS ============
 
 @app.errorhandler(404)
@@ -0,0 +1,141 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """Buffers audit rows in memory and writes them in batches from a background thread.
+
+    ``sink`` receives a list of rows and is expected to insert them with a single
+    multi-row statement. A batch is flushed once ``batch_size`` rows are waiting or
+    ``flush_interval`` seconds after its first row arrived, and again on shutdown.
+    When the queue is full, enqueue() waits up to ``enqueue_timeout`` seconds and
+    then drops the row. Rows enqueued after close() are written synchronously.
+    """
+
+    def __init__(self, sink, batch_size=100, flush_interval=0.2, max_queue=10000,
+                 enqueue_timeout=0.05):
+        self._sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.enqueue_timeout = enqueue_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._pid = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child: the parent owns whatever was queued before the fork
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._stopping.clear()
+                self._closed = False
+                self._thread = None
+                self._pid = os.getpid()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, row):
+        if self._closed and self._pid == os.getpid():
+            # Shutting down: the writer thread is gone or about to be
+            self.enqueued += 1
+            self._write([row])
+            return True
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Audit queue full, dropping entry")
+            return False
+        self.enqueued += 1
+        if self._closed:
+            # close() may have drained the queue before this row landed
+            self._drain()
+        return True
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+
+    def _collect(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if self._stopping.is_set():
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                continue
+            timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _write(self, batch):
+        try:
+            self._sink(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Audit batch of {len(batch)} failed: {e}")
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def close(self, timeout=5.0):
+        """Flush queued rows and stop the background thread"""
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        self._closed = True
+        self._stopping.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self.max_queue,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches,
+        }
@@ -0,0 +1,130 @@
+"""Fire thousands of parallel enrollments at a single 40-seat course.
+
+Fails (exit code 1) if the course is oversubscribed, if the seat counter drifts
+from the live enrollment rows, or if p99 latency exceeds the target. Run from
+the backend directory against a local MySQL with the current schema:
+
+    python -m benchmarks.enrollment_stress --students 3000 --concurrency 64 --p99-ms 250
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import mysql.connector
+
+import app as app_module
+from config import Config
+
+COURSE_CODE = 'STRESS40'
+SEATS = 40
+
+
+def setup(cursor, students):
+    cursor.execute("DELETE FROM courses WHERE course_code = %s", (COURSE_CODE,))
+    cursor.execute(
+        "INSERT INTO courses (course_code, course_name, credits, semester, max_students) "
+        "VALUES (%s, 'Enrollment stress test', 3, 'Stress', %s)",
+        (COURSE_CODE, SEATS)
+    )
+    course_id = cursor.lastrowid
+    cursor.executemany(
+        "INSERT IGNORE INTO users (username, email, password_hash, role) VALUES (%s, %s, 'x', 'student')",
+        [(f"stress_{i}", f"stress_{i}@stress.campushub.com") for i in range(students)]
+    )
+    cursor.execute("SELECT id FROM users WHERE username LIKE 'stress\\_%%' ORDER BY id LIMIT %s", (students,))
+    student_ids = [row[0] for row in cursor.fetchall()]
+    return course_id, student_ids
+
+
+def cleanup(cursor):
+    cursor.execute("DELETE FROM courses WHERE course_code = %s", (COURSE_CODE,))
+    cursor.execute("DELETE FROM users WHERE username LIKE 'stress\\_%%'")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--p99-ms', type=float, default=250.0, help="latency target for the p99")
+    parser.add_argument('--keep', action='store_true', help="keep the stress course and users afterwards")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(**Config.DB_CONFIG)
+    cursor = conn.cursor()
+    course_id, student_ids = setup(cursor, args.students)
+    conn.commit()
+
+    local = threading.local()
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    start_gate = threading.Event()
+
+    def enroll(student_id):
+        if not hasattr(local, 'client'):
+            local.client = app_module.app.test_client()
+        with local.client.session_transaction() as sess:
+            sess['user_id'] = student_id
+            sess['username'] = f"student {student_id}"
+            sess['role'] = 'student'
+        start_gate.wait()
+        started = time.perf_counter()
+        response = local.client.post('/api/enrollments', json={'courseId': course_id})
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(enroll, sid) for sid in student_ids]
+        started = time.perf_counter()
+        start_gate.set()
+        for future in futures:
+            future.result()
+        wall = time.perf_counter() - started
+
+    cursor.execute("SELECT enrolled_count FROM courses WHERE id = %s", (course_id,))
+    counter = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM enrollments WHERE course_id = %s AND is_deleted = FALSE", (course_id,))
+    live = cursor.fetchone()[0]
+    conn.commit()
+
+    p50, p99 = percentile(latencies, 0.50), percentile(latencies, 0.99)
+    print(f"{len(student_ids)} enrollment attempts, concurrency {args.concurrency}, {wall:.2f}s "
+          f"({len(student_ids) / wall:.0f} req/s)")
+    print(f"  responses: {dict(sorted(statuses.items()))}")
+    print(f"  latency:   p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {max(latencies):.1f} ms")
+    print(f"  seats:     {live} live enrollments, counter {counter}, capacity {SEATS}")
+
+    failures = []
+    if live > SEATS:
+        failures.append(f"oversubscribed: {live} > {SEATS}")
+    if counter != live:
+        failures.append(f"seat counter drifted: {counter} != {live}")
+    if len(student_ids) >= SEATS and statuses.get(201, 0) != SEATS:
+        failures.append(f"expected {SEATS} successful enrollments, got {statuses.get(201, 0)}")
+    if p99 > args.p99_ms:
+        failures.append(f"p99 {p99:.1f} ms exceeds target {args.p99_ms:.1f} ms")
+
+    app_module.audit_writer.close()
+    if not args.keep:
+        cleanup(cursor)
+        conn.commit()
+    cursor.close()
+    conn.close()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("PASS")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
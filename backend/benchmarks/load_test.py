@@ -0,0 +1,375 @@
+"""End-to-end HTTP load test with a mix of realistic scenarios.
+
+Virtual users run against a real server over keep-alive connections, each
+with its own session cookie. Every virtual user is assigned one scenario,
+weighted by --mix:
+
+    login_storm        log in again and again as random students
+    browse             students searching /api/courses and paging through results
+    registration_rush  students enrolling in the most popular courses (POST /api/enrollments)
+    bulk_grading       teachers grading their enrollments (PUT /api/enrollments/<id>)
+    admin_paging       admins paging through /api/users
+
+Accounts come from the database (tools.generate_campus creates a suitable
+campus; its users share the password campus-pass). The run reports throughput
+and p50/p95/p99 per endpoint. It also reports the error rate (5xx and
+connection failures), with 4xx and 429 responses counted separately.
+--output saves the results as JSON, and --baseline compares them against a
+saved run. The exit status is 1 when any endpoint regressed beyond
+--tolerance.
+
+Start the app with serve.py and RATELIMIT_ENABLED=false (a load test is one
+client to the limiter), e.g. RATELIMIT_ENABLED=false python serve.py --port
+8000, then run from the backend directory against a scratch database, since
+the write scenarios change data:
+
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --users 64 --duration 60 --output run.json
+    python -m benchmarks.load_test --mix browse=1 --baseline run.json
+"""
+import argparse
+import http.client
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit, quote
+import mysql.connector
+from config import Config
+
+SCENARIOS = ('login_storm', 'browse', 'registration_rush', 'bulk_grading', 'admin_paging')
+DEFAULT_MIX = 'login_storm=1,browse=6,registration_rush=2,bulk_grading=1,admin_paging=1'
+SEARCH_TERMS = ['', 'CS', 'MATH', 'Intro', 'Advanced', 'PHY', 'Seminar', 'ECON', '2']
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    """Latencies and statuses per endpoint; samples before ``measure_from`` are dropped"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.latencies = {}
+        self.statuses = {}
+        self.lock = threading.Lock()
+
+    def add(self, endpoint, status, elapsed):
+        if time.perf_counter() < self.measure_from:
+            return
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(elapsed)
+            self.statuses.setdefault(endpoint, Counter())[status] += 1
+
+
+class Client:
+    """One virtual user: a keep-alive connection and a cookie jar"""
+
+    def __init__(self, url, recorder, timeout=30.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.timeout = timeout
+        self.recorder = recorder
+        self.cookies = {}
+        self.conn = None
+        self.logged_in = False
+
+    def request(self, method, path, endpoint, body=None):
+        """Returns (status, parsed JSON or None); status 0 is a connection failure"""
+        headers = {'Accept': 'application/json'}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        data = None
+        if body is not None:
+            data = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = self.connection_class(self.host, self.port, timeout=self.timeout)
+            self.conn.request(method, path, body=data, headers=headers)
+            response = self.conn.getresponse()
+            payload = response.read()
+            status = response.status
+            for header in response.msg.get_all('Set-Cookie') or []:
+                for name, morsel in SimpleCookie(header).items():
+                    self.cookies[name] = morsel.value
+        except (OSError, http.client.HTTPException):
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+            self.recorder.add(endpoint, 0, time.perf_counter() - started)
+            return 0, None
+        self.recorder.add(endpoint, status, time.perf_counter() - started)
+        try:
+            return status, json.loads(payload) if payload else None
+        except ValueError:
+            return status, None
+
+    def login(self, account, password):
+        self.cookies.clear()
+        status, _ = self.request('POST', '/api/auth/login', 'POST /api/auth/login',
+                                 {'username': account['username'], 'password': password})
+        self.logged_in = status == 200
+        return self.logged_in
+
+
+def load_fixture(accounts_per_role, popular_courses):
+    """Active accounts per role and the most enrolled courses"""
+    conn = mysql.connector.connect(**Config.DB_CONFIG)
+    cursor = conn.cursor(dictionary=True)
+    accounts = {}
+    for role in ('student', 'teacher', 'admin'):
+        cursor.execute(
+            "SELECT id, username FROM users WHERE role = %s AND is_active = TRUE ORDER BY id DESC LIMIT %s",
+            (role, accounts_per_role)
+        )
+        accounts[role] = cursor.fetchall()
+    cursor.execute(
+        "SELECT id FROM courses WHERE is_active = TRUE ORDER BY enrolled_count DESC, id LIMIT %s",
+        (popular_courses,)
+    )
+    courses = [row['id'] for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    return accounts, courses
+
+
+class Scenarios:
+    """One iteration of each scenario; the client keeps its session between iterations"""
+
+    def __init__(self, accounts, courses, password):
+        self.accounts = accounts
+        self.courses = courses
+        self.password = password
+
+    def ensure_login(self, client, role, rng):
+        if not client.logged_in:
+            client.login(rng.choice(self.accounts[role]), self.password)
+        return client.logged_in
+
+    def login_storm(self, client, rng, state):
+        client.login(rng.choice(self.accounts['student']), self.password)
+
+    def browse(self, client, rng, state):
+        if not self.ensure_login(client, 'student', rng):
+            return
+        path = f"/api/courses?limit=20&search={quote(rng.choice(SEARCH_TERMS))}"
+        status, body = client.request('GET', path, 'GET /api/courses')
+        if status == 200 and body.get('nextCursor') and rng.random() < 0.5:
+            client.request('GET', f"{path}&cursor={body['nextCursor']}", 'GET /api/courses')
+
+    def registration_rush(self, client, rng, state):
+        if not self.ensure_login(client, 'student', rng) or not self.courses:
+            return
+        # Everyone wants the same few courses: most attempts end in "full" or "already enrolled"
+        course_id = self.courses[min(int(rng.expovariate(0.3)), len(self.courses) - 1)]
+        client.request('POST', '/api/enrollments', 'POST /api/enrollments', {'courseId': course_id})
+
+    def bulk_grading(self, client, rng, state):
+        if not self.ensure_login(client, 'teacher', rng):
+            return
+        if not state.get('enrollments'):
+            status, body = client.request('GET', '/api/enrollments?limit=100', 'GET /api/enrollments')
+            state['enrollments'] = [e['id'] for e in body['enrollments']] if status == 200 else []
+            if not state['enrollments']:
+                # A teacher without students; switch to another one next time
+                client.logged_in = False
+                return
+        enrollment_id = state['enrollments'].pop()
+        client.request('PUT', f'/api/enrollments/{enrollment_id}', 'PUT /api/enrollments/<id>',
+                       {'grade': rng.choice(['A', 'B', 'C', 'D']), 'status': 'completed'})
+
+    def admin_paging(self, client, rng, state):
+        if not self.ensure_login(client, 'admin', rng):
+            return
+        path = '/api/users?limit=50'
+        cursor = None
+        for _ in range(rng.randint(1, 5)):
+            status, body = client.request('GET', path + (f'&cursor={cursor}' if cursor else ''), 'GET /api/users')
+            cursor = body.get('nextCursor') if status == 200 else None
+            if not cursor:
+                break
+
+
+def run_load(url, mix, users, duration, warmup, think, fixture, password, seed):
+    accounts, courses = fixture
+    scenarios = Scenarios(accounts, courses, password)
+    needed = {'login_storm': 'student', 'browse': 'student', 'registration_rush': 'student',
+              'bulk_grading': 'teacher', 'admin_paging': 'admin'}
+    for name in list(mix):
+        if not accounts[needed[name]]:
+            print(f"No active {needed[name]} accounts, dropping the {name} scenario")
+            del mix[name]
+    if not mix:
+        raise SystemExit("Nothing to run")
+
+    rng = random.Random(seed)
+    assigned = rng.choices(list(mix), weights=list(mix.values()), k=users)
+    started = time.perf_counter()
+    recorder = Recorder(measure_from=started + warmup)
+    stop = started + warmup + duration
+
+    def virtual_user(n, scenario):
+        user_rng = random.Random(seed * 1000 + n)
+        client = Client(url, recorder)
+        step = getattr(scenarios, scenario)
+        state = {}
+        while time.perf_counter() < stop:
+            step(client, user_rng, state)
+            if think:
+                time.sleep(user_rng.expovariate(1 / think))
+        if client.conn:
+            client.conn.close()
+
+    threads = [threading.Thread(target=virtual_user, args=(n, s), daemon=True) for n, s in enumerate(assigned)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(recorder, duration, dict(Counter(assigned)))
+
+
+def summarize(recorder, duration, assigned):
+    endpoints = {}
+    total_requests = total_errors = 0
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        statuses = recorder.statuses[endpoint]
+        count = len(latencies)
+        errors = sum(n for status, n in statuses.items() if status == 0 or status >= 500)
+        endpoints[endpoint] = {
+            'requests': count,
+            'throughput': count / duration,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'error_rate': errors / count,
+            'client_errors': sum(n for status, n in statuses.items() if 400 <= status < 500 and status != 429),
+            'rate_limited': statuses.get(429, 0),
+            'statuses': {str(status): n for status, n in sorted(statuses.items())},
+        }
+        total_requests += count
+        total_errors += errors
+    return {
+        'totals': {
+            'requests': total_requests,
+            'throughput': total_requests / duration,
+            'error_rate': total_errors / total_requests if total_requests else 0.0,
+        },
+        'virtual_users': assigned,
+        'endpoints': endpoints,
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results):
+    print(f"{'endpoint':<32}{'requests':>9}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}{'4xx':>6}{'429':>6}")
+    for endpoint, r in results['endpoints'].items():
+        print(f"{endpoint:<32}{r['requests']:>9}{r['throughput']:>9.1f}{r['p50_ms']:>7.1f}ms{r['p95_ms']:>7.1f}ms"
+              f"{r['p99_ms']:>7.1f}ms{r['error_rate']:>7.1%}{r['client_errors']:>6}{r['rate_limited']:>6}")
+    t = results['totals']
+    print(f"{'total':<32}{t['requests']:>9}{t['throughput']:>9.1f}{'':>27}{t['error_rate']:>7.1%}")
+
+
+def compare(results, baseline, tolerance):
+    """Print the change per endpoint; returns the regressions"""
+    regressions = []
+    print(f"\nAgainst baseline ({baseline['meta'].get('commit') or 'unknown commit'}, {baseline['meta']['started']}):")
+    print(f"{'endpoint':<32}{'req/s':>16}{'p95':>22}{'error rate':>22}")
+    for endpoint, r in results['endpoints'].items():
+        b = baseline['endpoints'].get(endpoint)
+        if b is None:
+            print(f"{endpoint:<32}  (not in baseline)")
+            continue
+        throughput = (r['throughput'] - b['throughput']) / b['throughput'] if b['throughput'] else 0.0
+        p95 = (r['p95_ms'] - b['p95_ms']) / b['p95_ms'] if b['p95_ms'] else 0.0
+        print(f"{endpoint:<32}{b['throughput']:>7.1f} {throughput:>+7.1%}{b['p95_ms']:>11.1f}ms {p95:>+7.1%}"
+              f"{b['error_rate']:>13.1%} -> {r['error_rate']:.1%}")
+        if throughput < -tolerance:
+            regressions.append(f"{endpoint}: throughput {throughput:+.1%}")
+        if p95 > tolerance:
+            regressions.append(f"{endpoint}: p95 {p95:+.1%}")
+        if r['error_rate'] > b['error_rate'] + 0.01:
+            regressions.append(f"{endpoint}: error rate {b['error_rate']:.1%} -> {r['error_rate']:.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='server to test (default http://127.0.0.1:5000)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'scenario weights (default {DEFAULT_MIX})')
+    parser.add_argument('--users', type=int, default=32, help='concurrent virtual users (default 32)')
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds (default 30)')
+    parser.add_argument('--warmup', type=float, default=5.0, help='unmeasured seconds first (default 5)')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='mean pause between iterations per user')
+    parser.add_argument('--accounts', type=int, default=1000, help='accounts per role to draw from (default 1000)')
+    parser.add_argument('--password', default='campus-pass', help='password of the test accounts')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='save the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against a JSON file saved with --output')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='allowed p95 increase or throughput drop before failing (default 0.15)')
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.accounts, popular_courses=20)
+    meta = {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'url': args.url,
+        'users': args.users,
+        'duration': args.duration,
+        'mix': args.mix,
+    }
+    print(f"{args.users} virtual users for {args.duration:.0f}s (+{args.warmup:.0f}s warm-up) against {args.url}")
+    results = run_load(args.url, dict(args.mix), args.users, args.duration, args.warmup,
+                       args.think_ms / 1000, fixture, args.password, args.seed)
+    results = {'meta': meta, **results}
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"- {regression}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Login throughput and non-login latency while a login storm is running.
+
+Simulates a lecture hall logging in at once: ``--storm`` threads log in as
+``storm_`` users in a loop while ``--probes`` threads keep reading the course
+catalog. Each mode runs in its own child process with its own hashing setup:
+
+    inline  PASSWORD_HASH_WORKERS=0, hashing on the serving threads (the old path)
+    pool    hashing on the process pool (PASSWORD_HASH_WORKERS, default cpu count)
+
+Run from the backend directory against a scratch database:
+
+    python -m benchmarks.login_storm --duration 20 --storm 64 --probes 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+import mysql.connector
+from werkzeug.security import generate_password_hash
+from config import Config
+
+MODES = ('inline', 'pool')
+PASSWORD = 'storm-pass'
+
+
+def setup_users(count):
+    conn = mysql.connector.connect(**Config.DB_CONFIG)
+    cursor = conn.cursor()
+    # One hash for every user; the cost we measure is verification
+    password_hash = generate_password_hash(PASSWORD)
+    cursor.executemany(
+        "INSERT IGNORE INTO users (username, email, password_hash, role) VALUES (%s, %s, %s, 'student')",
+        [(f'storm_{i}', f'storm_{i}@example.com', password_hash) for i in range(count)]
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def cleanup_users():
+    conn = mysql.connector.connect(**Config.DB_CONFIG)
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM users WHERE username LIKE 'storm\\_%'")
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def measure(mode, duration, storm, probes, users):
+    import app as app_module
+    from password_hashing import password_hasher
+
+    app = app_module.app
+    # The storm is one client address; measure hashing, not the limiter
+    app.config['RATELIMIT_ENABLED'] = False
+    password_hasher.warm_up()
+    stop = time.perf_counter() + duration
+    login_status = Counter()
+    login_latency = []
+    probe_latency = []
+    lock = threading.Lock()
+
+    def storm_worker(n):
+        client = app.test_client()
+        i = n
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            r = client.post('/api/auth/login', json={'username': f'storm_{i % users}', 'password': PASSWORD})
+            elapsed = time.perf_counter() - started
+            with lock:
+                login_status[r.status_code] += 1
+                login_latency.append(elapsed)
+            i += storm
+
+    def probe_worker():
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['username'] = 'admin'
+            sess['role'] = 'admin'
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            client.get('/api/courses?limit=20')
+            elapsed = time.perf_counter() - started
+            with lock:
+                probe_latency.append(elapsed)
+
+    threads = [threading.Thread(target=storm_worker, args=(n,)) for n in range(storm)]
+    threads += [threading.Thread(target=probe_worker) for _ in range(probes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return {
+        'mode': mode,
+        'workers': password_hasher.workers,
+        'logins_ok_per_s': login_status[200] / duration,
+        'login_status': dict(login_status),
+        'login_p99_ms': percentile(login_latency, 99) * 1000,
+        'probe_count': len(probe_latency),
+        'probe_p50_ms': percentile(probe_latency, 50) * 1000,
+        'probe_p99_ms': percentile(probe_latency, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per mode')
+    parser.add_argument('--storm', type=int, default=64, help='concurrent login threads')
+    parser.add_argument('--probes', type=int, default=8, help='concurrent catalog readers')
+    parser.add_argument('--users', type=int, default=200, help='storm_ accounts to create')
+    parser.add_argument('--keep', action='store_true', help='leave the storm_ users in place')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.duration, args.storm, args.probes, args.users)))
+        return
+
+    setup_users(args.users)
+    try:
+        print(f"{'mode':<8}{'workers':>8}{'logins/s':>10}{'login p99':>11}{'503s':>7}"
+              f"{'probes':>8}{'probe p50':>11}{'probe p99':>11}")
+        for mode in MODES:
+            env = dict(os.environ)
+            if mode == 'inline':
+                env['PASSWORD_HASH_WORKERS'] = '0'
+            cmd = [sys.executable, '-m', 'benchmarks.login_storm', '--mode', mode,
+                   '--duration', str(args.duration), '--storm', str(args.storm),
+                   '--probes', str(args.probes), '--users', str(args.users)]
+            out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{r['mode']:<8}{r['workers']:>8}{r['logins_ok_per_s']:>10.1f}{r['login_p99_ms']:>9.0f}ms"
+                  f"{r['login_status'].get('503', 0):>7}{r['probe_count']:>8}"
+                  f"{r['probe_p50_ms']:>9.1f}ms{r['probe_p99_ms']:>9.1f}ms")
+    finally:
+        if not args.keep:
+            cleanup_users()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""backend/app.py routes through the test client, on the configured MySQL database.
+
+The write benchmarks work on a BENCH course they create, which is removed
+with everything attached to it at the end; registrations use bench_reg_ users.
+"""
+import itertools
+import pytest
+
+_codes = itertools.count()
+
+
+@pytest.fixture(scope='module', autouse=True)
+def remove_bench_rows(campus):
+    yield
+    import mysql.connector
+    from config import Config
+
+    conn = mysql.connector.connect(**Config.DB_CONFIG)
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM courses WHERE course_code LIKE 'BENCH%'")
+    cursor.execute("DELETE FROM users WHERE username LIKE 'bench\\_reg\\_%'")
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+@pytest.fixture(scope='module')
+def bench_course(campus):
+    """A course with room for everyone, for the enrollment benchmarks"""
+    response = campus.clients['admin'].post('/api/courses', json={
+        'courseCode': f'BENCH{next(_codes)}', 'courseName': 'Micro-benchmark course',
+        'credits': 3, 'semester': 'Fall 2024', 'maxStudents': 1000000,
+        'teacherId': campus.users['teacher']['id'],
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['courseId']
+
+
+@pytest.mark.parametrize('role', ['admin', 'teacher', 'student'])
+def bench_get_courses(bench, campus, role):
+    client = campus.clients[role]
+    assert bench(lambda: client.get('/api/courses')).status_code == 200
+
+
+def bench_get_courses_search(bench, campus):
+    client = campus.clients['student']
+    assert bench(lambda: client.get('/api/courses?search=CS&total=true')).status_code == 200
+
+
+def bench_get_course(bench, campus):
+    client = campus.clients['student']
+    assert bench(lambda: client.get(f'/api/courses/{campus.course_id}')).status_code == 200
+
+
+@pytest.mark.parametrize('role', ['admin', 'teacher', 'student'])
+def bench_get_enrollments(bench, campus, role):
+    client = campus.clients[role]
+    assert bench(lambda: client.get('/api/enrollments?total=true')).status_code == 200
+
+
+def bench_get_users(bench, campus):
+    client = campus.clients['admin']
+    assert bench(lambda: client.get('/api/users?total=true')).status_code == 200
+
+
+@pytest.mark.parametrize('role', ['admin', 'teacher', 'student'])
+def bench_dashboard_stats(bench, campus, role):
+    client = campus.clients[role]
+    assert bench(lambda: client.get('/api/dashboard/stats')).status_code == 200
+
+
+def bench_check_session(bench, campus):
+    client = campus.clients['student']
+    assert bench(lambda: client.get('/api/auth/session')).status_code == 200
+
+
+def bench_metrics(bench, campus):
+    client = campus.app.test_client()
+    assert bench(lambda: client.get('/metrics')).status_code == 200
+
+
+def bench_login_rejected(bench, campus):
+    # The seeded password hashes are placeholders, so this times the lookup and a failed check
+    client = campus.app.test_client()
+    user = campus.users['student']
+    response = bench(lambda: client.post('/api/auth/login', json={'username': user['username'], 'password': 'wrong'}))
+    assert response.status_code == 401
+
+
+def bench_recover_rejected(bench, campus):
+    client = campus.app.test_client()
+    response = bench(lambda: client.post('/api/auth/recover', json={
+        'email': campus.users['admin']['email'], 'securityAnswer': 'wrong', 'newPassword': 'unused-pass'
+    }))
+    assert response.status_code in (400, 401, 404)
+
+
+def bench_register(bench, campus):
+    client = campus.app.test_client()
+    names = itertools.count()
+
+    def register():
+        n = next(names)
+        return client.post('/api/auth/register', json={
+            'username': f'bench_reg_{n}', 'email': f'bench_reg_{n}@example.com', 'password': 'bench-pass-123'
+        })
+    assert bench(register).status_code == 201
+
+
+def bench_logout(bench, campus):
+    client = campus.app.test_client()
+    assert bench(lambda: client.post('/api/auth/logout')).status_code == 200
+
+
+def bench_create_course(bench, campus):
+    client = campus.clients['admin']
+    response = bench(lambda: client.post('/api/courses', json={
+        'courseCode': f'BENCH{next(_codes)}', 'courseName': 'Micro-benchmark course',
+        'credits': 3, 'semester': 'Fall 2024', 'maxStudents': 50,
+    }))
+    assert response.status_code == 201
+
+
+def bench_update_course(bench, campus, bench_course):
+    client = campus.clients['admin']
+    response = bench(lambda: client.put(f'/api/courses/{bench_course}', json={'courseName': 'Micro-benchmark course'}))
+    assert response.status_code == 200
+
+
+def bench_delete_course(bench, campus):
+    client = campus.clients['admin']
+
+    def new_course():
+        response = client.post('/api/courses', json={
+            'courseCode': f'BENCH{next(_codes)}', 'courseName': 'Micro-benchmark course',
+            'credits': 3, 'semester': 'Fall 2024', 'maxStudents': 50,
+        })
+        return (response.get_json()['courseId'],)
+    assert bench(lambda course_id: client.delete(f'/api/courses/{course_id}'), setup=new_course).status_code == 200
+
+
+def bench_create_enrollment(bench, campus, bench_course):
+    client = campus.clients['student']
+    enrolled = []
+
+    def drop_previous():
+        if enrolled:
+            client.delete(f'/api/enrollments/{enrolled.pop()}')
+        return ()
+
+    def enroll():
+        response = client.post('/api/enrollments', json={'courseId': bench_course})
+        enrolled.append(response.get_json().get('enrollmentId'))
+        return response
+    assert bench(enroll, setup=drop_previous).status_code == 201
+    drop_previous()
+
+
+def bench_update_enrollment(bench, campus, bench_course):
+    student = campus.clients['student']
+    enrollment_id = student.post('/api/enrollments', json={'courseId': bench_course}).get_json().get('enrollmentId')
+    client = campus.clients['teacher']
+    response = bench(lambda: client.put(f'/api/enrollments/{enrollment_id}', json={'grade': 'A'}))
+    assert response.status_code == 200
+    student.delete(f'/api/enrollments/{enrollment_id}')
+
+
+def bench_delete_enrollment(bench, campus, bench_course):
+    client = campus.clients['student']
+
+    def enroll():
+        return (client.post('/api/enrollments', json={'courseId': bench_course}).get_json()['enrollmentId'],)
+    response = bench(lambda enrollment_id: client.delete(f'/api/enrollments/{enrollment_id}'), setup=enroll)
+    assert response.status_code == 200
+
+
+def bench_update_user(bench, campus):
+    client = campus.clients['admin']
+    user_id = campus.users['student']['id']
+    assert bench(lambda: client.put(f'/api/users/{user_id}', json={'isActive': True})).status_code == 200
@@ -0,0 +1,115 @@
+"""Blueprint routes (routes/) through the test client, on a seeded SQLite database"""
+import itertools
+import pytest
+from extensions import db
+
+
+def execute(blueprint, statement, **params):
+    with blueprint.app.app_context():
+        result = db.session.execute(db.text(statement), params)
+        db.session.commit()
+        return result.lastrowid
+
+
+def bench_student_courses(bench, blueprint):
+    client = blueprint.clients['student']
+    assert bench(lambda: client.get('/api/student/courses')).status_code == 200
+
+
+def bench_student_courses_uncached(bench, blueprint):
+    from routes.student_module import course_list_cache
+
+    client = blueprint.clients['student']
+    response = bench(lambda: client.get('/api/student/courses'), setup=lambda: course_list_cache.bump() or ())
+    assert response.status_code == 200
+
+
+def bench_my_enrollments(bench, blueprint):
+    client = blueprint.clients['student']
+    assert bench(lambda: client.get('/api/student/my-enrollments')).status_code == 200
+
+
+def bench_enroll(bench, blueprint):
+    client = blueprint.clients['student']
+    course_id = blueprint.ids['free_course']
+
+    def unenroll():
+        execute(blueprint, "DELETE FROM enrollments WHERE student_id = 2 AND course_id = :course", course=course_id)
+        execute(blueprint, "UPDATE courses SET enrolled_count = 0 WHERE id = :course", course=course_id)
+        return ()
+    response = bench(lambda: client.post('/api/student/enroll', json={'course_id': course_id}), setup=unenroll)
+    assert response.status_code == 201
+    unenroll()
+
+
+def bench_drop(bench, blueprint):
+    client = blueprint.clients['student']
+    course_id = blueprint.ids['free_course'] - 1
+
+    def enroll():
+        enrollment_id = execute(
+            blueprint, "INSERT INTO enrollments (student_id, course_id, status) VALUES (2, :course, 'enrolled')",
+            course=course_id
+        )
+        return (enrollment_id,)
+    response = bench(lambda enrollment_id: client.delete(f'/api/student/drop/{enrollment_id}'), setup=enroll)
+    assert response.status_code == 200
+
+
+def bench_auth_me(bench, blueprint):
+    client = blueprint.clients['student']
+    assert bench(lambda: client.get('/api/auth/me')).status_code == 200
+
+
+def bench_auth_login(bench, blueprint):
+    client = blueprint.app.test_client()
+    body = {'email': 'student@example.com', 'password': 'budget-pass'}
+    assert bench(lambda: client.post('/api/auth/login', json=body)).status_code == 200
+
+
+def bench_auth_register(bench, blueprint):
+    client = blueprint.app.test_client()
+    names = itertools.count()
+
+    def register():
+        n = next(names)
+        return client.post('/api/auth/register', json={
+            'username': f'bench{n}', 'email': f'bench{n}@example.com', 'password': 'bench-pass'
+        })
+    assert bench(register).status_code == 201
+
+
+def bench_auth_logout(bench, blueprint):
+    client = blueprint.app.test_client()
+    assert bench(lambda: client.post('/api/auth/logout')).status_code == 200
+
+
+@pytest.mark.skip(reason="add_course passes created_by, which Course does not have")
+def bench_admin_add_course(bench, blueprint):
+    pass
+
+
+def bench_admin_update_course(bench, blueprint):
+    client = blueprint.clients['admin']
+    response = bench(lambda: client.put('/api/admin/courses/1', json={'course_name': 'Course 0'}))
+    assert response.status_code == 200
+
+
+def bench_admin_delete_course(bench, blueprint):
+    client = blueprint.clients['admin']
+    codes = itertools.count()
+
+    def new_course():
+        course_id = execute(
+            blueprint, "INSERT INTO courses (course_code, course_name, credits, max_students, enrolled_count) "
+                       "VALUES (:code, 'Disposable', 3, 50, 0)",
+            code=f'DEL{next(codes)}'
+        )
+        return (course_id,)
+    response = bench(lambda course_id: client.delete(f'/api/admin/courses/{course_id}'), setup=new_course)
+    assert response.status_code == 200
+
+
+def bench_admin_audit_logs(bench, blueprint):
+    client = blueprint.clients['admin']
+    assert bench(lambda: client.get('/api/admin/audit-logs')).status_code == 200
@@ -0,0 +1,92 @@
+"""Hot helpers: audit logging, the auth decorators, serialization"""
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from flask import jsonify, session
+
+
+def enrollment_rows(count):
+    """Rows shaped like the GET /api/enrollments query results"""
+    rng = random.Random(1)
+    started = datetime(2024, 9, 1)
+    return [{
+        'id': i,
+        'student_id': rng.randrange(100000),
+        'course_id': rng.randrange(5000),
+        'enrollment_date': started + timedelta(minutes=i),
+        'status': 'enrolled',
+        'grade': None,
+        'course_code': f'CS{i % 5000}',
+        'course_name': 'Introduction to Computer Science',
+        'credits': 3,
+        'student_name': f'student_{i}',
+        'student_email': f'student_{i}@campus.example.com',
+        'gpa_points': Decimal('3.70'),
+    } for i in range(count)]
+
+
+@pytest.mark.parametrize('rows', [100, 10000])
+def bench_json_dumps_rows(bench, blueprint, rows):
+    data = enrollment_rows(rows)
+    with blueprint.app.app_context():
+        bench(lambda: blueprint.app.json.dumps({'enrollments': data, 'nextCursor': None}))
+
+
+def bench_jsonify_rows(bench, blueprint):
+    data = enrollment_rows(10000)
+    with blueprint.app.app_context():
+        assert bench(lambda: jsonify({'enrollments': data})).status_code == 200
+
+
+def bench_enrollment_to_dict(bench, blueprint):
+    from sqlalchemy.orm import joinedload
+    from models import Enrollment
+
+    with blueprint.app.app_context():
+        enrollments = Enrollment.query.options(joinedload(Enrollment.course)).all()
+        assert len(enrollments) >= 100
+        bench(lambda: [e.to_dict() for e in enrollments])
+
+
+def bench_log_audit_orm(bench, blueprint):
+    from utils import log_audit
+
+    with blueprint.app.test_request_context('/api/student/enroll', method='POST'):
+        session['user_id'] = 2
+        bench(lambda: log_audit('CREATE', 'enrollments', 1, 'Student 2 enrolled in course 1'))
+
+
+def bench_audit_writer_enqueue(bench):
+    """The queueing cost app.py's log_audit adds to a request; rows are discarded"""
+    from audit_writer import AuditWriter
+
+    writer = AuditWriter(lambda rows: None, max_queue=1 << 20)
+    row = (2, 'CREATE', 'enrollments', 1, None, 'Student 2 enrolled in course 1', '127.0.0.1')
+    try:
+        bench(lambda: writer.enqueue(row))
+    finally:
+        writer.close()
+
+
+@pytest.mark.parametrize('decorator', ['login_required', 'role_required'])
+def bench_blueprint_decorator(bench, blueprint, decorator):
+    from utils import login_required, role_required
+
+    view = (login_required if decorator == 'login_required' else role_required('student'))(lambda: 'ok')
+    with blueprint.app.test_request_context('/'):
+        session['user_id'] = 2
+        session['role'] = 'student'
+        assert bench(view) == 'ok'
+
+
+@pytest.mark.parametrize('decorator', ['login_required', 'role_required'])
+def bench_app_decorator(bench, campus, decorator):
+    module = campus.module
+    wrap = module.login_required if decorator == 'login_required' else module.role_required('teacher', 'student')
+    view = wrap(lambda: 'ok')
+    user = campus.users['student']
+    with campus.app.test_request_context('/'):
+        session['user_id'] = user['id']
+        session['role'] = 'student'
+        assert bench(view) == 'ok'
@@ -0,0 +1,111 @@
+"""Compare two micro-benchmark runs and flag significant regressions.
+
+Each benchmark's samples are compared with a two-sided Mann-Whitney U test,
+which does not assume the timings are normally distributed. A benchmark is
+a regression when the difference is significant (p < --alpha) and its median
+is more than --threshold slower. The exit status is 1 when there is one.
+
+Runs are named by commit (a prefix is enough) or by path; by default the
+two most recent runs in results/ are compared:
+
+    python -m benchmarks.micro.compare
+    python -m benchmarks.micro.compare 34cbe07 f29dfae
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+from benchmarks.micro.conftest import RESULTS_DIR, format_time
+
+
+def mann_whitney_p(a, b):
+    """Two-sided p-value of the Mann-Whitney U test (normal approximation with tie correction)"""
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 1.0
+    ranked = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    ranks = [0.0] * len(ranked)
+    ties = 0.0
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+    r1 = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 0)
+    u = r1 - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+    return math.erfc(max(z, 0.0) / math.sqrt(2))
+
+
+def find_run(name):
+    if os.path.exists(name):
+        return name
+    matches = sorted(glob.glob(os.path.join(RESULTS_DIR, f'{name}*.json')), key=os.path.getmtime)
+    if not matches:
+        raise SystemExit(f"No results for '{name}' in {RESULTS_DIR}")
+    return matches[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base', nargs='?', help='baseline run (commit prefix or path)')
+    parser.add_argument('head', nargs='?', help='run to check (commit prefix or path)')
+    parser.add_argument('--alpha', type=float, default=0.01, help='significance level (default 0.01)')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='smallest median slowdown that counts (default 0.10)')
+    args = parser.parse_args()
+
+    runs = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')), key=os.path.getmtime)
+    head_path = find_run(args.head) if args.head else (runs[-1] if runs else None)
+    if args.base:
+        base_path = find_run(args.base)
+    else:
+        earlier = [run for run in runs if run != head_path]
+        base_path = earlier[-1] if earlier else None
+    if not base_path or not head_path:
+        raise SystemExit(f"Need two runs in {RESULTS_DIR} (or give their names)")
+
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+    print(f"base {base['meta']['commit']}{' (dirty)' if base['meta']['dirty'] else ''}  {base['meta']['started']}")
+    print(f"head {head['meta']['commit']}{' (dirty)' if head['meta']['dirty'] else ''}  {head['meta']['started']}\n")
+
+    names = sorted(set(base['benchmarks']) & set(head['benchmarks']))
+    width = max((len(n) for n in names), default=10)
+    regressions = improvements = 0
+    for name in names:
+        b, h = base['benchmarks'][name], head['benchmarks'][name]
+        change = (h['median'] - b['median']) / b['median'] if b['median'] else 0.0
+        p = mann_whitney_p(b['samples'], h['samples'])
+        verdict = ''
+        if p < args.alpha and change > args.threshold:
+            verdict = 'REGRESSION'
+            regressions += 1
+        elif p < args.alpha and change < -args.threshold:
+            verdict = 'faster'
+            improvements += 1
+        print(f"{name:<{width}}  {format_time(b['median']):>10} -> {format_time(h['median']):>10}"
+              f"  {change:>+7.1%}  p={p:.3f}  {verdict}")
+    for name in sorted(set(head['benchmarks']) - set(base['benchmarks'])):
+        print(f"{name:<{width}}  new")
+
+    print(f"\n{regressions} regression(s), {improvements} improvement(s) at p < {args.alpha} "
+          f"and more than {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""Timing fixture, result storage and the apps the micro-benchmarks run against.
+
+Each benchmark calls ``bench(fn)``. Calls are batched so one sample takes at
+least a millisecond, and samples are collected for --bench-time seconds
+(with at least --bench-min-samples). With ``setup``, every call gets fresh
+arguments from ``setup()``, which is not timed, and each sample is a single
+call. The samples of every benchmark are saved to results/<commit>.json
+(<commit>-dirty.json for uncommitted trees) for ``python -m
+benchmarks.micro.compare``.
+
+The blueprint routes and ORM helpers run on a seeded SQLite database. The
+backend/app.py routes need the configured MySQL database (seed.sql or
+tools.generate_campus) and are skipped when it is unreachable.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+_results = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('micro-benchmarks')
+    group.addoption('--bench-time', type=float, default=1.0, help='seconds of samples per benchmark (default 1)')
+    group.addoption('--bench-min-samples', type=int, default=15, help='fewest samples per benchmark (default 15)')
+    group.addoption('--bench-no-save', action='store_true', help='do not write results/<commit>.json')
+
+
+class Bench:
+    def __init__(self, name, duration, min_samples):
+        self.name = name
+        self.duration = duration
+        self.min_samples = min_samples
+
+    def __call__(self, fn, setup=None):
+        """Time fn(); returns its last result"""
+        if setup is not None:
+            return self._per_call(fn, setup)
+        result = fn()  # Warm caches and lazy imports
+        inner = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(inner):
+                fn()
+            if time.perf_counter() - started >= 0.001 or inner >= 1 << 20:
+                break
+            inner *= 2
+        samples = []
+        deadline = time.perf_counter() + self.duration
+        while len(samples) < self.min_samples or time.perf_counter() < deadline:
+            started = time.perf_counter()
+            for _ in range(inner):
+                fn()
+            samples.append((time.perf_counter() - started) / inner)
+        self._record(samples, inner)
+        return result
+
+    def _per_call(self, fn, setup):
+        result = fn(*setup())
+        samples = []
+        deadline = time.perf_counter() + self.duration
+        while len(samples) < self.min_samples or time.perf_counter() < deadline:
+            args = setup()
+            started = time.perf_counter()
+            result = fn(*args)
+            samples.append(time.perf_counter() - started)
+        self._record(samples, 1)
+        return result
+
+    def _record(self, samples, inner):
+        _results[self.name] = {
+            'samples': samples,
+            'inner': inner,
+            'median': statistics.median(samples),
+            'mean': statistics.fmean(samples),
+            'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'min': min(samples),
+        }
+
+
+@pytest.fixture
+def bench(request):
+    config = request.config
+    return Bench(request.node.nodeid, config.getoption('--bench-time'), config.getoption('--bench-min-samples'))
+
+
+def git_state():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                capture_output=True, text=True, check=True)
+        return commit.stdout.strip(), bool(status.stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', True
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f} {unit}'
+    return f'{seconds / 1e-9:.0f} ns'
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _results:
+        return
+    terminalreporter.section('micro-benchmarks')
+    width = max(len(name) for name in _results)
+    for name, r in sorted(_results.items()):
+        terminalreporter.write_line(
+            f"{name:<{width}}  median {format_time(r['median']):>10}  "
+            f"min {format_time(r['min']):>10}  +/- {r['stdev'] / r['mean'] if r['mean'] else 0:.1%}"
+            f"  ({len(r['samples'])} samples)"
+        )
+    if config.getoption('--bench-no-save'):
+        return
+    commit, dirty = git_state()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            'meta': {
+                'commit': commit,
+                'dirty': dirty,
+                'started': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'machine': platform.node(),
+            },
+            'benchmarks': _results,
+        }, f, indent=1)
+    terminalreporter.write_line(f"results saved to {os.path.relpath(path)}")
+
+
+# ============ Blueprint app on SQLite ============
+
+@pytest.fixture(scope='session')
+def blueprint():
+    """The blueprint app, the ids seed_blueprints created and a logged-in client per role"""
+    from password_hashing import password_hasher
+    from tools.check_query_budgets import blueprint_app, seed_blueprints
+
+    # The seeded hashes use 4 bcrypt rounds; matching them keeps logins from rehashing
+    password_hasher.workers = 0
+    password_hasher.bcrypt_rounds = 4
+    with tempfile.TemporaryDirectory() as tmp:
+        app = blueprint_app(os.path.join(tmp, 'bench.db'))
+        app.config['QUERY_BUDGET_ENFORCE'] = False
+        ids = seed_blueprints(app, courses=200, enrollments=150)
+        clients = {}
+        for role, user_id in (('admin', 1), ('student', 2)):
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = user_id
+                sess['role'] = role
+            clients[role] = client
+        yield SimpleNamespace(app=app, ids=ids, clients=clients)
+        writer = app.extensions.pop('orm_audit_writer', None)
+        if writer is not None:
+            writer.close()
+
+
+# ============ backend/app.py on MySQL ============
+
+@pytest.fixture(scope='session')
+def campus():
+    """backend/app.py, one active user per role with a logged-in client, and ids to request"""
+    import mysql.connector
+    from mysql.connector import Error
+    from config import Config
+
+    try:
+        conn = mysql.connector.connect(**Config.DB_CONFIG)
+    except Error as e:
+        pytest.skip(f"MySQL is not reachable: {e}")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id, username, email, role FROM users WHERE is_active = TRUE ORDER BY id")
+    users = {}
+    for row in cursor.fetchall():
+        users.setdefault(row['role'], row)
+    cursor.execute("SELECT id FROM courses WHERE is_active = TRUE ORDER BY id LIMIT 1")
+    course = cursor.fetchone()
+    cursor.execute(
+        "SELECT e.id FROM enrollments e JOIN courses c ON c.id = e.course_id "
+        "WHERE c.teacher_id = %s AND e.is_deleted = FALSE LIMIT 1",
+        (users['teacher']['id'] if 'teacher' in users else 0,)
+    )
+    enrollment = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    if not {'admin', 'teacher', 'student'} <= users.keys() or course is None:
+        pytest.skip("The database needs an active admin, teacher and student and a course (seed.sql)")
+
+    import app as app_module
+    app = app_module.app
+    app.config['RATELIMIT_ENABLED'] = False
+    clients = {}
+    for role, user in users.items():
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess.update(user_id=user['id'], username=user['username'], email=user['email'], role=role)
+        clients[role] = client
+    return SimpleNamespace(
+        module=app_module, app=app, users=users, clients=clients,
+        course_id=course['id'], enrollment_id=enrollment['id'] if enrollment else None
+    )
@@ -0,0 +1,103 @@
+"""Compare request throughput with and without the connection pool.
+
+The unpooled leg replaces db_pool.connect itself, so every checkout in the
+app (request units of work, cache loaders, the principal lookup) opens a
+fresh connection and closes it afterwards.
+
+Run from the backend directory against a local, seeded MySQL:
+
+    python -m benchmarks.pool_throughput --threads 16 --duration 10
+"""
+import argparse
+import threading
+import time
+import mysql.connector
+from mysql.connector import Error
+
+import app as app_module
+from config import Config
+from db_pool import PooledConnection
+
+# Every request comes from one admin session; measure the pool, not the limiter
+app_module.app.config['RATELIMIT_ENABLED'] = False
+
+
+class DirectConnection(PooledConnection):
+    """The pre-pool behaviour: closed instead of handed back to the pool"""
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            try:
+                raw.close()
+            except Error:
+                pass
+
+
+def direct_connect():
+    # A fresh handshake for every checkout; statement hooks still see every query
+    return DirectConnection(app_module.db_pool, mysql.connector.connect(**Config.DB_CONFIG), time.time())
+
+
+def make_client():
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['username'] = 'admin'
+        sess['email'] = 'admin@campushub.com'
+        sess['role'] = 'admin'
+    return client
+
+
+def run(path, threads, duration):
+    counts = {'ok': 0, 'failed': 0}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker():
+        client = make_client()
+        ok = failed = 0
+        while time.perf_counter() < stop_at:
+            response = client.get(path)
+            if response.status_code == 200:
+                ok += 1
+            else:
+                failed += 1
+        with lock:
+            counts['ok'] += ok
+            counts['failed'] += failed
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    counts['rps'] = counts['ok'] / duration
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--path', default='/api/courses')
+    args = parser.parse_args()
+
+    app_module.db_pool.connect = direct_connect
+    before = run(args.path, args.threads, args.duration)
+
+    del app_module.db_pool.connect
+    after = run(args.path, args.threads, args.duration)
+
+    print(f"{args.path} with {args.threads} threads for {args.duration}s")
+    print(f"  direct connect: {before['rps']:.1f} req/s ({before['failed']} failed)")
+    print(f"  pooled:         {after['rps']:.1f} req/s ({after['failed']} failed)")
+    if before['rps']:
+        print(f"  speed-up:       {after['rps'] / before['rps']:.2f}x")
+    print("Pool stats:")
+    for key, value in app_module.db_pool.stats().items():
+        print(f"  {key}: {value:.2f}" if isinstance(value, float) else f"  {key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
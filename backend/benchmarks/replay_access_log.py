@@ -0,0 +1,268 @@
+"""Replay werkzeug access-log lines against a server with their original timing.
+
+Reads request lines such as
+
+    2025-12-12 12:14:27,459 - werkzeug - INFO - 127.0.0.1 - - [12/Dec/2025 12:14:27] "\\x1b[33mGET / HTTP/1.1\\x1b[0m" 404 -
+
+from campushub.log (ANSI colour codes and the logging prefix are optional)
+and sends the same method and path at the same offsets from the start,
+divided by --speed. Gaps longer than --max-gap are shortened, so idle hours
+in a log do not stall the replay. Requests are sent open-loop from a pool of
+--concurrency threads; the report includes how late requests went out
+(schedule lag), which grows when the pool or the server cannot keep up.
+
+The log records no users or bodies, so requests are replayed with synthetic
+sessions. Each client address gets one logged-in session per role, and the
+role comes from the path (admin for /api/users and course writes, teacher
+for grading, student otherwise). Accounts come from the database, as in
+benchmarks.load_test. Write requests get generated bodies. Logins use the
+account's credentials on a throwaway cookie jar, registrations create
+replay_ users, and logouts are sent without a session so the shared ones
+survive. Use a scratch database, and serve it with serve.py as in
+production; the replayed requests land in campushub.log too.
+
+Run from the backend directory:
+
+    python -m benchmarks.replay_access_log campushub.log ../campushub.log --url http://127.0.0.1:8000
+    python -m benchmarks.replay_access_log campushub.log --speed 10 --max-gap 2 --output replay.json
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from benchmarks.load_test import Client, Recorder, load_fixture, summarize, print_report, compare, git_commit, percentile
+
+ANSI = re.compile(r'\x1b\[[0-9;]*m')
+ACCESS_LINE = re.compile(
+    r'^(?:(?P<logged>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) - \S+ - \w+ - )?'
+    r'(?P<ip>\S+) - \S+ \[(?P<stamp>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+) HTTP/[\d.]+" (?P<status>\d{3}) '
+)
+ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def parse_line(line):
+    """(epoch seconds, client address, method, path, status) or None for other lines"""
+    match = ACCESS_LINE.match(ANSI.sub('', line.rstrip('\n')))
+    if not match:
+        return None
+    if match.group('logged'):
+        # The logging timestamp has milliseconds; werkzeug's own has whole seconds
+        stamp = datetime.strptime(match.group('logged'), '%Y-%m-%d %H:%M:%S,%f')
+    else:
+        stamp = datetime.strptime(match.group('stamp'), '%d/%b/%Y %H:%M:%S')
+    return (stamp.timestamp(), match.group('ip'), match.group('method'), match.group('path'),
+            int(match.group('status')))
+
+
+def read_logs(paths, include):
+    entries = []
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                entry = parse_line(line)
+                if entry and include.search(entry[3]):
+                    entries.append(entry)
+    entries.sort(key=lambda e: e[0])
+    return entries
+
+
+def schedule(entries, speed, max_gap):
+    """Offsets in seconds from the start of the replay"""
+    offsets = []
+    offset = 0.0
+    previous = entries[0][0] if entries else 0.0
+    for entry in entries:
+        gap = entry[0] - previous
+        if max_gap is not None:
+            gap = min(gap, max_gap)
+        offset += gap / speed
+        offsets.append(offset)
+        previous = entry[0]
+    return offsets
+
+
+def endpoint_name(method, path):
+    return f"{method} {ID_SEGMENT.sub('/<id>', path.split('?')[0])}"
+
+
+def role_for(method, path):
+    path = path.split('?')[0]
+    if path.startswith('/api/users') or (path.startswith('/api/courses') and method in ('POST', 'PUT', 'DELETE')):
+        return 'admin'
+    if path.startswith('/api/enrollments/') and method == 'PUT':
+        return 'teacher'
+    return 'student'
+
+
+class Replayer:
+    def __init__(self, url, recorder, accounts, courses, password, seed=1):
+        self.url = url
+        self.recorder = recorder
+        self.accounts = accounts
+        self.courses = courses or [1]
+        self.password = password
+        self.rng = random.Random(seed)
+        self.sessions = {}  # (client address, role) -> cookie dict
+        self.local = threading.local()
+        self.registrations = itertools.count()
+        self.matched = 0
+        self.mismatched = 0
+        self.lags = []
+        self.lock = threading.Lock()
+
+    def client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = Client(self.url, self.recorder)
+        return self.local.client
+
+    def open_sessions(self, entries, setup_recorder):
+        """Log in one session per (client address, role) before the clock starts"""
+        keys = {(ip, role_for(method, path)) for _, ip, method, path, _ in entries}
+        client = Client(self.url, setup_recorder)
+        for n, (ip, role) in enumerate(sorted(keys)):
+            if not self.accounts.get(role):
+                print(f"No active {role} accounts; requests from {ip} that need one will be anonymous")
+                self.sessions[(ip, role)] = {}
+                continue
+            client.login(self.accounts[role][n % len(self.accounts[role])], self.password)
+            if not client.logged_in:
+                print(f"Could not log in a {role} for {ip}; check --password")
+            self.sessions[(ip, role)] = dict(client.cookies)
+
+    def body_for(self, method, path):
+        rng = self.rng
+        path = path.split('?')[0]
+        if path == '/api/auth/login':
+            return {'username': rng.choice(self.accounts['student'])['username'], 'password': self.password}
+        if path == '/api/auth/register':
+            n = next(self.registrations)
+            return {'username': f'replay_{n}_{int(time.time())}', 'email': f'replay_{n}_{int(time.time())}@example.com',
+                    'password': 'replay-pass-123'}
+        if path == '/api/auth/recover':
+            return {'email': 'nobody@example.com', 'securityAnswer': 'x', 'newPassword': 'replay-pass-123'}
+        if path == '/api/enrollments' and method == 'POST':
+            return {'courseId': rng.choice(self.courses)}
+        if path.startswith('/api/enrollments/') and method == 'PUT':
+            return {'grade': rng.choice(['A', 'B', 'C'])}
+        if path == '/api/courses' and method == 'POST':
+            n = next(self.registrations)
+            return {'courseCode': f'RPL{n}{int(time.time()) % 100000}', 'courseName': 'Replayed course',
+                    'credits': 3, 'semester': 'Fall 2024', 'maxStudents': 50}
+        if path.startswith('/api/courses/') and method == 'PUT':
+            return {'courseName': 'Replayed course'}
+        if path.startswith('/api/users/') and method == 'PUT':
+            return {'isActive': True}
+        return {} if method in ('POST', 'PUT', 'PATCH') else None
+
+    def send(self, entry, due):
+        _, ip, method, path, logged_status = entry
+        lag = time.perf_counter() - due
+        bare = path.split('?')[0]
+        client = self.client()
+        if bare in ('/api/auth/login', '/api/auth/register', '/api/auth/logout', '/api/auth/recover'):
+            client.cookies = {}
+        else:
+            client.cookies = self.sessions.get((ip, role_for(method, path)), {})
+        status, _ = client.request(method, path, endpoint_name(method, path), self.body_for(method, path))
+        with self.lock:
+            self.lags.append(lag)
+            if status == logged_status:
+                self.matched += 1
+            else:
+                self.mismatched += 1
+
+
+def replay(replayer, entries, offsets, concurrency):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        for entry, offset in zip(entries, offsets):
+            due = started + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(replayer.send, entry, due)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('logs', nargs='+', help='log files to replay (merged by timestamp)')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='server to replay against')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay N times faster (default 1)')
+    parser.add_argument('--max-gap', type=float, help='shorten gaps between requests to at most this many seconds')
+    parser.add_argument('--include', default='', help='only replay paths matching this regex (e.g. ^/api/)')
+    parser.add_argument('--concurrency', type=int, default=64, help='sending threads (default 64)')
+    parser.add_argument('--accounts', type=int, default=1000, help='accounts per role to draw from (default 1000)')
+    parser.add_argument('--password', default='campus-pass', help='password of the replay accounts')
+    parser.add_argument('--dry-run', action='store_true', help='print what would be replayed and exit')
+    parser.add_argument('--output', help='save the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against a JSON file saved with --output')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='allowed p95 increase or throughput drop before failing (default 0.15)')
+    args = parser.parse_args()
+
+    entries = read_logs(args.logs, re.compile(args.include))
+    if not entries:
+        raise SystemExit("No access lines found")
+    offsets = schedule(entries, args.speed, args.max_gap)
+    span = entries[-1][0] - entries[0][0]
+    print(f"{len(entries)} requests from {len(args.logs)} log(s), spanning {span:.0f}s; "
+          f"replaying in {offsets[-1]:.1f}s at {args.speed:g}x"
+          + (f" with gaps capped at {args.max_gap:g}s" if args.max_gap is not None else ''))
+    if args.dry_run:
+        for entry, offset in zip(entries, offsets):
+            print(f"  +{offset:8.3f}s  {entry[1]:<15} {entry[2]:<6} {entry[3]}  (logged {entry[4]})")
+        return
+
+    accounts, courses = load_fixture(args.accounts, popular_courses=20)
+    replayer = Replayer(args.url, Recorder(measure_from=0.0), accounts, courses, args.password)
+    replayer.open_sessions(entries, Recorder(measure_from=0.0))
+    elapsed = replay(replayer, entries, offsets, args.concurrency)
+
+    results = summarize(replayer.recorder, max(elapsed, 1e-9), {})
+    results = {
+        'meta': {
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'url': args.url,
+            'logs': args.logs,
+            'speed': args.speed,
+            'max_gap': args.max_gap,
+        },
+        **results,
+        'replay': {
+            'status_matched': replayer.matched,
+            'status_mismatched': replayer.mismatched,
+            'lag_p50_ms': percentile(replayer.lags, 50) * 1000,
+            'lag_p99_ms': percentile(replayer.lags, 99) * 1000,
+        },
+    }
+    print_report(results)
+    r = results['replay']
+    print(f"\nstatus as logged: {r['status_matched']} of {r['status_matched'] + r['status_mismatched']}; "
+          f"schedule lag p50 {r['lag_p50_ms']:.1f}ms, p99 {r['lag_p99_ms']:.1f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"- {regression}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
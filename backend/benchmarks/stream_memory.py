@@ -0,0 +1,80 @@
+"""Peak RSS and time-to-first-byte for the admin enrollment export.
+
+Each mode runs in its own child process so peak RSS is measured in isolation:
+
+    buffered  the pre-streaming behaviour (every row fetched, then jsonify'd)
+    json      ?stream=true, a chunked JSON array
+    ndjson    Accept: application/x-ndjson
+
+Run from the backend directory against a database holding the row count you
+want to measure (e.g. 1M enrollments from the synthetic campus generator):
+
+    python -m benchmarks.stream_memory
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+MODES = ('buffered', 'json', 'ndjson')
+
+
+def measure(mode):
+    import app as app_module
+
+    app = app_module.app
+    headers = {}
+    path = '/api/enrollments'
+    if mode == 'buffered':
+        # One unbounded page reproduces the old fetchall() + jsonify path
+        app.config['API_MAX_PAGE_SIZE'] = 10 ** 9
+        path += '?limit=1000000000'
+    elif mode == 'json':
+        path += '?stream=true'
+    else:
+        headers['Accept'] = 'application/x-ndjson'
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['username'] = 'admin'
+        sess['role'] = 'admin'
+
+    started = time.perf_counter()
+    response = client.get(path, headers=headers, buffered=False)
+    body = iter(response.response)
+    first = next(body, b'')
+    ttfb = time.perf_counter() - started
+    size = len(first)
+    for chunk in body:
+        size += len(chunk)
+    total = time.perf_counter() - started
+    response.close()
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'mode': mode, 'status': response.status_code, 'bytes': size,
+            'ttfb_ms': ttfb * 1000, 'total_s': total, 'peak_rss_mb': peak_kb / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode)))
+        return
+
+    print(f"{'mode':<10}{'status':>8}{'MB sent':>10}{'TTFB ms':>10}{'total s':>10}{'peak RSS MB':>14}")
+    for mode in MODES:
+        out = subprocess.run([sys.executable, '-m', 'benchmarks.stream_memory', '--mode', mode],
+                             capture_output=True, text=True, check=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{r['mode']:<10}{r['status']:>8}{r['bytes'] / 2**20:>10.1f}{r['ttfb_ms']:>10.1f}"
+              f"{r['total_s']:>10.2f}{r['peak_rss_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
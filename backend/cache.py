@@ -0,0 +1,99 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class VersionedCache:
+    """In-process LRU cache with a TTL and a global version number.
+
+    bump() invalidates every entry at once by advancing the version. Entries
+    that are expired or from an older version are reloaded on the next read;
+    with ``serve_stale`` the old value is returned immediately and the reload
+    happens on a background thread (one per key at a time).
+    """
+
+    def __init__(self, maxsize=256, ttl=10.0, serve_stale=False, name='cache'):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.serve_stale = serve_stale
+        self.name = name
+        self.version = 0
+
+        self._entries = OrderedDict()  # key -> (value, version, stored_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, value, version):
+        with self._lock:
+            self._entries[key] = (value, version, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _refresh(self, key, loader, version):
+        try:
+            self._store(key, loader(), version)
+        except Exception as e:
+            self.refresh_errors += 1
+            logger.error(f"{self.name} refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() when it is missing or stale"""
+        with self._lock:
+            version = self.version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                value, entry_version, stored_at = entry
+                if entry_version == version and time.monotonic() - stored_at < self.ttl:
+                    self.hits += 1
+                    return value
+                if self.serve_stale:
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(
+                            target=self._refresh, args=(key, loader, version), daemon=True
+                        ).start()
+                    return value
+            self.misses += 1
+
+        # Stored under the version seen before loading, so a bump during the
+        # load leaves the entry stale rather than hiding the change
+        value = loader()
+        self._store(key, value, version)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'version': self.version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale_hits': self.stale_hits,
+                'evictions': self.evictions,
+                'refresh_errors': self.refresh_errors,
+            }
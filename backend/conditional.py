@@ -0,0 +1,28 @@
+import hashlib
+from flask import request, current_app
+
+
+def make_etag(*parts):
+    """Strong validator derived from cheap inputs (maxima, ids, query string)"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:24]
+    return digest
+
+
+def _add_validator(response, etag, per_user):
+    response.set_etag(etag)
+    # Clients must revalidate, and shared caches must not mix up users
+    response.headers['Cache-Control'] = 'private, no-cache'
+    if per_user:
+        response.vary.add('Cookie')
+    return response
+
+
+def not_modified(etag, per_user=False):
+    """A 304 response when the client already holds this version, otherwise None"""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return _add_validator(current_app.response_class(status=304), etag, per_user)
+
+
+def with_etag(response, etag, per_user=False):
+    return _add_validator(response, etag, per_user)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -17,6 +18,90 @@ class Config:
         'database': 'campushub'
     }
     
+    # Connection Pool (shared by the raw MySQL path and SQLAlchemy)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW') or 10)
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 5) # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800) # Replace connections older than this
+    DB_POOL_PRE_PING = (os.environ.get('DB_POOL_PRE_PING') or 'true').lower() == 'true'
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_POOL_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+    
+    # Audit Log Writer (batched, off the request path)
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE') or 100) # Flush after this many entries
+    AUDIT_FLUSH_INTERVAL_MS = int(os.environ.get('AUDIT_FLUSH_INTERVAL_MS') or 200) # ...or after this long
+    AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE') or 10000)
+    AUDIT_ENQUEUE_TIMEOUT_MS = int(os.environ.get('AUDIT_ENQUEUE_TIMEOUT_MS') or 50) # Block this long when full, then drop
+    
+    # Enrollment transaction retries (deadlocks / lock wait timeouts)
+    ENROLLMENT_MAX_RETRIES = int(os.environ.get('ENROLLMENT_MAX_RETRIES') or 3)
+    ENROLLMENT_RETRY_BACKOFF_MS = int(os.environ.get('ENROLLMENT_RETRY_BACKOFF_MS') or 20) # Doubles per attempt, full jitter
+    
+    # List endpoint pagination (?limit=&cursor=&total=true)
+    API_DEFAULT_PAGE_SIZE = int(os.environ.get('API_DEFAULT_PAGE_SIZE') or 50)
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE') or 200)
+    
+    # Course catalog cache (per process)
+    CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE') or 256) # Distinct (search, semester, page) entries
+    CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL') or 10) # Seconds; bounds staleness across workers
+    CATALOG_CACHE_SERVE_STALE = (os.environ.get('CATALOG_CACHE_SERVE_STALE') or 'false').lower() == 'true'
+    
+    # Dashboard statistics
+    DASHBOARD_STATS_TTL = float(os.environ.get('DASHBOARD_STATS_TTL') or 15) # Seconds admin totals may be cached
+    
+    # Password hashing process pool
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1) # 0 hashes inline; serve.py defaults to CPUs / SERVE_WORKERS
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING') or 64) # Queued + running before 503
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT') or 10) # Seconds to wait for a result
+    PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER') or 1) # Retry-After on 503
+    
+    # Password hash policy (python -m tools.calibrate_hashing suggests values for this host)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1' # werkzeug method string
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS') or 12) # Blueprint (bcrypt) hashes
+    
+    # Rate limiting: token buckets per user (or client IP when logged out)
+    RATELIMIT_ENABLED = (os.environ.get('RATELIMIT_ENABLED') or 'true').lower() == 'true'
+    RATELIMIT_BACKEND = os.environ.get('RATELIMIT_BACKEND') or 'memory' # 'shared' to share buckets across forked workers
+    RATELIMIT_MAX_KEYS = int(os.environ.get('RATELIMIT_MAX_KEYS') or 65536) # Tracked clients (shared: table slots)
+    RATELIMIT_AUTH = os.environ.get('RATELIMIT_AUTH') or '20/60' # requests/seconds for login, register, recover, per account and address
+    RATELIMIT_AUTH_ADDRESS = os.environ.get('RATELIMIT_AUTH_ADDRESS') or '60/60' # The same routes per address, across accounts
+    RATELIMIT_READS = os.environ.get('RATELIMIT_READS') or '300/60' # GET and HEAD
+    RATELIMIT_WRITES = os.environ.get('RATELIMIT_WRITES') or '60/60' # POST, PUT, DELETE
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR') or 0) # Trusted proxies in front of the app; their X-Forwarded-For sets the client address
+    
+    # Server-side sessions (the cookie carries only the session id)
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND') or 'sqlite' # 'sqlite' or 'memory' (single process)
+    SESSION_SQLITE_PATH = os.environ.get('SESSION_SQLITE_PATH') or 'sessions.db'
+    SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE') or 10000) # Sessions held in each worker's LRU
+    SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL') or 5) # Seconds before re-reading the store
+    
+    # Principal cache: role and active flag used by the auth decorators
+    PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE') or 10000) # Users held per worker
+    PRINCIPAL_CACHE_TTL = float(os.environ.get('PRINCIPAL_CACHE_TTL') or 60) # Seconds before re-reading a user
+    
+    # SQL instrumentation
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or 200) # Statements (and per-request totals) logged above this
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG') or 'logs/slow_queries.log' # Parameters are redacted
+    
+    # Prometheus metrics (/metrics: admins, the scrape token, or allowed addresses)
+    METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(tempfile.gettempdir(), 'campushub-metrics') # Per-process files, shared by workers
+    METRICS_BUCKETS = os.environ.get('METRICS_BUCKETS') or '0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10' # Latency buckets, seconds
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or '' # Scrapers send Authorization: Bearer <token>; empty disables
+    METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS') or '' # Comma-separated client addresses allowed without a token
+    
+    # Production server (python serve.py): prefork workers sharing one listening socket
+    SERVE_HOST = os.environ.get('SERVE_HOST') or '0.0.0.0'
+    SERVE_PORT = int(os.environ.get('SERVE_PORT') or 5000)
+    SERVE_WORKERS = int(os.environ.get('SERVE_WORKERS') or os.cpu_count() or 2) # Worker processes
+    SERVE_THREADS = int(os.environ.get('SERVE_THREADS') or 16) # Requests each worker handles at once (keep within the pool)
+    SERVE_BACKLOG = int(os.environ.get('SERVE_BACKLOG') or 1024) # Connections queued while every worker is busy
+    SERVE_GRACEFUL_TIMEOUT = float(os.environ.get('SERVE_GRACEFUL_TIMEOUT') or 30) # Seconds to finish in-flight requests on shutdown
+
     # Session Security (Req 7)
     PERMANENT_SESSION_LIFETIME = timedelta(minutes=30) # Auto-expiry
     SESSION_COOKIE_HTTPONLY = True # Prevent JS access to cookies
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+# One aggregate round trip per role. Enrollment totals come from the maintained
+# courses.enrolled_count counters instead of scanning the enrollments table.
+STATS_QUERIES = {
+    'student': """
+        SELECT (SELECT COUNT(*) FROM enrollments WHERE student_id = %s AND is_deleted = FALSE) as enrolledCourses,
+               (SELECT COUNT(*) FROM courses WHERE is_active = TRUE) as availableCourses
+    """,
+    'teacher': """
+        SELECT (SELECT COUNT(*) FROM courses WHERE teacher_id = %s AND is_active = TRUE) as myCourses,
+               (SELECT COALESCE(SUM(enrolled_count), 0) FROM courses WHERE teacher_id = %s) as totalStudents
+    """,
+    'admin': """
+        SELECT (SELECT COUNT(*) FROM users WHERE is_active = TRUE) as totalUsers,
+               (SELECT COUNT(*) FROM courses WHERE is_active = TRUE) as totalCourses,
+               (SELECT COALESCE(SUM(enrolled_count), 0) FROM courses) as totalEnrollments
+    """,
+}
+
+
+def stats_role(role):
+    # Anything that is not a student or teacher gets the admin view, as before
+    return role if role in ('student', 'teacher') else 'admin'
+
+
+def compute_stats(cursor, role, user_id=None):
+    """All of a role's dashboard counters from a single query"""
+    role = stats_role(role)
+    params = {'student': (user_id,), 'teacher': (user_id, user_id), 'admin': ()}[role]
+    cursor.execute(STATS_QUERIES[role], params)
+    return {name: int(value) for name, value in cursor.fetchone().items()}
+
+
+def freshness(computed_at, now, cached, max_age=None):
+    """How old the counters are, reported alongside them in the response"""
+    info = {
+        'cached': cached,
+        'computedAt': datetime.fromtimestamp(computed_at, timezone.utc).isoformat(),
+        'ageSeconds': round(max(0.0, now - computed_at), 3),
+    }
+    if max_age is not None:
+        info['maxAgeSeconds'] = max_age
+    return info
@@ -0,0 +1,247 @@
+import os
+import threading
+import time
+import logging
+from collections import deque
+import mysql.connector
+from mysql.connector import Error
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Error):
+    """Raised when no connection could be checked out within the pool timeout"""
+
+
+class HookedCursor:
+    """Cursor proxy that reports every statement to the pool's statement hooks"""
+
+    def __init__(self, raw, hooks):
+        self._raw = raw
+        self._hooks = hooks
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def _run(self, method, operation, params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(operation, params, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in tuple(self._hooks):
+                try:
+                    hook(operation, params, elapsed)
+                except Exception as e:
+                    logger.error(f"Statement hook failed: {e}")
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._run(self._raw.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        return self._run(self._raw.executemany, operation, seq_params, *args, **kwargs)
+
+
+class PooledConnection:
+    """Proxy around a raw connection; close() hands it back to the pool"""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise Error("Connection already returned to the pool")
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        if self._raw is None:
+            raise Error("Connection already returned to the pool")
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._pool.statement_hooks:
+            return HookedCursor(cursor, self._pool.statement_hooks)
+        return cursor
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool._release(raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Thread-safe MySQL connection pool.
+
+    Keeps up to ``size`` idle connections and opens at most ``max_overflow``
+    extra ones under load. Checkouts block for ``timeout`` seconds when the pool
+    is exhausted, connections older than ``recycle`` seconds are replaced, and
+    connections idle for longer than ``ping_interval`` are pinged before use
+    when ``pre_ping`` is enabled.
+    """
+
+    def __init__(self, db_config, size=10, max_overflow=10, timeout=5.0,
+                 recycle=1800, pre_ping=True, ping_interval=10.0):
+        self.db_config = dict(db_config)
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.ping_interval = ping_interval
+
+        # Callables hook(statement, params, seconds) run after every statement
+        self.statement_hooks = []
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (raw, created_at, returned_at)
+        self._total = 0
+        self._pid = os.getpid()
+
+        # Checkout statistics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+    def _open(self):
+        return mysql.connector.connect(**self.db_config)
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Error:
+            pass
+
+    def _check_pid(self):
+        # Connections inherited from a parent process must not be reused
+        if self._pid != os.getpid():
+            self._idle.clear()
+            self._total = 0
+            self._pid = os.getpid()
+
+    def connect(self):
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        raw = None
+        with self._cond:
+            self._check_pid()
+            while True:
+                if self._idle:
+                    raw, created_at, returned_at = self._idle.pop()
+                    break
+                if self._total < self.size + self.max_overflow:
+                    self._total += 1
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"Connection pool exhausted after {self.timeout}s")
+                self._cond.wait(remaining)
+
+        reconnected = False
+        try:
+            now = time.time()
+            if raw is None:
+                raw, created_at = self._open(), now
+            elif self.recycle and now - created_at > self.recycle:
+                self._discard(raw)
+                raw, created_at = self._open(), now
+            elif self.pre_ping and now - returned_at > self.ping_interval and not self._ping(raw):
+                self._discard(raw)
+                raw, created_at = self._open(), now
+                reconnected = True
+        except Error:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.perf_counter() - start
+        with self._cond:
+            self._checkouts += 1
+            self._reconnects += reconnected
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._recent_waits.append(waited)
+        return PooledConnection(self, raw, created_at)
+
+    def _ping(self, raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def _release(self, raw, created_at):
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+            reusable = raw.is_connected()
+        except Error:
+            reusable = False
+
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            if reusable and len(self._idle) < self.size:
+                self._idle.append((raw, created_at, time.time()))
+            else:
+                self._total -= 1
+                self._discard(raw)
+            self._cond.notify()
+
+    def add_statement_hook(self, hook):
+        self.statement_hooks.append(hook)
+
+    def remove_statement_hook(self, hook):
+        self.statement_hooks.remove(hook)
+
+    def prefill(self, count=None):
+        """Open connections until ``count`` (at most ``size``) are idle; returns how many are"""
+        count = self.size if count is None else min(count, self.size)
+        conns = []
+        try:
+            while len(conns) < count:
+                conns.append(self.connect())
+        finally:
+            for conn in conns:
+                conn.close()
+        return len(conns)
+
+    def dispose(self):
+        """Close every idle connection"""
+        with self._cond:
+            while self._idle:
+                raw = self._idle.pop()[0]
+                self._total -= 1
+                self._discard(raw)
+
+    def stats(self):
+        with self._cond:
+            waits = sorted(self._recent_waits)
+            idle = len(self._idle)
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._total,
+                'idle': idle,
+                'checked_out': self._total - idle,
+                'overflow': max(0, self._total - self.size),
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'reconnects': self._reconnects,
+                'wait_ms_avg': (self._wait_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                'wait_ms_max': self._wait_max * 1000,
+                'wait_ms_p95': waits[int(len(waits) * 0.95)] * 1000 if waits else 0.0,
+            }
@@ -1,8 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
+import query_stats
 
 # Initialize extensions here to prevent circular imports
 db = SQLAlchemy()
 bcrypt = Bcrypt()
-cors = CORS()
\ No newline at end of file
+cors = CORS()
+
+# Per-request query counts and the slow-query log for the SQLAlchemy routes
+query_stats.instrument_sqlalchemy()
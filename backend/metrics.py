@@ -0,0 +1,345 @@
+import os
+import hmac
+import json
+import mmap
+import time
+import glob
+import struct
+import threading
+from contextlib import contextmanager
+from flask import g, request, session, current_app
+
+try:
+    import fcntl
+except ImportError:  # Windows: python app.py runs a single process
+    fcntl = None
+
+_HEADER = struct.Struct('i')
+_VALUE = struct.Struct('d')
+
+
+class MmapValues:
+    """Append-only map of key -> float64 in a memory-mapped file.
+
+    Only the owning process writes to it, so a plain thread lock is enough;
+    other processes read the file when /metrics is scraped. Each entry is
+    [key length][key, padded to 8 bytes][value], and the header holds the
+    number of bytes in use, written after the entry so readers never see a
+    half-written key.
+    """
+
+    def __init__(self, path, initial_size=1 << 16):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(initial_size)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or 8
+        self._positions = {key: pos for key, value, pos in self._entries(self._map, self._used)}
+
+    @staticmethod
+    def _entries(data, used):
+        pos = 8
+        while pos < used:
+            length = _HEADER.unpack_from(data, pos)[0]
+            key = bytes(data[pos + 4:pos + 4 + length]).decode('utf-8')
+            pos += 4 + length + (-(4 + length) % 8)
+            yield key, _VALUE.unpack_from(data, pos)[0], pos
+            pos += 8
+
+    def _position(self, key):
+        pos = self._positions.get(key)
+        if pos is not None:
+            return pos
+        encoded = key.encode('utf-8')
+        padded = encoded + b' ' * (-(4 + len(encoded)) % 8)
+        size = 4 + len(padded) + 8
+        if self._used + size > self._capacity:
+            self._capacity = max(self._capacity * 2, self._used + size)
+            self._map.close()
+            self._file.truncate(self._capacity)
+            self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        _HEADER.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + 4:self._used + 4 + len(padded)] = padded
+        pos = self._used + 4 + len(padded)
+        _VALUE.pack_into(self._map, pos, 0.0)
+        self._used += size
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = pos
+        return pos
+
+    def inc(self, key, amount=1.0):
+        with self._lock:
+            pos = self._position(key)
+            _VALUE.pack_into(self._map, pos, _VALUE.unpack_from(self._map, pos)[0] + amount)
+
+    def set(self, key, value):
+        with self._lock:
+            _VALUE.pack_into(self._map, self._position(key), value)
+
+    @classmethod
+    def read(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < 8:
+            return []
+        return [(key, value) for key, value, pos in cls._entries(data, _HEADER.unpack_from(data, 0)[0])]
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class Metrics:
+    """Request counters, latency histograms and gauges shared across worker processes.
+
+    Every process writes to its own counters_<pid> and gauges_<pid> files in
+    ``directory``; a scrape sums all counter files and the gauge files of the
+    processes that are still alive. When a new process starts recording, the
+    counters of dead processes are folded into merged_counters.json, so
+    totals never go backwards, and their files are removed.
+    """
+
+    def __init__(self, directory, buckets, gauge_interval=5.0):
+        self.directory = directory
+        self.buckets = sorted(buckets)
+        self.gauge_interval = gauge_interval
+        self.gauge_sources = []  # callables returning {name: value}
+        self._pid = None
+        self._counters = None
+        self._gauges = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def add_gauges(self, source):
+        self.gauge_sources.append(source)
+
+    def _files(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._merge_dead()
+                    pid = os.getpid()
+                    self._counters = MmapValues(os.path.join(self.directory, f'counters_{pid}.db'))
+                    self._gauges = MmapValues(os.path.join(self.directory, f'gauges_{pid}.db'))
+                    self._pid = pid
+                    threading.Thread(target=self._refresh_gauges_loop, daemon=True).start()
+        return self._counters, self._gauges
+
+    @contextmanager
+    def _merge_lock(self):
+        # Serializes merges between processes that start at the same time
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, 'merge.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_merged(self):
+        """(pids whose counters are already in the merged totals, merged totals)"""
+        try:
+            with open(os.path.join(self.directory, 'merged_counters.json')) as f:
+                merged = json.load(f)
+        except (OSError, ValueError):
+            return set(), {}
+        return set(merged['pids']), merged['counters']
+
+    def _merge_dead(self):
+        """Fold dead processes' counters into the merged totals, then remove their files.
+
+        The merged file, which lists the pids it already includes, is replaced
+        atomically before any counter file is removed, so a scrape in between
+        skips those files instead of counting them twice.
+        """
+        own = os.getpid()
+        with self._merge_lock():
+            pids, totals = self._read_merged()
+            if own in pids:
+                # A dead process with this pid was merged but its file is left over
+                self._remove(os.path.join(self.directory, f'counters_{own}.db'))
+            dead = set()
+            for path in glob.glob(os.path.join(self.directory, 'counters_*.db')):
+                pid = int(os.path.basename(path)[:-3].split('_')[1])
+                if pid != own and pid not in pids and not _pid_alive(pid):
+                    for key, value in MmapValues.read(path):
+                        totals[key] = totals.get(key, 0.0) + value
+                    dead.add(pid)
+            remaining = {pid for pid in pids | dead
+                         if pid != own and os.path.exists(os.path.join(self.directory, f'counters_{pid}.db'))}
+            if dead or remaining != pids:
+                path = os.path.join(self.directory, 'merged_counters.json')
+                with open(path + '.tmp', 'w') as f:
+                    json.dump({'pids': sorted(remaining), 'counters': totals}, f)
+                os.replace(path + '.tmp', path)
+            for pid in remaining:
+                self._remove(os.path.join(self.directory, f'counters_{pid}.db'))
+        for path in glob.glob(os.path.join(self.directory, 'gauges_*.db')):
+            pid = int(os.path.basename(path)[:-3].split('_')[1])
+            if pid != own and not _pid_alive(pid):
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def inc(self, name, labels=None, amount=1.0):
+        """Add to a counter; it is exported only if render() knows its name"""
+        counters, _ = self._files()
+        counters.inc(_key(name, labels or {}), amount)
+
+    def observe_request(self, method, route, status, seconds):
+        counters, _ = self._files()
+        labels = {'method': method, 'route': route}
+        counters.inc(_key('campushub_http_requests_total', dict(labels, status=str(status))))
+        if status >= 500:
+            counters.inc(_key('campushub_http_request_errors_total', labels))
+        # Only the matching bucket is written; buckets are made cumulative on export
+        le = next((b for b in self.buckets if seconds <= b), '+Inf')
+        counters.inc(_key('campushub_http_request_duration_seconds_bucket', dict(labels, le=str(le))))
+        counters.inc(_key('campushub_http_request_duration_seconds_sum', labels), seconds)
+        counters.inc(_key('campushub_http_request_duration_seconds_count', labels))
+
+    def refresh_gauges(self):
+        _, gauges = self._files()
+        for source in self.gauge_sources:
+            for name, value in source().items():
+                gauges.set(_key(name, {}), float(value))
+
+    def _refresh_gauges_loop(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            try:
+                self.refresh_gauges()
+            except Exception:
+                pass
+            time.sleep(self.gauge_interval)
+
+    def _collect(self):
+        merged, totals = self._read_merged()
+        counters, gauges = dict(totals), {}
+        for path in glob.glob(os.path.join(self.directory, '*_*.db')):
+            kind, pid = os.path.basename(path)[:-3].split('_')
+            if kind == 'counters' and int(pid) in merged:
+                continue
+            if kind == 'gauges' and not _pid_alive(int(pid)):
+                continue
+            target = counters if kind == 'counters' else gauges
+            for key, value in MmapValues.read(path):
+                target[key] = target.get(key, 0.0) + value
+        return counters, gauges
+
+    def render(self):
+        """All processes' metrics in the Prometheus text format"""
+        self.refresh_gauges()
+        counters, gauges = self._collect()
+        series = {}
+        for key, value in counters.items():
+            name, labels = json.loads(key)
+            series.setdefault(name, []).append((dict(labels), value))
+
+        lines = []
+
+        def emit(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+
+        emit('campushub_http_requests_total', 'counter', 'Requests by method, route and status',
+             series.get('campushub_http_requests_total', []))
+        emit('campushub_http_request_errors_total', 'counter', 'Requests that ended in a 5xx',
+             series.get('campushub_http_request_errors_total', []))
+        emit('campushub_rate_limited_total', 'counter', 'Requests rejected by the rate limiter, by route class',
+             series.get('campushub_rate_limited_total', []))
+
+        name = 'campushub_http_request_duration_seconds'
+        lines.append(f'# HELP {name} Request latency by method and route')
+        lines.append(f'# TYPE {name} histogram')
+        buckets = {}
+        for labels, value in series.get(f'{name}_bucket', []):
+            le = labels.pop('le')
+            buckets.setdefault((labels['method'], labels['route']), {})[le] = value
+        for labels, count in sorted(series.get(f'{name}_count', []), key=lambda s: (s[0]['route'], s[0]['method'])):
+            observed = buckets.get((labels['method'], labels['route']), {})
+            cumulative = 0.0
+            for bound in [str(b) for b in self.buckets] + ['+Inf']:
+                cumulative += observed.get(bound, 0.0)
+                lines.append(f'{name}_bucket{_labels(dict(labels, le=bound))} {_number(cumulative)}')
+            total = next((v for l, v in series.get(f'{name}_sum', []) if l == labels), 0.0)
+            lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+            lines.append(f'{name}_count{_labels(labels)} {_number(count)}')
+
+        for key, value in sorted(gauges.items()):
+            gauge = json.loads(key)[0]
+            lines.append(f'# TYPE {gauge} gauge')
+            lines.append(f'{gauge} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for k, v in sorted(labels.items()):
+        v = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{k}="{v}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def parse_buckets(value):
+    return [float(b) for b in value.split(',') if b.strip()]
+
+
+def scrape_allowed():
+    """Admins, scrapers presenting METRICS_TOKEN, and addresses in METRICS_ALLOWED_IPS"""
+    token = current_app.config.get('METRICS_TOKEN')
+    presented = request.headers.get('Authorization', '').encode('utf-8')
+    if token and hmac.compare_digest(presented, f'Bearer {token}'.encode('utf-8')):
+        return True
+    allowed = current_app.config.get('METRICS_ALLOWED_IPS') or ''
+    if request.remote_addr in {ip.strip() for ip in allowed.split(',') if ip.strip()}:
+        return True
+    principal_cache = current_app.extensions.get('principal_cache')
+    if 'user_id' not in session or principal_cache is None:
+        return False
+    principal = principal_cache.get(session['user_id'])
+    return bool(principal and principal[1] and principal[0] == 'admin')
+
+
+def init_app(app, metrics):
+    app.extensions['metrics'] = metrics
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.observe_request(request.method, route, response.status_code, time.perf_counter() - started)
+        return response
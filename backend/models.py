@@ -9,6 +9,7 @@ class User(db.Model):
     email = db.Column(db.String(100), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.Enum('student', 'teacher', 'admin'), default='student', nullable=False)
+    is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -31,6 +32,8 @@ class Course(db.Model):
     credits = db.Column(db.Integer, nullable=False)
     description = db.Column(db.Text)
     teacher_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    max_students = db.Column(db.Integer, default=50)
+    enrolled_count = db.Column(db.Integer, default=0, nullable=False)
     
     # Relationships
     enrollments = db.relationship('Enrollment', backref='course', lazy=True, cascade="all, delete-orphan")
@@ -52,6 +55,7 @@ class Enrollment(db.Model):
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
     enrollment_date = db.Column(db.Date, default=datetime.utcnow)
     status = db.Column(db.Enum('enrolled', 'completed', 'dropped'), default='enrolled')
+    is_deleted = db.Column(db.Boolean, default=False, server_default='0')
 
     def to_dict(self):
         return {
@@ -0,0 +1,56 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+from flask import request, current_app
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for a malformed limit or cursor"""
+
+
+def encode_cursor(values):
+    """Opaque next-page token for the sort key values of the last row"""
+    values = [v.isoformat(sep=' ') if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidPageRequest('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidPageRequest('Invalid cursor')
+    return values
+
+
+def get_page_args(key_size):
+    """Read ?limit, ?cursor and ?total from the query string.
+
+    Returns (limit, after, include_total) where ``after`` holds the sort key
+    values to continue from, or None for the first page.
+    """
+    limit = request.args.get('limit', current_app.config['API_DEFAULT_PAGE_SIZE'])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise InvalidPageRequest('Invalid limit')
+    if limit < 1:
+        raise InvalidPageRequest('Invalid limit')
+    limit = min(limit, current_app.config['API_MAX_PAGE_SIZE'])
+
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor, key_size) if cursor else None
+    include_total = request.args.get('total', '').lower() in ('1', 'true', 'yes')
+    return limit, after, include_total
+
+
+def paginate(rows, limit, sort_key):
+    """Trim the look-ahead row (queries fetch limit + 1) and build the next cursor"""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(sort_key(rows[-1]))
+    return rows, None
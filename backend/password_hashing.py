@@ -0,0 +1,147 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+import bcrypt
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+
+
+class HashingBusy(Exception):
+    """Raised when too many hash operations are already queued"""
+
+
+# Module-level so they can be pickled into the worker processes
+def _bcrypt_generate(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _bcrypt_check(pwhash, password):
+    return bcrypt.checkpw(password.encode('utf-8'), pwhash.encode('utf-8'))
+
+
+def _worker_pid(_):
+    return os.getpid()
+
+
+class PasswordHasher:
+    """Runs password hashing and verification on a bounded process pool.
+
+    Hashing is CPU bound and would otherwise hold a serving thread for tens of
+    milliseconds per call. At most ``max_pending`` operations may be queued or
+    running; beyond that callers get HashingBusy immediately instead of piling
+    up. A slot is held until its job finishes, even when the caller gave up
+    waiting on it. With ``workers=0`` hashing runs inline on the calling thread.
+
+    New hashes use the configured policy (``method`` for werkzeug hashes,
+    ``bcrypt_rounds`` for bcrypt); needs_rehash() reports stored hashes that
+    were made with different parameters.
+    """
+
+    def __init__(self, workers=None, max_pending=64, timeout=10.0,
+                 method='scrypt:32768:8:1', bcrypt_rounds=12):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.method = method
+        self.bcrypt_rounds = bcrypt_rounds
+        self._method_prefix = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.pending = 0
+        self.rejected = 0
+        self.timeouts = 0
+        atexit.register(self.shutdown)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # spawn: never fork a process that is already running threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise HashingBusy("Password hashing queue is full")
+        with self._stats_lock:
+            self.pending += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._finished(None)
+            raise
+        # The slot stays taken while the job runs, even after the caller times out
+        future.add_done_callback(self._finished)
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise HashingBusy("Password hashing timed out")
+
+    def _finished(self, future):
+        with self._stats_lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def generate(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def bcrypt_generate(self, password):
+        return self._run(_bcrypt_generate, password, self.bcrypt_rounds)
+
+    def bcrypt_check(self, pwhash, password):
+        return self._run(_bcrypt_check, pwhash, password)
+
+    def policy_prefix(self):
+        """The method prefix a hash made under the current policy starts with"""
+        if self._method_prefix is None:
+            # werkzeug fills in defaults ('scrypt' -> 'scrypt:32768:8:1'), so let it name the method
+            self._method_prefix = self._run(generate_password_hash, '', self.method).split('$', 1)[0]
+        return self._method_prefix
+
+    def needs_rehash(self, pwhash):
+        if pwhash.startswith('$2'):
+            # bcrypt: $2b$<rounds>$<salt+hash>
+            return int(pwhash.split('$')[2]) != self.bcrypt_rounds
+        return pwhash.split('$', 1)[0] != self.policy_prefix()
+
+    def warm_up(self):
+        """Start every worker process now rather than on the first login"""
+        if self.workers:
+            executor = self._get_executor()
+            list(executor.map(_worker_pid, range(self.workers)))
+        self.policy_prefix()
+
+    def shutdown(self, wait=False):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        with self._stats_lock:
+            return {'workers': self.workers, 'pending': self.pending, 'max_pending': self.max_pending,
+                    'rejected': self.rejected, 'timeouts': self.timeouts}
+
+
+password_hasher = PasswordHasher(
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+    timeout=Config.PASSWORD_HASH_TIMEOUT,
+    method=Config.PASSWORD_HASH_METHOD,
+    bcrypt_rounds=Config.BCRYPT_LOG_ROUNDS
+)
@@ -0,0 +1,32 @@
+import multiprocessing
+from cache import VersionedCache
+
+
+class PrincipalCache:
+    """user_id -> (role, is_active) for authorization checks, without a query per request.
+
+    Entries come from ``loader(user_id)`` (None for unknown users) and are held
+    in an LRU with a TTL. invalidate() advances an epoch in shared memory, so
+    every worker forked after construction reloads on its next lookup.
+    """
+
+    def __init__(self, loader, maxsize=10000, ttl=60.0):
+        self.loader = loader
+        self._cache = VersionedCache(maxsize=maxsize, ttl=ttl, name='principal cache')
+        self._epoch = multiprocessing.Value('q', 0)
+        self._seen_epoch = 0
+
+    def get(self, user_id):
+        epoch = self._epoch.value
+        if epoch != self._seen_epoch:
+            self._seen_epoch = epoch
+            self._cache.bump()
+        return self._cache.get_or_load(user_id, lambda: self.loader(user_id))
+
+    def invalidate(self):
+        """Call after any user's role or active flag changes; every entry is reloaded"""
+        with self._epoch.get_lock():
+            self._epoch.value += 1
+
+    def stats(self):
+        return self._cache.stats()
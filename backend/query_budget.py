@@ -0,0 +1,52 @@
+import logging
+from flask import g, request, current_app
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more SQL statements than its view declared"""
+
+    def __init__(self, method, path, budget, statements):
+        self.method = method
+        self.path = path
+        self.budget = budget
+        self.statements = statements
+        listing = '\n'.join(f"  {i}. {statement}" for i, statement in enumerate(statements, 1))
+        super().__init__(f"{method} {path} ran {len(statements)} statements, budget is {budget}:\n{listing}")
+
+
+def max_queries(limit):
+    """Declare the most SQL statements one request to this view may run.
+
+    Counts include the principal lookup of the auth decorators on a cold cache.
+    """
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+def view_budget(app, endpoint):
+    view = app.view_functions.get(endpoint)
+    return getattr(view, 'query_budget', None)
+
+
+def init_app(app):
+    """Check every response against its view's budget.
+
+    With QUERY_BUDGET_ENFORCE set (as the query budget checker does) an
+    overrun raises QueryBudgetExceeded, which the test client propagates;
+    otherwise it is logged as a warning.
+    """
+    @app.after_request
+    def check_query_budget(response):
+        stats = g.get('query_stats')
+        budget = view_budget(current_app, request.endpoint)
+        if stats is None or budget is None or stats.count <= budget:
+            return response
+        exceeded = QueryBudgetExceeded(request.method, request.path, budget, stats.statements)
+        if current_app.config.get('QUERY_BUDGET_ENFORCE'):
+            raise exceeded
+        logger.warning(str(exceeded).splitlines()[0])
+        return response
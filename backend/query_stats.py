@@ -0,0 +1,140 @@
+import os
+import time
+import logging
+from logging.handlers import RotatingFileHandler
+from flask import g, request, has_request_context
+
+slow_logger = logging.getLogger('campushub.slow_queries')
+slow_logger.propagate = False  # Kept out of campushub.log
+
+# Set by configure(); statements at or above this many seconds are logged
+_slow_threshold = 0.2
+
+
+class RequestQueryStats:
+    """Statements run while handling one request"""
+
+    MAX_KEPT = 200
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+        self.statements = []  # The first MAX_KEPT, for query budget reports
+
+    def add(self, statement, elapsed):
+        self.count += 1
+        if len(self.statements) < self.MAX_KEPT:
+            self.statements.append(statement)
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+
+    def add_commit(self, elapsed):
+        """Database time of the COMMIT; it is not a query against the budget"""
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = 'COMMIT'
+
+
+def redact(params, many=False):
+    """Parameter types and sizes only; values never reach the log"""
+    if params is None:
+        return '[]'
+    if many:
+        return f"[{len(params)} rows]"
+    if isinstance(params, dict):
+        return '{' + ', '.join(f"{k}: {type(v).__name__}" for k, v in params.items()) + '}'
+    return '[' + ', '.join(
+        f"str({len(v)})" if isinstance(v, str) else type(v).__name__ for v in params
+    ) + ']'
+
+
+def current_stats():
+    """The current request's stats, or None outside a request"""
+    if not has_request_context():
+        return None
+    stats = g.get('query_stats')
+    if stats is None:
+        stats = g.query_stats = RequestQueryStats()
+    return stats
+
+
+def record(statement, params, elapsed, many=False):
+    statement = ' '.join(statement.split())
+    stats = current_stats()
+    if stats is not None:
+        stats.add(statement, elapsed)
+    if elapsed >= _slow_threshold:
+        where = f"{request.method} {request.path}" if has_request_context() else '-'
+        slow_logger.warning(f"{elapsed * 1000:.1f} ms | {where} | {statement} | params={redact(params, many)}")
+
+
+def record_commit(elapsed):
+    stats = current_stats()
+    if stats is not None:
+        stats.add_commit(elapsed)
+    if elapsed >= _slow_threshold:
+        where = f"{request.method} {request.path}" if has_request_context() else '-'
+        slow_logger.warning(f"{elapsed * 1000:.1f} ms | {where} | COMMIT")
+
+
+def configure(threshold_ms, log_path):
+    global _slow_threshold
+    _slow_threshold = threshold_ms / 1000
+    if not slow_logger.handlers:
+        os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+        handler = RotatingFileHandler(log_path, maxBytes=10 * 2**20, backupCount=5, delay=True)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        slow_logger.addHandler(handler)
+        slow_logger.setLevel(logging.WARNING)
+
+
+def _pool_hook(statement, params, elapsed):
+    many = isinstance(params, (list, tuple)) and bool(params) and isinstance(params[0], (list, tuple, dict))
+    record(statement, params, elapsed, many)
+
+
+def instrument_sqlalchemy():
+    """Record statements from every SQLAlchemy engine (the blueprint routes)"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        record(statement, parameters, time.perf_counter() - started, executemany)
+
+
+def init_app(app, pool):
+    """Instrument the raw MySQL pool and add the Server-Timing header"""
+    configure(app.config['SLOW_QUERY_MS'], app.config['SLOW_QUERY_LOG'])
+    pool.add_statement_hook(_pool_hook)
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = RequestQueryStats()
+
+    @app.after_request
+    def add_server_timing(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats.started
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats.total * 1000:.1f};desc="{stats.count} queries", app;dur={total * 1000:.1f}'
+        )
+        if stats.total >= _slow_threshold:
+            slow_logger.warning(
+                f"request {stats.total * 1000:.1f} ms in {stats.count} queries | {request.method} {request.path}"
+                f" | slowest {stats.slowest * 1000:.1f} ms: {stats.slowest_statement}"
+            )
+        return response
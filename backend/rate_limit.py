@@ -0,0 +1,166 @@
+import time
+import zlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from flask import request, session, jsonify, current_app
+
+
+def parse_limit(value):
+    """'20/60' -> (capacity 20, refill rate 20 tokens per 60 seconds)"""
+    count, seconds = value.split('/')
+    return int(count), int(count) / float(seconds)
+
+
+def _take(tokens, updated, now, capacity, rate):
+    """Refill a bucket and try to take one token: (allowed, tokens, retry_after)"""
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+class MemoryBackend:
+    """Token buckets for a single process, bounded by LRU eviction"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = _take(tokens, updated, now, capacity, rate)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed, retry_after
+
+
+class SharedMemoryBackend:
+    """Token buckets in shared memory, visible to every forked worker.
+
+    Must be created before the server forks its workers. Buckets live in a
+    fixed-size direct-mapped table; when two keys land in the same slot the
+    newer one takes it over with a full bucket, which errs towards allowing
+    requests. Size ``slots`` well above the number of active clients.
+    """
+
+    def __init__(self, slots=65536):
+        self.slots = slots
+        self._keys = multiprocessing.RawArray('q', slots)
+        self._tokens = multiprocessing.RawArray('d', slots)
+        self._updated = multiprocessing.RawArray('d', slots)
+        self._lock = multiprocessing.Lock()
+
+    def take(self, key, capacity, rate):
+        digest = zlib.crc32(key.encode('utf-8')) + 1  # 0 marks an empty slot
+        slot = digest % self.slots
+        # CLOCK_MONOTONIC is shared by every process on the host
+        now = time.monotonic()
+        with self._lock:
+            if self._keys[slot] != digest:
+                self._keys[slot] = digest
+                self._tokens[slot] = capacity
+                self._updated[slot] = now
+            allowed, tokens, retry_after = _take(
+                self._tokens[slot], self._updated[slot], now, capacity, rate
+            )
+            self._tokens[slot] = tokens
+            self._updated[slot] = now
+            return allowed, retry_after
+
+
+class RateLimiter:
+    """Per-client token buckets applied to every request before it is routed.
+
+    Requests are grouped into route classes (auth, reads, writes), each with
+    its own limit, and keyed by the session's user_id or the client address.
+    Auth attempts take a token from two buckets and are rejected when either
+    is empty: one per submitted account and client address, so guessing at one
+    account does not lock out everyone behind the same NAT, and a looser one
+    (``auth_address``) per client address, so rotating usernames does not get
+    a fresh bucket on every request.
+    The client address is the peer address unless ProxyFix is configured.
+    """
+
+    def __init__(self, backend, limits):
+        self.backend = backend
+        self.limits = {name: parse_limit(value) for name, value in limits.items()}
+        self.exempt_endpoints = set()
+        self.limited = 0
+        # Callables hook(route_class) run for every rejected request
+        self.limit_hooks = []
+
+    def add_limit_hook(self, hook):
+        self.limit_hooks.append(hook)
+
+    def exempt(self, f):
+        """Decorator for views that are never limited (health checks)"""
+        self.exempt_endpoints.add(f.__name__)
+        return f
+
+    def route_class(self):
+        if request.path.startswith('/api/auth/') and request.method == 'POST':
+            return 'auth'
+        if request.method in ('GET', 'HEAD'):
+            return 'reads'
+        return 'writes'
+
+    def client_key(self):
+        user_id = session.get('user_id')
+        if user_id is not None:
+            return f'user:{user_id}'
+        return f'ip:{request.remote_addr}'
+
+    def auth_key(self):
+        data = request.get_json(silent=True)
+        account = ''
+        if isinstance(data, dict):
+            account = data.get('username') or data.get('email') or ''
+        return f'account:{str(account).strip().lower()[:254]}:ip:{request.remote_addr}'
+
+    def buckets(self, name):
+        """(bucket key, limit name) pairs a request of route class ``name`` takes a token from"""
+        if name == 'auth':
+            return [(f'auth:{self.auth_key()}', 'auth'), (f'auth_address:ip:{request.remote_addr}', 'auth_address')]
+        return [(f'{name}:{self.client_key()}', name)]
+
+    def check(self):
+        if request.method == 'OPTIONS' or request.endpoint in self.exempt_endpoints:
+            return None
+        name = self.route_class()
+        waits = []
+        for key, limit in self.buckets(name):
+            allowed, retry_after = self.backend.take(key, *self.limits[limit])
+            if not allowed:
+                waits.append(retry_after)
+        if not waits:
+            return None
+        retry_after = max(waits)
+        self.limited += 1
+        for hook in tuple(self.limit_hooks):
+            hook(name)
+        response = jsonify({'error': 'Too many requests, please slow down'})
+        response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+        return response, 429
+
+
+def create_backend(name, max_keys):
+    if name == 'shared':
+        return SharedMemoryBackend(slots=max_keys)
+    if name == 'memory':
+        return MemoryBackend(max_keys=max_keys)
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+
+def init_app(app, limiter):
+    app.extensions['rate_limiter'] = limiter
+
+    @app.before_request
+    def apply_rate_limit():
+        if current_app.config.get('RATELIMIT_ENABLED', True):
+            return limiter.check()
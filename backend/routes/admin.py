@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify, session
 from extensions import db
 from models import Course, User, AuditLog
 from utils import role_required, log_audit
+from query_budget import max_queries
+from .student_module import course_list_cache
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -9,6 +11,7 @@ admin_bp = Blueprint('admin', __name__)
 
 @admin_bp.route('/courses', methods=['POST'])
 @role_required('admin')
+@max_queries(3)
 def add_course():
     """Create: Admin creates a new course"""
     data = request.get_json()
@@ -24,6 +27,7 @@ def add_course():
     try:
         db.session.add(new_course)
         db.session.commit()
+        course_list_cache.bump()
         log_audit('CREATE', 'courses', new_course.id, f"Admin created course {new_course.course_code}")
         return jsonify({'message': 'Course created', 'course': new_course.to_dict()}), 201
     except Exception as e:
@@ -31,6 +35,7 @@ def add_course():
 
 @admin_bp.route('/courses/<int:course_id>', methods=['PUT'])
 @role_required('admin')
+@max_queries(4)
 def update_course(course_id):
     """Update: Admin edits a course"""
     course = Course.query.get_or_404(course_id)
@@ -41,26 +46,32 @@ def update_course(course_id):
     course.description = data.get('description', course.description)
     
     db.session.commit()
+    course_list_cache.bump()
     log_audit('UPDATE', 'courses', course.id, f"Admin updated course {course.course_code}")
     
     return jsonify({'message': 'Course updated', 'course': course.to_dict()}), 200
 
 @admin_bp.route('/courses/<int:course_id>', methods=['DELETE'])
 @role_required('admin')
+@max_queries(5)
 def delete_course(course_id):
     """Delete: Admin deletes a course"""
     course = Course.query.get_or_404(course_id)
     db.session.delete(course)
     db.session.commit()
+    course_list_cache.bump()
     
     log_audit('DELETE', 'courses', course_id, f"Admin deleted course {course.course_code}")
     return jsonify({'message': 'Course deleted'}), 200
 
 @admin_bp.route('/audit-logs', methods=['GET'])
 @role_required('admin')
+@max_queries(2)
 def get_audit_logs():
     """Read: Admin views system logs"""
-    logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).limit(100).all()
+    logs = db.session.query(
+        AuditLog.id, AuditLog.action_type, AuditLog.table_name, AuditLog.description, AuditLog.timestamp
+    ).order_by(AuditLog.timestamp.desc()).limit(100).all()
     
     log_list = [{
         'id': l.id,
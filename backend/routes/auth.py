@@ -1,11 +1,23 @@
+import logging
 from flask import Blueprint, request, jsonify, session
-from extensions import db, bcrypt
+from extensions import db
+from config import Config
+from password_hashing import password_hasher, HashingBusy
 from models import User
 from utils import log_audit
+from query_budget import max_queries
 
 auth_bp = Blueprint('auth', __name__)
+logger = logging.getLogger(__name__)
+
+@auth_bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    response = jsonify({'error': 'Server is busy, please try again shortly'})
+    response.headers['Retry-After'] = str(Config.PASSWORD_HASH_RETRY_AFTER)
+    return response, 503
 
 @auth_bp.route('/register', methods=['POST'])
+@max_queries(3)
 def register():
     data = request.get_json()
     username = data.get('username')
@@ -16,7 +28,7 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({'error': 'Email already exists'}), 400
 
-    hashed_pw = bcrypt.generate_password_hash(password).decode('utf-8')
+    hashed_pw = password_hasher.bcrypt_generate(password)
     new_user = User(username=username, email=email, password_hash=hashed_pw, role=role)
     
     db.session.add(new_user)
@@ -26,7 +38,25 @@ def register():
     
     return jsonify({'message': 'User registered successfully'}), 201
 
+def rehash_if_needed(user, password):
+    """Upgrade to the current cost setting while we have the plain password"""
+    username = user.username
+    try:
+        if not password_hasher.needs_rehash(user.password_hash):
+            return
+        new_hash = password_hasher.bcrypt_generate(password)
+        # Skip it if the password was changed since we read it
+        User.query.filter_by(id=user.id, password_hash=user.password_hash).update(
+            {User.password_hash: new_hash}, synchronize_session=False
+        )
+        db.session.commit()
+    except Exception as e:
+        # The login itself succeeded; the upgrade is retried next time
+        db.session.rollback()
+        logger.warning(f"Password rehash skipped for user {username}: {e}")
+
 @auth_bp.route('/login', methods=['POST'])
+@max_queries(3)
 def login():
     data = request.get_json()
     email = data.get('email')
@@ -34,7 +64,9 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if user and bcrypt.check_password_hash(user.password_hash, password):
+    if user and password_hasher.bcrypt_check(user.password_hash, password):
+        rehash_if_needed(user, password)
+
         session.permanent = True
         session['user_id'] = user.id
         session['role'] = user.role
@@ -49,6 +81,7 @@ def login():
     return jsonify({'error': 'Invalid credentials'}), 401
 
 @auth_bp.route('/logout', methods=['POST'])
+@max_queries(0)
 def logout():
     uid = session.get('user_id')
     if uid:
@@ -57,6 +90,7 @@ def logout():
     return jsonify({'message': 'Logged out successfully'}), 200
 
 @auth_bp.route('/me', methods=['GET'])
+@max_queries(0)
 def check_session():
     if 'user_id' in session:
         return jsonify({
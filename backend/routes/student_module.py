@@ -1,35 +1,70 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
+from sqlalchemy.orm import joinedload
 from extensions import db
 from models import Course, Enrollment
 from utils import login_required, role_required, log_audit
+from query_budget import max_queries
+from cache import VersionedCache
+from config import Config
 
 student_bp = Blueprint('student', __name__)
 
+# Serialized course list; admin course changes bump it (see routes/admin.py)
+course_list_cache = VersionedCache(maxsize=1, ttl=Config.CATALOG_CACHE_TTL, name='course list cache')
+
 # --- Student Course Enrollment Module ---
 
 @student_bp.route('/courses', methods=['GET'])
 @login_required
+@max_queries(2)
 def get_available_courses():
     """Read: Get all courses available for enrollment"""
-    courses = Course.query.all()
-    return jsonify([c.to_dict() for c in courses]), 200
+    body = course_list_cache.get_or_load('all', load_course_list)
+    return current_app.response_class(body, mimetype='application/json'), 200
+
+def load_course_list():
+    # Only the columns Course.to_dict() exposes, without building ORM objects
+    rows = db.session.query(
+        Course.id, Course.course_code, Course.course_name, Course.credits, Course.description
+    ).all()
+    return current_app.json.dumps([row._asdict() for row in rows])
 
 @student_bp.route('/enroll', methods=['POST'])
 @role_required('student')
+@max_queries(6)
 def enroll_course():
     """Create: Enroll in a course"""
     data = request.get_json()
     course_id = data.get('course_id')
     student_id = session['user_id']
 
-    # Check if already enrolled
+    # Check if already enrolled (a dropped enrollment is restored below)
     existing = Enrollment.query.filter_by(student_id=student_id, course_id=course_id).first()
-    if existing:
+    if existing and not existing.is_deleted:
         return jsonify({'error': 'Already enrolled in this course'}), 400
 
-    new_enrollment = Enrollment(student_id=student_id, course_id=course_id)
-    db.session.add(new_enrollment)
-    db.session.commit()
+    # Claim a seat atomically; the conditional UPDATE locks the course row until commit
+    seat_taken = Course.query.filter(
+        Course.id == course_id,
+        Course.enrolled_count < Course.max_students
+    ).update({Course.enrolled_count: Course.enrolled_count + 1})
+    if not seat_taken:
+        db.session.rollback()
+        return jsonify({'error': 'Course not found or full'}), 400
+
+    if existing:
+        restored = Enrollment.query.filter_by(id=existing.id, is_deleted=True).update(
+            {Enrollment.is_deleted: False, Enrollment.status: 'enrolled'}, synchronize_session=False
+        )
+        if restored != 1:
+            db.session.rollback()
+            return jsonify({'error': 'Already enrolled in this course'}), 400
+        db.session.commit()
+        new_enrollment = existing
+    else:
+        new_enrollment = Enrollment(student_id=student_id, course_id=course_id)
+        db.session.add(new_enrollment)
+        db.session.commit()
 
     log_audit('CREATE', 'enrollments', new_enrollment.id, f"Student {student_id} enrolled in course {course_id}")
 
@@ -37,25 +72,38 @@ def enroll_course():
 
 @student_bp.route('/my-enrollments', methods=['GET'])
 @role_required('student')
+@max_queries(2)
 def my_enrollments():
     """Read: Get logged-in student's enrollments"""
     student_id = session['user_id']
-    enrollments = Enrollment.query.filter_by(student_id=student_id).all()
+    # The course comes back in the same query instead of one lazy load per enrollment
+    enrollments = Enrollment.query.options(joinedload(Enrollment.course)).filter_by(
+        student_id=student_id, is_deleted=False
+    ).all()
     return jsonify([e.to_dict() for e in enrollments]), 200
 
 @student_bp.route('/drop/<int:enrollment_id>', methods=['DELETE'])
 @role_required('student')
+@max_queries(4)
 def drop_course(enrollment_id):
-    """Delete: Drop a course (Soft delete or Hard delete based on preference)"""
-    # Using hard delete for simplicity, or update status to 'dropped'
+    """Delete: Drop a course (soft delete, as in app.py)"""
     enrollment = Enrollment.query.get_or_404(enrollment_id)
     
     if enrollment.student_id != session['user_id']:
         return jsonify({'error': 'Unauthorized'}), 403
 
-    db.session.delete(enrollment)
+    # Only the drop that flips the row gives the seat back, so repeated or
+    # concurrent drops cannot decrement the counter twice
+    dropped = Enrollment.query.filter_by(id=enrollment_id, is_deleted=False).update(
+        {Enrollment.is_deleted: True}, synchronize_session=False
+    )
+    if dropped != 1:
+        db.session.rollback()
+        return jsonify({'error': 'Enrollment already dropped'}), 404
+    course_id = enrollment.course_id
+    Course.query.filter_by(id=course_id).update({Course.enrolled_count: Course.enrolled_count - 1})
     db.session.commit()
     
-    log_audit('DELETE', 'enrollments', enrollment_id, f"Student dropped course {enrollment.course_id}")
+    log_audit('DELETE', 'enrollments', enrollment_id, f"Student dropped course {course_id}")
 
     return jsonify({'message': 'Course dropped successfully'}), 200
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""Production server: prefork worker processes sharing one listening socket.
+
+The app is imported once in the master and every worker is forked from it,
+so workers start with the code already loaded. Before a worker accepts
+connections it opens its database pool connections, starts its password
+hashing processes (PASSWORD_HASH_WORKERS each, by default the CPUs divided
+between the workers) and fills the course catalog and admin stats caches
+(app.warm_up). Each worker handles up to --threads requests at once; a busy
+worker leaves new connections in the listen backlog for the others.
+
+    GET /healthz   200 while the worker is up (liveness)
+    GET /readyz    200 once it has warmed up, until it starts draining, and
+                   only while the database answers (readiness)
+
+SIGTERM or SIGINT shuts down gracefully: workers stop accepting, finish the
+requests in flight (up to --graceful-timeout seconds), flush queued audit
+rows and close their pools and log handlers. Workers that die are replaced.
+POSIX only; on Windows use python app.py.
+
+Run from the backend directory (defaults come from the SERVE_* settings):
+
+    python serve.py
+    python serve.py --port 8000 --workers 8 --threads 16
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from werkzeug.serving import ThreadedWSGIServer, select_address_family
+from config import Config
+
+logger = logging.getLogger('serve')
+
+
+class WorkerServer(ThreadedWSGIServer):
+    """Threaded WSGI server on an inherited listening socket, at most ``threads`` requests at a time"""
+
+    def __init__(self, host, port, app, fd, threads):
+        super().__init__(host, port, app, fd=fd)
+        # Every worker wakes up for a new connection; the ones that lose the
+        # race get an OSError from accept(), which serve_forever() ignores
+        self.socket.setblocking(False)
+        self.threads = threads
+        self.slots = threading.BoundedSemaphore(threads)
+
+    def get_request(self):
+        if not self.slots.acquire(timeout=0.05):
+            raise OSError("No free request thread")
+        try:
+            return super().get_request()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def process_request(self, request, client_address):
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.slots.release()
+
+    def drain(self, timeout):
+        """Wait for the requests in flight; False if some were still running at the deadline"""
+        deadline = time.monotonic() + timeout
+        for _ in range(self.threads):
+            if not self.slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                return False
+        return True
+
+
+def run_worker(campus, listener, args):
+    """Body of a forked worker; never returns"""
+    stopping = threading.Event()
+    # The master turns Ctrl+C into a SIGTERM for every worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    pid = os.getpid()
+
+    started = time.perf_counter()
+    campus.warm_up()
+    server = WorkerServer(args.host, args.port, campus.app, listener.fileno(), args.threads)
+    listener.close()
+    threading.Thread(target=server.serve_forever, name='accept', daemon=True).start()
+    campus.readiness.set()
+    logger.info(f"Worker {pid} ready after {time.perf_counter() - started:.2f}s")
+
+    master = os.getppid()
+    while not stopping.wait(1.0):
+        if os.getppid() != master:
+            logger.warning(f"Worker {pid}: master exited, shutting down")
+            break
+
+    campus.readiness.clear()
+    server.shutdown()
+    if not server.drain(args.graceful_timeout):
+        logger.warning(f"Worker {pid}: requests still running after {args.graceful_timeout:g}s, exiting anyway")
+    server.server_close()
+    campus.shutdown()
+    logger.info(f"Worker {pid} stopped")
+    logging.shutdown()
+    os._exit(0)
+
+
+class Master:
+    def __init__(self, campus, listener, args):
+        self.campus = campus
+        self.listener = listener
+        self.args = args
+        self.workers = {}  # pid -> start time
+        self.stopping = False
+
+    def spawn(self):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(self.campus, self.listener, self.args)
+            except BaseException as e:
+                logger.error(f"Worker {os.getpid()} failed: {e}")
+                logging.shutdown()
+            os._exit(1)
+        self.workers[pid] = time.monotonic()
+
+    def reap(self, respawn=True):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if not respawn or self.stopping:
+                continue
+            logger.warning(f"Worker {pid} exited with status {code}, starting a replacement")
+            if time.monotonic() - started < 1.0:
+                # Do not spin when workers die right after starting
+                time.sleep(1.0)
+            self.spawn()
+
+    def handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        for _ in range(self.args.workers):
+            self.spawn()
+        host, port = self.listener.getsockname()[:2]
+        print(f"Serving on http://{host}:{port} with {self.args.workers} workers "
+              f"of {self.args.threads} threads (master pid {os.getpid()})")
+        logger.info(f"Master {os.getpid()} serving on {host}:{port} with {self.args.workers} workers")
+
+        while not self.stopping:
+            self.reap()
+            time.sleep(0.5)
+        self.stop()
+
+    def stop(self):
+        print(f"Shutting down {len(self.workers)} workers")
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        # Leave time for the audit flush after the drain
+        deadline = time.monotonic() + self.args.graceful_timeout + 10
+        while self.workers and time.monotonic() < deadline:
+            self.reap(respawn=False)
+            time.sleep(0.1)
+        for pid in self.workers:
+            logger.warning(f"Worker {pid} did not stop in time, killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.reap(respawn=False)
+        self.listener.close()
+        logger.info(f"Master {os.getpid()} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=Config.SERVE_HOST, help=f'address to bind (default {Config.SERVE_HOST})')
+    parser.add_argument('--port', type=int, default=Config.SERVE_PORT, help=f'port to bind (default {Config.SERVE_PORT})')
+    parser.add_argument('--workers', type=int, default=Config.SERVE_WORKERS,
+                        help=f'worker processes (default {Config.SERVE_WORKERS})')
+    parser.add_argument('--threads', type=int, default=Config.SERVE_THREADS,
+                        help=f'concurrent requests per worker (default {Config.SERVE_THREADS})')
+    parser.add_argument('--backlog', type=int, default=Config.SERVE_BACKLOG,
+                        help=f'listen backlog (default {Config.SERVE_BACKLOG})')
+    parser.add_argument('--graceful-timeout', type=float, default=Config.SERVE_GRACEFUL_TIMEOUT,
+                        help=f'seconds to finish in-flight requests on shutdown (default {Config.SERVE_GRACEFUL_TIMEOUT:g})')
+    args = parser.parse_args()
+    if not hasattr(os, 'fork'):
+        raise SystemExit("serve.py needs os.fork(); use python app.py on this platform")
+    if args.workers > 1 and Config.SESSION_BACKEND == 'memory':
+        print("Warning: SESSION_BACKEND=memory keeps sessions per worker, so logins will not carry across workers")
+    if args.workers > 1 and Config.RATELIMIT_ENABLED and Config.RATELIMIT_BACKEND == 'memory':
+        print("Warning: RATELIMIT_BACKEND=memory gives every worker its own buckets; use 'shared'")
+    # Every worker starts its own hashing processes, so split the CPUs between
+    # them rather than giving each worker one per CPU
+    cpus = os.cpu_count() or 1
+    if not os.environ.get('PASSWORD_HASH_WORKERS'):
+        Config.PASSWORD_HASH_WORKERS = max(1, cpus // args.workers)
+    elif args.workers * Config.PASSWORD_HASH_WORKERS > cpus:
+        print(f"Warning: {args.workers} workers x PASSWORD_HASH_WORKERS={Config.PASSWORD_HASH_WORKERS} "
+              f"hashing processes is more than the {cpus} CPUs")
+
+    # Bind before importing the app so a taken port fails fast
+    listener = socket.create_server((args.host, args.port), family=select_address_family(args.host, args.port),
+                                    backlog=args.backlog)
+    listener.setblocking(False)
+
+    # Preload: everything created at import (session store, shared rate limit
+    # table, cache epochs) is inherited by the workers
+    import app as campus
+    campus.readiness.clear()
+
+    Master(campus, listener, args).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+import os
+import time
+import zlib
+import sqlite3
+import secrets
+import threading
+import multiprocessing
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
+from werkzeug.datastructures import CallbackDict
+
+serializer = TaggedJSONSerializer()
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session data kept on the server; the cookie only carries ``sid``"""
+
+    def __init__(self, initial=None, sid=None, new=False, expires=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires = expires
+        self.modified = False
+        self.replaced_sid = None
+
+    def regenerate(self):
+        """Move the session to a fresh id, e.g. on login, against session fixation"""
+        if not self.new:
+            self.replaced_sid = self.sid
+        self.sid = new_sid()
+        self.new = True
+        self.modified = True
+
+
+def new_sid():
+    return secrets.token_urlsafe(32)
+
+
+class MemorySessionStore:
+    """Sessions in a plain dict; single process only, lost on restart"""
+
+    def __init__(self):
+        self._sessions = {}  # sid -> (user_id, payload, expires)
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        with self._lock:
+            row = self._sessions.get(sid)
+        if row is None or row[2] < time.time():
+            return None
+        return row[1], row[2], row[0]
+
+    def save(self, sid, user_id, payload, expires):
+        with self._lock:
+            self._sessions[sid] = (user_id, payload, expires)
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            for sid in [s for s, row in self._sessions.items() if row[0] == user_id]:
+                del self._sessions[sid]
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for sid in [s for s, row in self._sessions.items() if row[2] < now]:
+                del self._sessions[sid]
+
+
+class SQLiteSessionStore:
+    """Sessions in a local SQLite file, shared by every worker on the host.
+
+    Statements run on a small pool of connections: at most ``pool_size`` stay
+    open between requests, and any opened beyond that under load are closed
+    when they are handed back.
+    """
+
+    def __init__(self, path, pool_size=4):
+        self.path = path
+        self.pool_size = pool_size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    sid TEXT PRIMARY KEY,
+                    user_id INTEGER,
+                    payload TEXT NOT NULL,
+                    expires REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user_id)")
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _conn(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Connections inherited from a parent process must not be used
+                self._idle = []
+                self._pid = os.getpid()
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                if self._pid == os.getpid() and len(self._idle) < self.pool_size:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def load(self, sid):
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT payload, expires, user_id FROM sessions WHERE sid = ? AND expires >= ?", (sid, time.time())
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def save(self, sid, user_id, payload, expires):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, user_id, payload, expires) VALUES (?, ?, ?, ?)",
+                (sid, user_id, payload, expires)
+            )
+
+    def delete(self, sid):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def delete_user(self, user_id):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+
+    def purge_expired(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+
+    def close(self):
+        """Close the idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class CachedSessionStore:
+    """In-process LRU with a short TTL in front of another session store.
+
+    Revocations go through a table of generations in shared memory, one slot
+    per hash of a session id and one per hash of a user id. A cached entry
+    records the generations of its two slots; deleting or replacing a session
+    advances its sid slot, and revoking a user advances their user slot, so
+    every worker (forked after this object was created) stops serving just
+    those entries at once, without a store read on every request. Sessions
+    whose ids share a slot are only re-read from the store. A load that
+    overlaps any revocation is not cached.
+    """
+
+    def __init__(self, store, maxsize=10000, ttl=5.0, purge_interval=300.0, slots=65536):
+        self.store = store
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.slots = slots
+        # sid slots, then user slots, then the count of all revocations
+        self._generations = multiprocessing.RawArray('q', 2 * slots + 1)
+        self._generations_lock = multiprocessing.Lock()
+        self._entries = OrderedDict()  # sid -> (row, (sid slot, user slot), generations, stored_at)
+        self._lock = threading.Lock()
+        self._last_purge = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+
+    def _sid_slot(self, sid):
+        return zlib.crc32(sid.encode('utf-8')) % self.slots
+
+    def _user_slot(self, user_id):
+        return self.slots + zlib.crc32(str(user_id).encode('utf-8')) % self.slots
+
+    def _generations_of(self, slots):
+        return tuple(self._generations[slot] for slot in slots)
+
+    def _revoke(self, slot):
+        with self._generations_lock:
+            self._generations[slot] += 1
+            self._generations[-1] += 1
+
+    def load(self, sid):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None:
+                row, slots, generations, stored_at = entry
+                if generations == self._generations_of(slots) and time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(sid)
+                    self.hits += 1
+                    return row
+            self.misses += 1
+        revocations = self._generations[-1]
+        row = self.store.load(sid)
+        if row is None:
+            return None
+        payload, expires, user_id = row
+        slots = (self._sid_slot(sid), self._user_slot(user_id))
+        generations = self._generations_of(slots)
+        if self._generations[-1] == revocations:
+            self._cache(sid, (payload, expires), slots, generations)
+        return payload, expires
+
+    def _cache(self, sid, row, slots, generations):
+        with self._lock:
+            self._entries[sid] = (row, slots, generations, time.monotonic())
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def save(self, sid, user_id, payload, expires, replaced=False):
+        slots = (self._sid_slot(sid), self._user_slot(user_id))
+        self.store.save(sid, user_id, payload, expires)
+        if replaced:
+            # Other workers may hold the previous contents of this sid
+            self._revoke(slots[0])
+        self._cache(sid, (payload, expires), slots, self._generations_of(slots))
+        if time.monotonic() - self._last_purge > self.purge_interval:
+            self._last_purge = time.monotonic()
+            self.store.purge_expired()
+
+    def delete(self, sid):
+        self.store.delete(sid)
+        self._revoke(self._sid_slot(sid))
+
+    def delete_user(self, user_id):
+        """Revoke every session of a user, effective in all workers immediately"""
+        self.store.delete_user(user_id)
+        self._revoke(self._user_slot(user_id))
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'revocations': self._generations[-1],
+                    'hits': self.hits, 'misses': self.misses}
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface backed by a CachedSessionStore.
+
+    Expiry is extended at most once per ``refresh_interval`` seconds, so an
+    unchanged session costs no store write per request.
+    """
+
+    def __init__(self, store, refresh_interval=60.0):
+        self.store = store
+        self.refresh_interval = refresh_interval
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            row = self.store.load(sid)
+            if row is not None:
+                payload, expires = row
+                return ServerSideSession(serializer.loads(payload), sid=sid, expires=expires)
+        return ServerSideSession(sid=new_sid(), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.replaced_sid:
+            self.store.delete(session.replaced_sid)
+            session.replaced_sid = None
+
+        if not session:
+            if not session.new:
+                self.store.delete(session.sid)
+            if session.modified:
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        now = time.time()
+        expires = now + app.permanent_session_lifetime.total_seconds()
+        extend = session.expires is None or expires - session.expires > self.refresh_interval
+        if session.modified or extend:
+            self.store.save(
+                session.sid, session.get('user_id'), serializer.dumps(dict(session)), expires,
+                replaced=session.modified and not session.new
+            )
+            session.expires = expires
+
+        if session.new or session.modified or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name, session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain, path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+
+def create_session_interface(backend, sqlite_path, cache_size, cache_ttl):
+    if backend == 'sqlite':
+        store = SQLiteSessionStore(sqlite_path)
+    elif backend == 'memory':
+        store = MemorySessionStore()
+    else:
+        raise ValueError(f"Unknown session backend: {backend}")
+    return ServerSideSessionInterface(CachedSessionStore(store, maxsize=cache_size, ttl=cache_ttl))
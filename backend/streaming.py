@@ -0,0 +1,65 @@
+import logging
+from flask import Response, request, current_app
+from mysql.connector import Error
+
+logger = logging.getLogger(__name__)
+
+NDJSON = 'application/x-ndjson'
+
+
+def get_stream_format():
+    """'ndjson', 'json' or None depending on ?stream= / ?format= / Accept"""
+    if request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == NDJSON:
+        return 'ndjson'
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return 'json'
+    return None
+
+
+def stream_query(pool, query, params, key, fmt, chunk_size=1000):
+    """Stream a query's rows as a JSON document ({key: [...]}) or as NDJSON.
+
+    Rows are read from an unbuffered cursor on a dedicated pooled connection in
+    chunks of ``chunk_size``, so memory stays flat regardless of the row count.
+    """
+    dumps = current_app.json.dumps
+    conn = pool.connect()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query, params)
+    except Error:
+        conn.close()
+        raise
+
+    def generate():
+        try:
+            if fmt == 'json':
+                yield '{"%s":[' % key
+            first = True
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if fmt == 'ndjson':
+                    yield ''.join(dumps(row) + '\n' for row in rows)
+                else:
+                    chunk = ','.join(dumps(row) for row in rows)
+                    yield chunk if first else ',' + chunk
+                    first = False
+            if fmt == 'json':
+                yield ']}'
+        except Error as e:
+            # Headers are already sent; the truncated body tells the client it failed
+            logger.error(f"Streaming {key} failed: {e}")
+
+    def release():
+        try:
+            cursor.close()
+        except Error:
+            pass  # Unread rows left behind; the pool discards the connection
+        conn.close()
+
+    mimetype = NDJSON if fmt == 'ndjson' else 'application/json'
+    response = Response(generate(), mimetype=mimetype, headers={'X-Accel-Buffering': 'no'})
+    response.call_on_close(release)
+    return response
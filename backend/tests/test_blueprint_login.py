@@ -0,0 +1,63 @@
+"""Password upgrade on login through the auth blueprint (routes/auth.py)"""
+import pytest
+from extensions import db
+from models import User
+from password_hashing import password_hasher, HashingBusy
+from tools.check_query_budgets import blueprint_app, seed_blueprints
+
+CREDENTIALS = {'email': 'student@example.com', 'password': 'budget-pass'}
+
+
+@pytest.fixture
+def blueprint(tmp_path, monkeypatch):
+    # Seeded hashes use 4 rounds, so every login wants to rehash
+    monkeypatch.setattr(password_hasher, 'workers', 0)
+    monkeypatch.setattr(password_hasher, 'bcrypt_rounds', 5)
+    app = blueprint_app(tmp_path / 'login.db')
+    seed_blueprints(app, courses=1, enrollments=0)
+    yield app, app.test_client()
+    writer = app.extensions.pop('orm_audit_writer', None)
+    if writer is not None:
+        writer.close()
+
+
+def stored_hash(app):
+    with app.app_context():
+        return db.session.get(User, 2).password_hash
+
+
+def test_login_upgrades_the_hash(blueprint):
+    app, client = blueprint
+    before = stored_hash(app)
+    assert client.post('/api/auth/login', json=CREDENTIALS).status_code == 200
+    assert stored_hash(app) != before
+    assert not password_hasher.needs_rehash(stored_hash(app))
+
+
+def test_busy_hasher_does_not_fail_the_login(blueprint, monkeypatch):
+    app, client = blueprint
+    before = stored_hash(app)
+
+    def busy(password):
+        raise HashingBusy('queue is full')
+    monkeypatch.setattr(password_hasher, 'bcrypt_generate', busy)
+
+    assert client.post('/api/auth/login', json=CREDENTIALS).status_code == 200
+    assert stored_hash(app) == before
+
+
+def test_password_changed_during_the_rehash_is_kept(blueprint, monkeypatch):
+    app, client = blueprint
+    app.config['QUERY_BUDGET_ENFORCE'] = False  # The concurrent UPDATE counts against the login
+    generate = password_hasher.bcrypt_generate
+    changed = generate('changed-elsewhere')
+
+    def change_then_generate(password):
+        # Another request sets a new password while this one hashes
+        with db.engine.begin() as conn:
+            conn.execute(User.__table__.update().where(User.id == 2).values(password_hash=changed))
+        return generate(password)
+    monkeypatch.setattr(password_hasher, 'bcrypt_generate', change_then_generate)
+
+    assert client.post('/api/auth/login', json=CREDENTIALS).status_code == 200
+    assert stored_hash(app) == changed
@@ -0,0 +1,95 @@
+"""Cross-process counters and scrape access (metrics.py)"""
+import os
+import subprocess
+import sys
+from flask import Flask, jsonify
+from mysql.connector import Error
+import metrics
+import unit_of_work
+from metrics import Metrics, MmapValues
+
+
+def dead_pid():
+    child = subprocess.Popen([sys.executable, '-c', 'pass'])
+    child.wait()
+    return child.pid
+
+
+def requests_total(text):
+    line = next(l for l in text.splitlines() if l.startswith('campushub_http_requests_total{'))
+    return int(line.rsplit(' ', 1)[1])
+
+
+def test_dead_workers_counters_are_kept(tmp_path):
+    pid = dead_pid()
+    worker = MmapValues(str(tmp_path / f'counters_{pid}.db'))
+    worker.inc(metrics._key('campushub_http_requests_total', {'method': 'GET', 'route': '/x', 'status': '200'}), 3)
+    MmapValues(str(tmp_path / f'gauges_{pid}.db')).set(metrics._key('campushub_db_pool_open', {}), 4)
+
+    m = Metrics(str(tmp_path), [0.1])
+    m.observe_request('GET', '/x', 200, 0.01)
+    assert not os.path.exists(tmp_path / f'counters_{pid}.db')
+    assert not os.path.exists(tmp_path / f'gauges_{pid}.db')
+    assert requests_total(m.render()) == 4
+
+    # A later process finds nothing new to merge and the total holds
+    m._pid = None
+    m._files()
+    assert requests_total(m.render()) == 4
+
+
+def test_rate_limited_requests_are_a_counter(tmp_path):
+    m = Metrics(str(tmp_path), [0.1])
+    m.inc('campushub_rate_limited_total', {'class': 'auth'})
+    text = m.render()
+    assert '# TYPE campushub_rate_limited_total counter' in text
+    assert 'campushub_rate_limited_total{class="auth"} 1' in text
+
+
+def test_scrape_needs_the_token_or_an_allowed_address():
+    app = Flask(__name__)
+    app.config.update(METRICS_TOKEN='s3cret', METRICS_ALLOWED_IPS='10.0.0.9')
+
+    def allowed(addr='127.0.0.1', **headers):
+        with app.test_request_context('/metrics', headers=headers, environ_base={'REMOTE_ADDR': addr}):
+            return metrics.scrape_allowed()
+
+    assert not allowed()
+    assert not allowed(Authorization='Bearer wrong')
+    assert allowed(Authorization='Bearer s3cret')
+    assert allowed(addr='10.0.0.9')
+
+
+class FailingCommitPool:
+    """A pool whose connections fail to commit"""
+
+    class Connection:
+        def commit(self):
+            raise Error("Lost connection to MySQL server during query")
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    def connect(self):
+        return self.Connection()
+
+
+def test_a_failed_commit_is_recorded_as_a_500(tmp_path):
+    app = Flask(__name__)
+    # Registered in app.py's order: the unit of work before metrics
+    unit_of_work.init_app(app, FailingCommitPool())
+    m = Metrics(str(tmp_path), [0.1])
+    metrics.init_app(app, m)
+
+    @app.route('/write', methods=['POST'])
+    def write():
+        unit_of_work.get_unit_of_work().connection()
+        return jsonify({'ok': True})
+
+    assert app.test_client().post('/write').status_code == 500
+    text = m.render()
+    assert 'campushub_http_requests_total{method="POST",route="/write",status="500"} 1' in text
+    assert 'status="200"' not in text
@@ -0,0 +1,29 @@
+"""Slots and counters of the password hashing pool (password_hashing.py)"""
+import time
+import pytest
+from password_hashing import PasswordHasher, HashingBusy
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, max_pending=1, timeout=0.05)
+    yield hasher
+    hasher.shutdown(wait=True)
+
+
+def test_timed_out_job_keeps_its_slot_until_it_finishes(hasher):
+    with pytest.raises(HashingBusy, match='timed out'):
+        hasher._run(time.sleep, 1)
+    # The sleep is still queued or running, so the only slot is still taken
+    with pytest.raises(HashingBusy, match='queue is full'):
+        hasher._run(time.sleep, 0)
+    assert hasher.stats()['pending'] == 1
+
+    deadline = time.monotonic() + 30
+    while hasher.stats()['pending'] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    stats = hasher.stats()
+    assert (stats['pending'], stats['rejected'], stats['timeouts']) == (0, 1, 1)
+
+    hasher.timeout = 30
+    assert hasher._run(abs, -3) == 3
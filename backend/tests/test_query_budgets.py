@@ -0,0 +1,8 @@
+"""Query budgets of the blueprint routes (tools/check_query_budgets.py)"""
+from tools.check_query_budgets import check_blueprints
+
+
+def test_blueprint_routes_stay_within_budget_as_the_data_grows():
+    # Any overrun fails, and so does a statement count that grows with the
+    # rows, even one that still fits the budget
+    assert check_blueprints(sizes=[(5, 3), (60, 40)]) == []
@@ -0,0 +1,50 @@
+"""Server-Timing of requests whose commit fails (query_stats.py)"""
+import time
+from flask import Flask, jsonify
+from mysql.connector import Error
+import query_stats
+import unit_of_work
+
+
+class SlowFailingCommitPool:
+    """A pool whose connections take a while to fail their commit"""
+
+    def __init__(self):
+        self.statement_hooks = []
+
+    def add_statement_hook(self, hook):
+        self.statement_hooks.append(hook)
+
+    class Connection:
+        def commit(self):
+            time.sleep(0.05)
+            raise Error("Lock wait timeout exceeded")
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    def connect(self):
+        return self.Connection()
+
+
+def test_the_500_for_a_failed_commit_carries_the_commit_time(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SLOW_QUERY_MS=1000, SLOW_QUERY_LOG=str(tmp_path / 'slow.log'))
+    pool = SlowFailingCommitPool()
+    # Registered in app.py's order: the unit of work before query stats
+    unit_of_work.init_app(app, pool)
+    query_stats.init_app(app, pool)
+
+    @app.route('/write', methods=['POST'])
+    def write():
+        unit_of_work.get_unit_of_work().connection()
+        return jsonify({'ok': True})
+
+    response = app.test_client().post('/write')
+    assert response.status_code == 500
+    db = response.headers['Server-Timing'].split(',')[0]
+    assert db.endswith('desc="0 queries"')
+    assert float(db.split('dur=')[1].split(';')[0]) >= 50
@@ -0,0 +1,47 @@
+"""Auth rate limit keys (rate_limit.py)"""
+from flask import Flask, jsonify
+import rate_limit
+
+
+def limited_app():
+    app = Flask(__name__)
+    limiter = rate_limit.RateLimiter(rate_limit.MemoryBackend(), {
+        'auth': '2/60', 'auth_address': '4/60', 'reads': '2/60', 'writes': '2/60'
+    })
+    rate_limit.init_app(app, limiter)
+
+    @app.route('/api/auth/login', methods=['POST'])
+    def login():
+        return jsonify({}), 200
+
+    @app.route('/api/auth/register', methods=['POST'])
+    def register():
+        return jsonify({}), 201
+
+    return app.test_client()
+
+
+def login(client, username, addr='10.0.0.1'):
+    return client.post('/api/auth/login', json={'username': username, 'password': 'x'},
+                       environ_base={'REMOTE_ADDR': addr}).status_code
+
+
+def test_auth_attempts_are_limited_per_account_and_address():
+    client = limited_app()
+    assert [login(client, 'alice') for _ in range(3)] == [200, 200, 429]
+    # Same address, another account; same account from another address
+    assert login(client, 'bob') == 200
+    assert login(client, 'alice', addr='10.0.0.2') == 200
+    assert login(client, ' ALICE ') == 429
+
+
+def test_rotating_usernames_from_one_address_is_limited():
+    client = limited_app()
+    statuses = [
+        client.post('/api/auth/register', json={'username': f'user{i}', 'password': 'x'},
+                    environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code
+        for i in range(10)
+    ]
+    assert statuses == [201] * 4 + [429] * 6
+    # Another address still has its own budget
+    assert login(client, 'user0', addr='10.0.0.2') == 200
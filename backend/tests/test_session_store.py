@@ -0,0 +1,54 @@
+"""Session cache revocation and the SQLite store's connections (session_store.py)"""
+import threading
+import pytest
+from session_store import CachedSessionStore, MemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture
+def store():
+    store = CachedSessionStore(MemorySessionStore(), ttl=60)
+    store.save('alice-1', 1, 'a1', 2e9)
+    store.save('alice-2', 1, 'a2', 2e9)
+    store.save('bob-1', 2, 'b1', 2e9)
+    return store
+
+
+def test_logout_revokes_only_that_session(store):
+    store.delete('alice-1')
+
+    assert store.load('alice-1') is None
+    hits = store.stats()['hits']
+    assert store.load('alice-2') == ('a2', 2e9)
+    assert store.load('bob-1') == ('b1', 2e9)
+    assert store.stats()['hits'] == hits + 2
+
+
+def test_revoking_a_user_keeps_other_users_cached(store):
+    store.delete_user(1)
+
+    assert store.load('alice-1') is None
+    assert store.load('alice-2') is None
+    hits = store.stats()['hits']
+    assert store.load('bob-1') == ('b1', 2e9)
+    assert store.stats()['hits'] == hits + 1
+
+
+def test_sqlite_store_keeps_a_bounded_set_of_connections(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.db'), pool_size=2)
+    store.save('sid', 7, 'payload', 2e9)
+    barrier = threading.Barrier(8)
+
+    def load():
+        barrier.wait()
+        for _ in range(20):
+            assert store.load('sid') == ('payload', 2e9, 7)
+
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(store._idle) <= 2
+    store.close()
+    assert store._idle == []
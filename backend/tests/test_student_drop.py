@@ -0,0 +1,60 @@
+"""Dropping an enrollment through the student blueprint (routes/student_module.py)"""
+import pytest
+from extensions import db
+from models import Course, Enrollment
+from tools.check_query_budgets import blueprint_app, seed_blueprints
+
+
+@pytest.fixture
+def blueprint(tmp_path):
+    app = blueprint_app(tmp_path / 'drop.db')
+    ids = seed_blueprints(app, courses=3, enrollments=2)
+    with app.app_context():
+        Course.query.filter(Course.id <= 2).update({Course.enrolled_count: 1})
+        db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 2
+        sess['role'] = 'student'
+    yield app, client, ids
+    writer = app.extensions.pop('orm_audit_writer', None)
+    if writer is not None:
+        writer.close()
+
+
+def course_of(app, enrollment_id):
+    with app.app_context():
+        return db.session.get(Enrollment, enrollment_id).course_id
+
+
+def enrolled_count(app, course_id):
+    with app.app_context():
+        return db.session.get(Course, course_id).enrolled_count
+
+
+def test_dropping_twice_frees_one_seat(blueprint):
+    app, client, ids = blueprint
+    enrollment_id = ids['enrollment_id']
+    course_id = course_of(app, enrollment_id)
+
+    assert client.delete(f'/api/student/drop/{enrollment_id}').status_code == 200
+    assert client.delete(f'/api/student/drop/{enrollment_id}').status_code == 404
+    assert enrolled_count(app, course_id) == 0
+    with app.app_context():
+        assert db.session.get(Enrollment, enrollment_id).is_deleted
+
+
+def test_dropped_enrollment_is_hidden_and_can_be_restored(blueprint):
+    app, client, ids = blueprint
+    enrollment_id = ids['enrollment_id']
+    course_id = course_of(app, enrollment_id)
+    client.delete(f'/api/student/drop/{enrollment_id}')
+
+    listed = [e['id'] for e in client.get('/api/student/my-enrollments').get_json()]
+    assert enrollment_id not in listed
+
+    response = client.post('/api/student/enroll', json={'course_id': course_id})
+    assert response.status_code == 201
+    assert response.get_json()['enrollment']['id'] == enrollment_id
+    assert enrolled_count(app, course_id) == 1
+    assert client.post('/api/student/enroll', json={'course_id': course_id}).status_code == 400
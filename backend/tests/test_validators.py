@@ -0,0 +1,75 @@
+"""ETag validators when commits land out of order (validators.py), run on SQLite"""
+import sqlite3
+import pytest
+from validators import fetch_validators
+
+
+class DictCursor:
+    """The subset of a mysql.connector dictionary cursor fetch_validators uses"""
+
+    def __init__(self, conn):
+        self._cursor = conn.cursor()
+
+    def execute(self, operation, params=()):
+        self._cursor.execute(operation.replace('%s', '?'), params)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return dict(zip([d[0] for d in self._cursor.description], row))
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(':memory:', isolation_level=None)
+    conn.executescript("""
+        CREATE TABLE courses (id INTEGER PRIMARY KEY, teacher_id INTEGER, version INTEGER NOT NULL DEFAULT 0,
+                              updated_at REAL NOT NULL DEFAULT 0);
+        CREATE TABLE enrollments (id INTEGER PRIMARY KEY, student_id INTEGER, course_id INTEGER,
+                                  version INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL DEFAULT 0);
+        INSERT INTO courses (id, teacher_id) VALUES (1, 10), (2, 20);
+        INSERT INTO enrollments (id, student_id, course_id) VALUES (1, 100, 1), (2, 100, 2), (3, 200, 2);
+    """)
+    return conn
+
+
+def write(conn, table, row_id, updated_at):
+    # What the API's UPDATEs do: MySQL stamps updated_at when the statement
+    # runs, and the row's version is bumped in the same statement
+    conn.execute(f"UPDATE {table} SET version = version + 1, updated_at = ? WHERE id = ?", (updated_at, row_id))
+
+
+def validators(conn, scope, *params):
+    return fetch_validators(DictCursor(conn), scope, params)
+
+
+def test_commit_stamped_earlier_but_landing_later_changes_the_validator(db):
+    # B (stamped at 2) commits first, then A (stamped at 1)
+    write(db, 'enrollments', 2, updated_at=2)
+    seen = validators(db, 'student', 100)
+    write(db, 'enrollments', 1, updated_at=1)
+    now = validators(db, 'student', 100)
+
+    assert now[2] == seen[2]  # MAX(updated_at) cannot see the late commit
+    assert now != seen
+
+
+@pytest.mark.parametrize('scope, params', [('catalog', ()), ('admin', ())])
+def test_global_scopes_see_late_commits(db, scope, params):
+    write(db, 'courses', 2, updated_at=2)
+    seen = validators(db, scope, *params)
+    write(db, 'courses', 1, updated_at=1)
+    assert validators(db, scope, *params) != seen
+
+
+def test_validators_are_scoped_to_the_callers_rows(db):
+    student, teacher = validators(db, 'student', 100), validators(db, 'teacher', 10)
+
+    # Another student's enrollment in a course neither of them can see
+    write(db, 'enrollments', 3, updated_at=5)
+    assert validators(db, 'student', 100) == student
+    assert validators(db, 'teacher', 10) == teacher
+
+    # A change to teacher 10's course is seen by its teacher and its student
+    write(db, 'courses', 1, updated_at=6)
+    assert validators(db, 'student', 100) != student
+    assert validators(db, 'teacher', 10) != teacher
@@ -0,0 +1,82 @@
+"""Measure password-hash cost settings on this host and suggest a policy.
+
+Times one verification for each scrypt work factor and bcrypt round count and
+picks the most expensive setting whose median stays within the target. Paste
+the printed lines into the environment (or config.py) of the servers that
+will run with them, and existing hashes are upgraded as users log in.
+
+Run from the backend directory on the production hardware:
+
+    python -m tools.calibrate_hashing --target-ms 250
+"""
+import argparse
+import statistics
+import time
+from werkzeug.security import generate_password_hash, check_password_hash
+from password_hashing import _bcrypt_generate, _bcrypt_check
+from config import Config
+
+SCRYPT_LOG_N = range(14, 21)  # N = 16384 .. 1048576, r=8, p=1
+BCRYPT_ROUNDS = range(10, 17)
+SAMPLE_PASSWORD = 'calibration-password'
+
+
+def median_ms(check, pwhash, samples):
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        check(pwhash, SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(label, settings, make_hash, check, target_ms, samples):
+    print(f"\n{label}")
+    print(f"{'setting':<24}{'verify ms':>10}")
+    chosen = None
+    for setting in settings:
+        ms = median_ms(check, make_hash(setting), samples)
+        within = ms <= target_ms
+        print(f"{setting!s:<24}{ms:>10.1f}{'' if within else '   over target'}")
+        if within:
+            chosen = setting
+        else:
+            # Cost grows with every step, so nothing further can fit
+            break
+    if chosen is None:
+        # Never go below the floor; the target is too tight for this host
+        print(f"Nothing met the target, keeping the minimum {settings[0]}")
+        return settings[0]
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target-ms', type=float, default=250.0, help='verify time to aim for (default 250)')
+    parser.add_argument('--samples', type=int, default=5, help='timings per setting (default 5)')
+    args = parser.parse_args()
+
+    print(f"Target verify time: {args.target_ms:.0f} ms, current policy: "
+          f"{Config.PASSWORD_HASH_METHOD}, bcrypt rounds {Config.BCRYPT_LOG_ROUNDS}")
+
+    scrypt_methods = [f'scrypt:{2 ** log_n}:8:1' for log_n in SCRYPT_LOG_N]
+    method = calibrate(
+        'scrypt (app.py auth routes)', scrypt_methods,
+        lambda m: generate_password_hash(SAMPLE_PASSWORD, m), check_password_hash,
+        args.target_ms, args.samples
+    )
+    rounds = calibrate(
+        'bcrypt (blueprint auth routes)', list(BCRYPT_ROUNDS),
+        lambda r: _bcrypt_generate(SAMPLE_PASSWORD, r), _bcrypt_check,
+        args.target_ms, args.samples
+    )
+
+    print("\nSuggested policy:")
+    print(f"PASSWORD_HASH_METHOD={method}")
+    print(f"BCRYPT_LOG_ROUNDS={rounds}")
+    if method != Config.PASSWORD_HASH_METHOD or rounds != Config.BCRYPT_LOG_ROUNDS:
+        print("Stored hashes made with other settings are rehashed on each user's next login.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""Check that every route stays within its declared query budget.
+
+Routes declare budgets with ``@max_queries(n)`` (query_budget.py). This
+command drives them through the Flask test client with QUERY_BUDGET_ENFORCE
+on, so any overrun raises QueryBudgetExceeded with the statements it ran.
+
+    blueprints  routes/ on a throwaway SQLite database, each scenario run at a
+                small and a large data size; a count that grows with the data
+                is reported as an N+1 even when it fits the budget
+    app         backend/app.py against the configured MySQL database
+                (reads only, unless --writes is given; use a scratch database)
+
+Run from the backend directory:
+
+    python -m tools.check_query_budgets                  # blueprints only
+    python -m tools.check_query_budgets --mysql --writes
+"""
+import argparse
+import os
+import sys
+import tempfile
+from config import Config
+from query_budget import QueryBudgetExceeded, view_budget
+
+# (role, method, path, json body); {placeholders} are filled from the fixture
+BLUEPRINT_SCENARIOS = [
+    (None, 'POST', '/api/auth/register', {'username': 'new{courses}', 'email': 'new{courses}@example.com', 'password': 'budget-pass'}),
+    (None, 'POST', '/api/auth/login', {'email': 'student@example.com', 'password': 'budget-pass'}),
+    ('student', 'GET', '/api/student/courses', None),
+    ('student', 'GET', '/api/student/my-enrollments', None),
+    ('student', 'POST', '/api/student/enroll', {'course_id': '{free_course}'}),
+    ('student', 'DELETE', '/api/student/drop/{enrollment_id}', None),
+    ('admin', 'PUT', '/api/admin/courses/{course_id}', {'course_name': 'Renamed'}),
+    ('admin', 'GET', '/api/admin/audit-logs', None),
+    ('admin', 'DELETE', '/api/admin/courses/{course_id}', None),
+]
+
+APP_READ_SCENARIOS = [
+    ('admin', 'GET', '/api/courses?total=true', None),
+    ('admin', 'GET', '/api/courses/{course_id}', None),
+    ('admin', 'GET', '/api/enrollments?total=true', None),
+    ('teacher', 'GET', '/api/enrollments?total=true', None),
+    ('student', 'GET', '/api/enrollments?total=true', None),
+    ('admin', 'GET', '/api/users?total=true', None),
+    ('admin', 'GET', '/api/dashboard/stats', None),
+    ('teacher', 'GET', '/api/dashboard/stats', None),
+    ('student', 'GET', '/api/dashboard/stats', None),
+    ('admin', 'GET', '/api/auth/session', None),
+]
+
+APP_WRITE_SCENARIOS = [
+    ('admin', 'POST', '/api/courses', {'courseCode': 'BUDGET1', 'courseName': 'Budget check', 'credits': 3}),
+    ('admin', 'PUT', '/api/courses/{new_course_id}', {'courseName': 'Budget check (renamed)'}),
+    ('student', 'POST', '/api/enrollments', {'courseId': '{new_course_id}'}),
+    ('admin', 'PUT', '/api/enrollments/{new_enrollment_id}', {'grade': 'A'}),
+    ('student', 'DELETE', '/api/enrollments/{new_enrollment_id}', None),
+    ('admin', 'DELETE', '/api/courses/{new_course_id}', None),
+]
+
+
+def fill(value, fixture):
+    if isinstance(value, str):
+        return value.format(**fixture)
+    if isinstance(value, dict):
+        filled = {k: fill(v, fixture) for k, v in value.items()}
+        return {k: int(v) if isinstance(v, str) and v.isdigit() else v for k, v in filled.items()}
+    return value
+
+
+def count_statements(app):
+    """Keep the statement count of the last request in app.extensions"""
+    from flask import g
+
+    @app.after_request
+    def remember_count(response):
+        stats = g.get('query_stats')
+        app.extensions['last_query_count'] = stats.count if stats else 0
+        return response
+
+
+def run(app, client_for, scenario, fixture, before_request=None):
+    """One request; returns (status, statement count, json body, overrun message or None)"""
+    role, method, path, body = scenario
+    client = client_for(role)
+    if before_request:
+        before_request()
+    app.extensions['last_query_count'] = 0
+    try:
+        response = client.open(fill(path, fixture), method=method, json=fill(body, fixture))
+        response.close()
+        return response.status_code, app.extensions['last_query_count'], response.get_json(silent=True), None
+    except QueryBudgetExceeded as e:
+        return 500, len(e.statements), None, str(e)
+
+
+def budget_for(app, method, path):
+    adapter = app.url_map.bind('localhost')
+    endpoint, _ = adapter.match(path.split('?')[0], method=method)
+    return view_budget(app, endpoint)
+
+
+def blueprint_app(db_path):
+    from flask import Flask
+    from extensions import db
+    from routes import auth_bp, student_bp, admin_bp
+    import query_budget
+
+    app = Flask('campushub_blueprints')
+    app.config.from_object(Config)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_path}',
+        SQLALCHEMY_ENGINE_OPTIONS={},
+        QUERY_BUDGET_ENFORCE=True,
+        TESTING=True,
+    )
+    db.init_app(app)
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(student_bp, url_prefix='/api/student')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    count_statements(app)
+    query_budget.init_app(app)
+    return app
+
+
+def seed_blueprints(app, courses, enrollments):
+    from extensions import db
+    from models import User, Course, Enrollment
+    from password_hashing import _bcrypt_generate
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        password_hash = _bcrypt_generate('budget-pass', 4)
+        db.session.add(User(id=1, username='admin', email='admin@example.com', password_hash=password_hash, role='admin'))
+        db.session.add(User(id=2, username='student', email='student@example.com', password_hash=password_hash, role='student'))
+        for i in range(courses):
+            db.session.add(Course(id=i + 1, course_code=f'B{i:05d}', course_name=f'Course {i}', credits=3, max_students=50))
+        db.session.flush()
+        for i in range(enrollments):
+            db.session.add(Enrollment(id=i + 1, student_id=2, course_id=i + 1))
+        db.session.commit()
+    return {'course_id': 1, 'free_course': courses, 'enrollment_id': enrollments, 'courses': courses}
+
+
+def check_blueprints(sizes):
+    """Returns a list of failure messages"""
+    from password_hashing import password_hasher
+    from routes.student_module import course_list_cache
+    from utils.decorators import get_principal_cache
+
+    # Seeded hashes use 4 rounds, so every login also takes the rehash path
+    password_hasher.workers = 0
+    password_hasher.bcrypt_rounds = 5
+    failures = []
+    counts = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = blueprint_app(os.path.join(tmp, 'budgets.db'))
+        for courses, enrollments in sizes:
+            fixture = seed_blueprints(app, courses, enrollments)
+            clients = {}
+
+            def cold_caches():
+                with app.app_context():
+                    get_principal_cache().invalidate()
+                course_list_cache.bump()
+
+            def client_for(role):
+                if role not in clients:
+                    client = app.test_client()
+                    if role:
+                        with client.session_transaction() as sess:
+                            sess['user_id'] = 1 if role == 'admin' else 2
+                            sess['role'] = role
+                    clients[role] = client
+                return clients[role]
+
+            print(f"\nblueprints, {courses} courses / {enrollments} enrollments")
+            for scenario in BLUEPRINT_SCENARIOS:
+                path = fill(scenario[2], fixture)
+                budget = budget_for(app, scenario[1], path)
+                status, count, _, error = run(app, client_for, scenario, fixture, cold_caches)
+                counts.setdefault(scenario[:3], []).append(count)
+                print(f"  {scenario[1]:<7}{scenario[2]:<40}{status:>5}{count:>4} / {budget}")
+                if error:
+                    failures.append(error)
+                elif status >= 500:
+                    failures.append(f"{scenario[1]} {path} failed with {status}")
+            # Audit rows are written in the background; finish them before the tables are dropped
+            writer = app.extensions.pop('orm_audit_writer', None)
+            if writer is not None:
+                writer.close()
+    for (role, method, path), seen in counts.items():
+        if seen[-1] > seen[0]:
+            failures.append(f"{method} {path} ran {' then '.join(map(str, seen))} statements as the data grew (N+1?)")
+    return failures
+
+
+def check_app(writes):
+    import mysql.connector
+    import app as app_module
+
+    app = app_module.app
+    app.config.update(QUERY_BUDGET_ENFORCE=True, RATELIMIT_ENABLED=False)
+    count_statements(app)
+    conn = mysql.connector.connect(**Config.DB_CONFIG)
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id, username, role FROM users WHERE is_active = TRUE ORDER BY id")
+    users = {}
+    for row in cursor.fetchall():
+        users.setdefault(row['role'], row)
+    cursor.execute("SELECT id FROM courses WHERE is_active = TRUE ORDER BY id LIMIT 1")
+    course = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    fixture = {'course_id': course['id'] if course else 1}
+
+    clients = {}
+
+    def client_for(role):
+        if role not in clients:
+            client = app.test_client()
+            user = users[role]
+            with client.session_transaction() as sess:
+                sess.update(user_id=user['id'], username=user['username'], email='', role=role)
+            clients[role] = client
+        return clients[role]
+
+    def cold_caches():
+        # Budgets are for the worst case: nothing cached
+        app_module.principal_cache.invalidate()
+        app_module.catalog_cache.bump()
+        app_module.admin_stats_cache.bump()
+
+    scenarios = APP_READ_SCENARIOS + (APP_WRITE_SCENARIOS if writes else [])
+    failures = []
+    print("\nbackend/app.py")
+    for scenario in scenarios:
+        if scenario[0] not in users:
+            print(f"  no active {scenario[0]}, skipping {scenario[1]} {scenario[2]}")
+            continue
+        path = fill(scenario[2], fixture)
+        budget = budget_for(app, scenario[1], path)
+        status, count, body, error = run(app, client_for, scenario, fixture, cold_caches)
+        print(f"  {scenario[1]:<7}{scenario[2]:<40}{status:>5}{count:>4} / {budget}")
+        if body and 'courseId' in body and scenario[1] == 'POST' and scenario[2] == '/api/courses':
+            fixture['new_course_id'] = body['courseId']
+        if body and 'enrollmentId' in body:
+            fixture['new_enrollment_id'] = body['enrollmentId']
+        if error:
+            failures.append(error)
+        elif status >= 500:
+            failures.append(f"{scenario[1]} {path} failed with {status}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mysql', action='store_true', help='also check backend/app.py against MySQL')
+    parser.add_argument('--writes', action='store_true', help='include the write scenarios (scratch database only)')
+    parser.add_argument('--skip-blueprints', action='store_true', help='only check backend/app.py')
+    args = parser.parse_args()
+
+    failures = []
+    if not args.skip_blueprints:
+        failures += check_blueprints(sizes=[(5, 3), (200, 150)])
+    if args.mysql:
+        failures += check_app(args.writes)
+
+    if failures:
+        print(f"\n{len(failures)} problem(s):")
+        for failure in failures:
+            print(f"- {failure}")
+        sys.exit(1)
+    print("\nAll routes within budget")
+
+
+if __name__ == '__main__':
+    main()
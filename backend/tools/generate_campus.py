@@ -0,0 +1,344 @@
+"""Generate a synthetic campus and bulk load it into the database.
+
+Scale 1 is a large university: 100k students, 2k teachers, 5k courses, 2M
+enrollments and 10M audit rows. Every count is multiplied by --scale and can
+also be set on its own, so benchmarks can sweep data sizes. Course popularity
+follows a Zipf distribution (--skew), so a few courses fill up and most stay
+small, as in real registration data. Output is deterministic for a --seed.
+
+Rows are appended after the highest existing ids (--replace truncates the four
+tables first). Secondary indexes that no foreign key depends on are dropped
+for the load and rebuilt in one ALTER TABLE per table afterwards, which is
+much faster than maintaining them row by row.
+
+    insert     batched multi-row INSERTs (works everywhere)
+    load-data  CSV files loaded with LOAD DATA LOCAL INFILE (needs local_infile=ON
+               on the server; usually several times faster)
+
+Run from the backend directory against a scratch database:
+
+    python -m tools.generate_campus --scale 0.1
+    python -m tools.generate_campus --replace --method load-data
+    python -m tools.generate_campus --students 5000 --courses 200 --audit-rows 0
+
+Every generated user's password is campus-pass.
+"""
+import argparse
+import bisect
+import csv
+import itertools
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+import mysql.connector
+from mysql.connector import Error
+from werkzeug.security import generate_password_hash
+from config import Config
+
+PASSWORD = 'campus-pass'
+
+# Row counts at scale 1
+BASE_COUNTS = {
+    'admins': 10,
+    'teachers': 2000,
+    'students': 100000,
+    'courses': 5000,
+    'enrollments': 2000000,
+    'audit_rows': 10000000,
+}
+
+TABLES = ('users', 'courses', 'enrollments', 'audit_log')
+
+COLUMNS = {
+    'users': ('id', 'username', 'email', 'password_hash', 'role', 'created_at', 'is_active'),
+    'courses': ('id', 'course_code', 'course_name', 'description', 'credits', 'teacher_id',
+                'semester', 'max_students', 'created_at', 'is_active'),
+    'enrollments': ('id', 'student_id', 'course_id', 'enrollment_date', 'status', 'grade', 'is_deleted'),
+    'audit_log': ('id', 'user_id', 'action', 'table_name', 'record_id', 'new_value', 'ip_address', 'created_at'),
+}
+
+DEPARTMENTS = ['CS', 'MATH', 'PHY', 'CHEM', 'BIO', 'ENG', 'HIST', 'ECON', 'PSY', 'ART', 'MUS', 'PHIL']
+TOPICS = ['Foundations of', 'Topics in', 'Advanced', 'Introduction to', 'Seminar in', 'Applied', 'Methods in']
+SEMESTERS = ['Fall 2023', 'Spring 2024', 'Fall 2024', 'Spring 2025']
+STATUSES = (['enrolled', 'completed', 'dropped', 'pending'], [70, 20, 7, 3])
+GRADES = ['A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'D', 'F']
+AUDIT_ACTIONS = (
+    [('LOGIN', 'users'), ('LOGOUT', 'users'), ('CREATE', 'enrollments'), ('DELETE', 'enrollments'),
+     ('UPDATE', 'enrollments'), ('UPDATE', 'courses'), ('CREATE', 'courses'), ('UPDATE', 'users')],
+    [40, 25, 15, 4, 10, 3, 1, 2]
+)
+
+
+def scaled_counts(scale, overrides):
+    counts = {name: max(1, int(base * scale)) for name, base in BASE_COUNTS.items()}
+    counts['audit_rows'] = int(BASE_COUNTS['audit_rows'] * scale)
+    counts.update({name: value for name, value in overrides.items() if value is not None})
+    return counts
+
+
+class Campus:
+    """Streams the rows of every table; ids continue after ``start_ids``"""
+
+    def __init__(self, counts, start_ids, seed=42, skew=1.1, days=365):
+        self.counts = counts
+        self.start = start_ids
+        self.rng = random.Random(seed)
+        self.skew = skew
+        self.now = datetime.now().replace(microsecond=0)
+        self.span = timedelta(days=days).total_seconds()
+        self.password_hash = generate_password_hash(PASSWORD, method=Config.PASSWORD_HASH_METHOD)
+
+        first_user = start_ids['users'] + 1
+        self.admin_ids = range(first_user, first_user + counts['admins'])
+        self.teacher_ids = range(self.admin_ids.stop, self.admin_ids.stop + counts['teachers'])
+        self.student_ids = range(self.teacher_ids.stop, self.teacher_ids.stop + counts['students'])
+        self.course_ids = range(start_ids['courses'] + 1, start_ids['courses'] + 1 + counts['courses'])
+
+        # Zipf weights over a shuffled ranking, so popular courses are spread over the id range
+        ranked = list(self.course_ids)
+        self.rng.shuffle(ranked)
+        self.ranked_courses = ranked
+        weights = [1 / (rank ** skew) for rank in range(1, len(ranked) + 1)]
+        self.cumulative = list(itertools.accumulate(weights))
+        self.live_counts = {}  # course_id -> non-deleted enrollments, for the seat counters
+
+    def timestamp(self):
+        return (self.now - timedelta(seconds=self.rng.random() * self.span)).strftime('%Y-%m-%d %H:%M:%S')
+
+    def users(self):
+        for role, ids in (('admin', self.admin_ids), ('teacher', self.teacher_ids), ('student', self.student_ids)):
+            for user_id in ids:
+                active = role != 'student' or self.rng.random() > 0.02
+                yield (user_id, f'{role}_{user_id}', f'{role}_{user_id}@campus.example.com',
+                       self.password_hash, role, self.timestamp(), active)
+
+    def courses(self):
+        for course_id in self.course_ids:
+            dept = DEPARTMENTS[course_id % len(DEPARTMENTS)]
+            level = self.rng.choice([100, 200, 300, 400])
+            name = f'{self.rng.choice(TOPICS)} {dept} {level}'
+            teacher = self.rng.choice(self.teacher_ids) if self.teacher_ids else None
+            yield (course_id, f'{dept}{course_id}', name, f'{name}, section {course_id}', self.rng.choice([2, 3, 4]),
+                   teacher, self.rng.choice(SEMESTERS), 50, self.timestamp(), self.rng.random() > 0.05)
+
+    def popular_course(self):
+        pick = self.rng.random() * self.cumulative[-1]
+        return self.ranked_courses[bisect.bisect_left(self.cumulative, pick)]
+
+    def enrollments(self):
+        """Per-student course counts vary around the mean; no pair repeats"""
+        students = len(self.student_ids)
+        courses = len(self.course_ids)
+        if not students or not courses:
+            return
+        mean = self.counts['enrollments'] / students
+        enrollment_id = self.start['enrollments']
+        remaining = self.counts['enrollments']
+        for index, student_id in enumerate(self.student_ids):
+            if remaining <= 0:
+                break
+            if index == students - 1:
+                wanted = remaining
+            else:
+                wanted = max(0, round(self.rng.gauss(mean, mean / 3)))
+            wanted = min(wanted, remaining, courses)
+            if wanted > courses // 2:
+                picked = self.rng.sample(self.course_ids, wanted)
+            else:
+                picked = set()
+                while len(picked) < wanted:
+                    picked.add(self.popular_course())
+            remaining -= wanted
+            for course_id in picked:
+                enrollment_id += 1
+                status = self.rng.choices(*STATUSES)[0]
+                deleted = status == 'dropped' and self.rng.random() < 0.5
+                if not deleted:
+                    self.live_counts[course_id] = self.live_counts.get(course_id, 0) + 1
+                grade = self.rng.choice(GRADES) if status == 'completed' else None
+                yield (enrollment_id, student_id, course_id, self.timestamp(), status, grade, deleted)
+
+    def audit_rows(self):
+        all_users = len(self.admin_ids) + len(self.teacher_ids) + len(self.student_ids)
+        first_user = self.admin_ids.start
+        for audit_id in range(self.start['audit_log'] + 1, self.start['audit_log'] + 1 + self.counts['audit_rows']):
+            action, table = self.rng.choices(*AUDIT_ACTIONS)[0]
+            user_id = first_user + self.rng.randrange(all_users) if all_users else None
+            record_id = user_id if table == 'users' else self.rng.randint(1, 1 << 20)
+            ip = f'10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.{self.rng.randrange(1, 255)}'
+            yield (audit_id, user_id, action, table, record_id, None, ip, self.timestamp())
+
+    def rows(self, table):
+        return {'users': self.users, 'courses': self.courses,
+                'enrollments': self.enrollments, 'audit_log': self.audit_rows}[table]()
+
+
+def insert_rows(conn, cursor, table, rows, batch_size):
+    """Multi-row INSERTs, one commit per batch"""
+    columns = COLUMNS[table]
+    statement = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                 f"VALUES ({', '.join(['%s'] * len(columns))})")
+    count = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return count
+        # executemany rewrites this into a single multi-row INSERT
+        cursor.executemany(statement, batch)
+        conn.commit()
+        count += len(batch)
+
+
+def load_data_rows(conn, cursor, table, rows, directory):
+    """Write a CSV file and load it with LOAD DATA LOCAL INFILE"""
+    path = os.path.join(directory, f'{table}.csv')
+    count = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        for row in rows:
+            writer.writerow(['\\N' if v is None else int(v) if isinstance(v, bool) else v for v in row])
+            count += 1
+    cursor.execute(
+        f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+        f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\n' "
+        f"({', '.join(COLUMNS[table])})",
+        (path,)
+    )
+    conn.commit()
+    os.remove(path)
+    return count
+
+
+def secondary_indexes(cursor, table):
+    """{name: column list} of the non-unique indexes no foreign key needs"""
+    cursor.execute(f"SHOW INDEX FROM {table}")
+    indexes = {}
+    unique = set()
+    for row in cursor.fetchall():
+        column = row['Column_name'] + (f"({row['Sub_part']})" if row['Sub_part'] else '')
+        indexes.setdefault(row['Key_name'], []).append((row['Seq_in_index'], column))
+        if not row['Non_unique']:
+            unique.add(row['Key_name'])
+    indexes = {name: [c for _, c in sorted(cols)] for name, cols in indexes.items()}
+
+    cursor.execute(
+        "SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL",
+        (table,)
+    )
+    # MySQL refuses to drop the last index a foreign key can use, so keep the shortest one per column
+    keep = set()
+    for row in cursor.fetchall():
+        column = row['COLUMN_NAME']
+        candidates = [name for name, cols in indexes.items() if cols[0] == column]
+        if candidates and not any(name in unique for name in candidates):
+            keep.add(min(candidates, key=lambda name: len(indexes[name])))
+    return {name: cols for name, cols in indexes.items() if name not in unique and name not in keep}
+
+
+def drop_indexes(cursor, table, indexes):
+    if indexes:
+        cursor.execute(f"ALTER TABLE {table} " + ', '.join(f"DROP INDEX {name}" for name in indexes))
+
+
+def rebuild_indexes(cursor, table, indexes):
+    if indexes:
+        cursor.execute(f"ALTER TABLE {table} " + ', '.join(
+            f"ADD INDEX {name} ({', '.join(cols)})" for name, cols in indexes.items()
+        ))
+
+
+def next_ids(cursor):
+    start = {}
+    for table in TABLES:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) AS max_id FROM {table}")
+        start[table] = cursor.fetchone()['max_id']
+    return start
+
+
+def generate_campus(counts, method='insert', batch_size=5000, seed=42, skew=1.1,
+                    replace=False, keep_indexes=False):
+    """Load a synthetic campus; returns {table: rows loaded}"""
+    conn = mysql.connector.connect(**Config.DB_CONFIG, allow_local_infile=(method == 'load-data'))
+    cursor = conn.cursor(dictionary=True)
+    dropped = {}
+    loaded = {}
+    try:
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        cursor.execute("SET SESSION unique_checks = 0")
+        if replace:
+            for table in TABLES:
+                cursor.execute(f"TRUNCATE TABLE {table}")
+        campus = Campus(counts, next_ids(cursor), seed=seed, skew=skew)
+
+        if not keep_indexes:
+            for table in TABLES:
+                dropped[table] = secondary_indexes(cursor, table)
+                drop_indexes(cursor, table, dropped[table])
+
+        with tempfile.TemporaryDirectory() as directory:
+            for table in TABLES:
+                started = time.perf_counter()
+                rows = campus.rows(table)
+                if method == 'load-data':
+                    loaded[table] = load_data_rows(conn, cursor, table, rows, directory)
+                else:
+                    loaded[table] = insert_rows(conn, cursor, table, rows, batch_size)
+                elapsed = time.perf_counter() - started
+                print(f"  {table:<12}{loaded[table]:>11,} rows in {elapsed:7.1f}s "
+                      f"({loaded[table] / elapsed if elapsed else 0:,.0f} rows/s)")
+
+        # Seat counters match the live enrollments; popular courses get enough seats for them
+        cursor.executemany(
+            "UPDATE courses SET enrolled_count = %s, max_students = GREATEST(max_students, %s) WHERE id = %s",
+            [(n, n, course_id) for course_id, n in campus.live_counts.items()]
+        )
+        conn.commit()
+    finally:
+        for table, indexes in dropped.items():
+            started = time.perf_counter()
+            try:
+                rebuild_indexes(cursor, table, indexes)
+                print(f"  rebuilt {len(indexes)} index(es) on {table} in {time.perf_counter() - started:.1f}s")
+            except Error as e:
+                print(f"Could not rebuild the indexes on {table}: {e}")
+                rebuild_sql = ', '.join(f"ADD INDEX {name} ({', '.join(cols)})" for name, cols in indexes.items())
+                print(f"  run: ALTER TABLE {table} {rebuild_sql};")
+        for table in TABLES:
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+        cursor.close()
+        conn.close()
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for every row count (default 1)')
+    for name in BASE_COUNTS:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, help=f'override the scaled {name} count')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for course popularity (default 1.1)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--method', choices=['insert', 'load-data'], default='insert')
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows per INSERT (default 5000)')
+    parser.add_argument('--replace', action='store_true', help='truncate users, courses, enrollments and audit_log first')
+    parser.add_argument('--keep-indexes', action='store_true', help='load with every index in place')
+    args = parser.parse_args()
+
+    counts = scaled_counts(args.scale, {name: getattr(args, name) for name in BASE_COUNTS})
+    print("Generating " + ', '.join(f"{value:,} {name.replace('_', ' ')}" for name, value in counts.items()))
+    started = time.perf_counter()
+    try:
+        loaded = generate_campus(counts, method=args.method, batch_size=args.batch_size, seed=args.seed,
+                                 skew=args.skew, replace=args.replace, keep_indexes=args.keep_indexes)
+    except Error as e:
+        print(f"Error: {e}")
+        return
+    print(f"Loaded {sum(loaded.values()):,} rows in {time.perf_counter() - started:.1f}s; "
+          f"every user's password is {PASSWORD}")
+
+
+if __name__ == '__main__':
+    main()
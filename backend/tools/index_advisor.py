@@ -0,0 +1,240 @@
+"""EXPLAIN every statement the API runs and suggest indexes for the bad plans.
+
+Drives the read endpoints of app.py through the test client as an admin, a
+teacher and a student, capturing each distinct statement (with the parameters
+of its first run) through a statement hook on the connection pool. Every
+captured SELECT, UPDATE and DELETE is then EXPLAINed on a separate connection;
+plans with full table scans, full index scans, filesorts or temporary tables
+are reported with a suggested composite index built from the statement's
+equality predicates, join columns and ORDER BY.
+
+Run from the backend directory against a large dataset (the seed data is too
+small for the optimizer to bother with indexes):
+
+    python -m tools.index_advisor
+    python -m tools.index_advisor --min-rows 0 --sql
+"""
+import argparse
+import re
+import mysql.connector
+from mysql.connector import Error
+from config import Config
+
+# Read paths exercised per role; writes are left out so the data is not touched
+ROLE_REQUESTS = {
+    'admin': [
+        '/api/courses', '/api/courses?total=true', '/api/courses?semester={semester}',
+        '/api/courses?search=CS', '/api/courses/{course_id}',
+        '/api/enrollments', '/api/enrollments?total=true', '/api/enrollments?stream=true',
+        '/api/users', '/api/users?total=true', '/api/users?role=student', '/api/users?search=a',
+        '/api/dashboard/stats',
+    ],
+    'teacher': ['/api/enrollments', '/api/enrollments?total=true', '/api/dashboard/stats'],
+    'student': ['/api/enrollments', '/api/enrollments?total=true', '/api/dashboard/stats'],
+}
+
+ALIAS_PATTERN = re.compile(
+    r'\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|SET\b|WHERE\b|LEFT\b|RIGHT\b|INNER\b|JOIN\b|ORDER\b|GROUP\b|LIMIT\b)(\w+))?',
+    re.IGNORECASE
+)
+CONSTANT_PATTERN = re.compile(r"(?:(\w+)\.)?(\w+)\s*=\s*(?:%s|TRUE|FALSE|-?\d+|'[^']*')", re.IGNORECASE)
+JOIN_PATTERN = re.compile(r'(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)')
+ORDER_PATTERN = re.compile(r'\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|$)', re.IGNORECASE | re.DOTALL)
+
+
+def normalize(statement):
+    return ' '.join(statement.split())
+
+
+def capture_statements():
+    """Run the read endpoints and return {statement: params} for everything executed"""
+    import app as app_module
+
+    captured = {}
+
+    def hook(statement, params, elapsed):
+        captured.setdefault(normalize(statement), params)
+
+    app = app_module.app
+    app.config['RATELIMIT_ENABLED'] = False
+    conn = mysql.connector.connect(**Config.DB_CONFIG)
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id, username, role FROM users WHERE is_active = TRUE AND role IN ('admin', 'teacher', 'student') ORDER BY id")
+    principals = {}
+    for row in cursor.fetchall():
+        principals.setdefault(row['role'], row)
+    cursor.execute("SELECT id, semester FROM courses WHERE semester IS NOT NULL ORDER BY id LIMIT 1")
+    course = cursor.fetchone() or {'id': 1, 'semester': 'Fall 2024'}
+    cursor.close()
+    conn.close()
+
+    app_module.db_pool.add_statement_hook(hook)
+    try:
+        for role, paths in ROLE_REQUESTS.items():
+            user = principals.get(role)
+            if user is None:
+                print(f"No active {role} in the database, skipping its requests")
+                continue
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = user['id']
+                sess['username'] = user['username']
+                sess['role'] = role
+            for path in paths:
+                response = client.get(path.format(course_id=course['id'], semester=course['semester']))
+                response.close()
+    finally:
+        app_module.db_pool.remove_statement_hook(hook)
+    return captured
+
+
+def table_aliases(statement):
+    aliases = {}
+    for table, alias in ALIAS_PATTERN.findall(statement):
+        aliases[alias or table] = table
+    return aliases
+
+
+def predicate_text(statement):
+    """The part of a statement that can hold predicates (not an UPDATE's SET list)"""
+    keyword = 'FROM' if statement.split(' ', 1)[0].upper() == 'SELECT' else 'WHERE'
+    match = re.search(rf'\b{keyword}\b', statement, re.IGNORECASE)
+    return statement[match.end():] if match else ''
+
+
+def suggest_index(statement, alias, table, columns, other_columns):
+    """Columns for one table: its constant predicates (or, when it has none, the
+    columns it is joined on), then its ORDER BY columns"""
+    def belongs(prefix, column):
+        if column not in columns:
+            return False
+        # Unqualified names count when no other table in the statement has them
+        return prefix == alias or (not prefix and column not in other_columns)
+
+    picked = []
+    for prefix, column in CONSTANT_PATTERN.findall(predicate_text(statement)):
+        if belongs(prefix, column) and column not in picked:
+            picked.append(column)
+    if not picked:
+        for left_alias, left_col, right_alias, right_col in JOIN_PATTERN.findall(statement):
+            for prefix, column in ((left_alias, left_col), (right_alias, right_col)):
+                if prefix == alias and column in columns and column not in picked:
+                    picked.append(column)
+    order = ORDER_PATTERN.search(statement)
+    if order:
+        for term in order.group(1).split(','):
+            name = term.strip().split()[0] if term.strip() else ''
+            prefix, _, column = name.rpartition('.')
+            if belongs(prefix, column) and column not in picked:
+                picked.append(column)
+    # InnoDB appends the primary key to every secondary index already
+    while picked and picked[-1] == 'id':
+        picked.pop()
+    return picked
+
+
+def problems(plan_row, min_rows):
+    found = []
+    extra = plan_row.get('Extra') or ''
+    rows = plan_row.get('rows') or 0
+    if plan_row.get('type') == 'ALL' and rows >= min_rows:
+        found.append(f"full table scan (~{rows} rows)")
+    if plan_row.get('type') == 'index' and rows >= min_rows:
+        found.append(f"full index scan (~{rows} rows)")
+    if 'Using filesort' in extra:
+        found.append('filesort')
+    if 'Using temporary' in extra:
+        found.append('temporary table')
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--min-rows', type=int, default=1000,
+                        help='ignore scans the optimizer estimates below this many rows (default 1000)')
+    parser.add_argument('--sql', action='store_true', help='print the suggestions as ALTER TABLE statements')
+    args = parser.parse_args()
+
+    statements = capture_statements()
+    print(f"Captured {len(statements)} distinct statements")
+
+    try:
+        conn = mysql.connector.connect(**Config.DB_CONFIG)
+    except Error as e:
+        print(f"Error: {e}")
+        return
+    cursor = conn.cursor(dictionary=True)
+
+    columns_cache = {}
+    indexes_cache = {}
+
+    def table_columns(table):
+        if table not in columns_cache:
+            cursor.execute(f"SHOW COLUMNS FROM {table}")
+            columns_cache[table] = {row['Field'] for row in cursor.fetchall()}
+        return columns_cache[table]
+
+    def table_indexes(table):
+        if table not in indexes_cache:
+            cursor.execute(f"SHOW INDEX FROM {table}")
+            indexes = {}
+            for row in cursor.fetchall():
+                indexes.setdefault(row['Key_name'], []).append(row['Column_name'])
+            indexes_cache[table] = list(indexes.values())
+        return indexes_cache[table]
+
+    suggestions = {}
+    flagged = 0
+    for statement, params in sorted(statements.items()):
+        if statement.split(' ', 1)[0].upper() not in ('SELECT', 'UPDATE', 'DELETE'):
+            continue
+        try:
+            cursor.execute("EXPLAIN " + statement, params or ())
+            plan = cursor.fetchall()
+        except Error as e:
+            print(f"\nCould not EXPLAIN: {statement[:100]}\n  {e}")
+            continue
+
+        aliases = table_aliases(statement)
+        findings = []
+        for row in plan:
+            issues = problems(row, args.min_rows)
+            if not issues:
+                continue
+            alias = row.get('table') or ''
+            table = aliases.get(alias)
+            line = f"  {alias or '?'}: {', '.join(issues)} (type={row.get('type')}, key={row.get('key')})"
+            if table:
+                other_columns = set()
+                for other_alias, other_table in aliases.items():
+                    if other_alias != alias and other_table != table:
+                        other_columns |= table_columns(other_table)
+                columns = suggest_index(statement, alias, table, table_columns(table), other_columns)
+                covered = any(index[:len(columns)] == columns for index in table_indexes(table))
+                if columns and not covered:
+                    suggestions.setdefault((table, tuple(columns)), 0)
+                    suggestions[(table, tuple(columns))] += 1
+                    line += f"\n    suggest {table} ({', '.join(columns)})"
+                elif columns:
+                    line += f"\n    an index on {table} ({', '.join(columns)}) exists; check statistics (ANALYZE TABLE)"
+            findings.append(line)
+
+        if findings:
+            flagged += 1
+            print(f"\n{statement[:160]}{'...' if len(statement) > 160 else ''}")
+            print('\n'.join(findings))
+
+    cursor.close()
+    conn.close()
+
+    print(f"\n{flagged} statement(s) with problem plans, {len(suggestions)} suggested index(es)")
+    for (table, columns), count in sorted(suggestions.items()):
+        name = 'idx_' + '_'.join(columns)
+        if args.sql:
+            print(f"ALTER TABLE {table} ADD INDEX {name} ({', '.join(columns)});")
+        else:
+            print(f"  {table} ({', '.join(columns)})  used by {count} statement(s)")
+
+
+if __name__ == '__main__':
+    main()
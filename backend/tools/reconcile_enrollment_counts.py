@@ -0,0 +1,76 @@
+"""Recompute courses.enrolled_count from the enrollments table and report drift.
+
+Run from the backend directory:
+
+    python -m tools.reconcile_enrollment_counts          # report only
+    python -m tools.reconcile_enrollment_counts --fix    # report and repair
+"""
+import argparse
+import sys
+import mysql.connector
+from mysql.connector import Error
+from config import Config
+
+DRIFT_QUERY = """
+    SELECT c.id, c.course_code, c.enrolled_count, COUNT(e.id) AS actual_count
+    FROM courses c
+    LEFT JOIN enrollments e ON e.course_id = c.id AND e.is_deleted = FALSE
+    GROUP BY c.id, c.course_code, c.enrolled_count
+    HAVING c.enrolled_count <> actual_count
+    ORDER BY c.id
+"""
+
+# Recounted inside the UPDATE so concurrent enrollments cannot slip in between
+FIX_QUERY = """
+    UPDATE courses c
+    SET c.enrolled_count = (
+        SELECT COUNT(*) FROM enrollments e WHERE e.course_id = c.id AND e.is_deleted = FALSE
+    ), c.version = c.version + 1
+    WHERE c.id = %s
+"""
+
+
+def reconcile(fix=False):
+    conn = None
+    cursor = None
+    try:
+        conn = mysql.connector.connect(**Config.DB_CONFIG)
+        cursor = conn.cursor(dictionary=True)
+
+        cursor.execute(DRIFT_QUERY)
+        drifted = cursor.fetchall()
+
+        if not drifted:
+            print("All course seat counters are in sync.")
+            return 0
+
+        print(f"{len(drifted)} course(s) with drifted seat counters:")
+        for row in drifted:
+            delta = row['enrolled_count'] - row['actual_count']
+            print(f"  {row['course_code']} (id {row['id']}): stored {row['enrolled_count']}, "
+                  f"actual {row['actual_count']} ({delta:+d})")
+
+        if fix:
+            for row in drifted:
+                cursor.execute(FIX_QUERY, (row['id'],))
+                conn.commit()
+            print("Seat counters repaired.")
+        return len(drifted)
+
+    except Error as e:
+        print(f"Error: {e}")
+        return -1
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile courses.enrolled_count with the enrollments table")
+    parser.add_argument('--fix', action='store_true', help="rewrite drifted counters")
+    args = parser.parse_args()
+    drift = reconcile(fix=args.fix)
+    # Non-zero exit when drift was found (and not fixed) or the database was unreachable
+    sys.exit(1 if drift < 0 or (drift and not args.fix) else 0)
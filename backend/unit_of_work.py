@@ -0,0 +1,113 @@
+import time
+import logging
+from flask import g, current_app, jsonify, after_this_request
+from mysql.connector import Error
+import query_stats
+
+logger = logging.getLogger(__name__)
+
+
+class RequestConnection:
+    """Handler-facing view of the request's connection.
+
+    close() only drops the handler's reference; the unit of work commits before
+    the response is sent and returns the connection to the pool at teardown.
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        pass
+
+
+class UnitOfWork:
+    """One pooled connection and one transaction per request"""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._conn = None
+        self._after_commit = []
+
+    def connection(self):
+        if self._conn is None:
+            self._conn = self._pool.connect()
+        return RequestConnection(self._conn)
+
+    def after_commit(self, callback):
+        """Run callback once the request's transaction has committed"""
+        self._after_commit.append(callback)
+
+    def rollback(self):
+        if self._conn is not None:
+            self._conn.rollback()
+
+    def commit(self):
+        """Commit the transaction, then run the after-commit callbacks.
+
+        A failed commit raises and runs none of them.
+        """
+        if self._conn is not None:
+            start = time.perf_counter()
+            try:
+                self._conn.commit()
+            finally:
+                query_stats.record_commit(time.perf_counter() - start)
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"After-commit callback failed: {e}")
+
+    def release(self):
+        """Roll back anything left uncommitted and return the connection to the pool"""
+        if self._conn is not None:
+            try:
+                self._conn.rollback()
+            except Error as e:
+                logger.error(f"Unit of work failed to roll back: {e}")
+            finally:
+                self._conn.close()
+                self._conn = None
+
+
+def get_unit_of_work():
+    if 'unit_of_work' not in g:
+        g.unit_of_work = UnitOfWork(current_app.extensions['db_pool'])
+    return g.unit_of_work
+
+
+def init_app(app, pool):
+    app.extensions['db_pool'] = pool
+
+    def commit_unit_of_work(response):
+        # Commit before the response goes out, so a client is never told a
+        # write succeeded when it was rolled back. Handlers turn their own
+        # exceptions into error responses, which are rolled back at teardown.
+        uow = g.get('unit_of_work')
+        if uow is None or response.status_code >= 400:
+            return response
+        try:
+            uow.commit()
+        except Error as e:
+            logger.error(f"Unit of work failed to commit: {e}")
+            response = jsonify({'error': 'Failed to save changes', 'code': 500})
+            response.status_code = 500
+        return response
+
+    @app.before_request
+    def commit_before_after_request_hooks():
+        # after_this_request callbacks run ahead of every after_request hook,
+        # so metrics, Server-Timing and query budgets see the commit (and the
+        # 500 that replaces a failed one) however the hooks were registered
+        after_this_request(commit_unit_of_work)
+
+    @app.teardown_request
+    def release_unit_of_work(exc):
+        uow = g.pop('unit_of_work', None)
+        if uow is not None:
+            uow.release()
@@ -1,10 +1,46 @@
+import threading
+from datetime import datetime
 from functools import wraps
-from flask import session, jsonify, request
+from flask import session, jsonify, request, current_app
+from audit_writer import AuditWriter
+from principal_cache import PrincipalCache
+
+_principal_cache_lock = threading.Lock()
+
+def _load_principal(user_id):
+    from extensions import db
+    from models import User
+
+    row = db.session.query(User.role, User.is_active).filter(User.id == user_id).first()
+    return (row.role, bool(row.is_active)) if row else None
+
+def get_principal_cache():
+    """Per-app cache of (role, is_active); shared with app.py when both run in one app"""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('principal_cache')
+    if cache is not None:
+        return cache
+    with _principal_cache_lock:
+        cache = app.extensions.get('principal_cache')
+        if cache is None:
+            cache = PrincipalCache(
+                _load_principal,
+                maxsize=app.config['PRINCIPAL_CACHE_SIZE'],
+                ttl=app.config['PRINCIPAL_CACHE_TTL']
+            )
+            app.extensions['principal_cache'] = cache
+    return cache
+
+def current_principal():
+    if 'user_id' not in session:
+        return None
+    return get_principal_cache().get(session['user_id'])
 
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        principal = current_principal()
+        if not principal or not principal[1]:
             return jsonify({'error': 'Authentication required'}), 401
         return f(*args, **kwargs)
     return decorated_function
@@ -13,11 +49,12 @@ def role_required(required_role):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if 'user_id' not in session:
+            principal = current_principal()
+            if not principal or not principal[1]:
                 return jsonify({'error': 'Authentication required'}), 401
             
             # Allow admins to access everything, or strict role check
-            user_role = session.get('role')
+            user_role = principal[0]
             if user_role != required_role and user_role != 'admin':
                 return jsonify({'error': 'Access denied: Insufficient permissions'}), 403
             
@@ -25,21 +62,43 @@ def role_required(required_role):
         return decorated_function
     return decorator
 
-def log_audit(action, table_name, record_id=None, description=None):
-    """Helper to write to AuditLog table"""
+_audit_writer_lock = threading.Lock()
+
+def _write_audit_rows(app, rows):
     from extensions import db
     from models import AuditLog
-    
-    try:
-        log = AuditLog(
-            user_id=session.get('user_id'),
-            action_type=action,
-            table_name=table_name,
-            record_id=record_id,
-            description=description,
-            ip_address=request.remote_addr
-        )
-        db.session.add(log)
-        db.session.commit()
-    except Exception as e:
-        print(f"Audit Log Failed: {e}")
\ No newline at end of file
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(AuditLog.__table__.insert(), rows)
+
+def get_audit_writer():
+    """Per-app batched writer for AuditLog rows"""
+    app = current_app._get_current_object()
+    writer = app.extensions.get('orm_audit_writer')
+    if writer is not None:
+        return writer
+    with _audit_writer_lock:
+        writer = app.extensions.get('orm_audit_writer')
+        if writer is None:
+            writer = AuditWriter(
+                lambda rows: _write_audit_rows(app, rows),
+                batch_size=app.config['AUDIT_BATCH_SIZE'],
+                flush_interval=app.config['AUDIT_FLUSH_INTERVAL_MS'] / 1000,
+                max_queue=app.config['AUDIT_QUEUE_SIZE'],
+                enqueue_timeout=app.config['AUDIT_ENQUEUE_TIMEOUT_MS'] / 1000
+            )
+            app.extensions['orm_audit_writer'] = writer
+    return writer
+
+def log_audit(action, table_name, record_id=None, description=None):
+    """Helper to queue a row for the AuditLog table"""
+    get_audit_writer().enqueue({
+        'user_id': session.get('user_id'),
+        'action_type': action,
+        'table_name': table_name,
+        'record_id': record_id,
+        'description': description,
+        'ip_address': request.remote_addr,
+        'timestamp': datetime.utcnow()
+    })
@@ -0,0 +1,29 @@
+# Conditional GET validators, one aggregate round trip per response scope.
+# Every API write bumps the version of the rows it changes, rows it already
+# holds locked, so COUNT plus SUM(version) over a response's rows moves with
+# every commit that touches them, in whatever order the commits land.
+# MAX(updated_at) alone misses a write stamped before another transaction's
+# but committed after it; it stays for rows changed outside the API.
+ENROLLMENT_ROWS = """
+    SELECT COUNT(*) as enrollments, COALESCE(SUM(e.version), 0) as enrollment_versions,
+           MAX(e.updated_at) as enrollments_at,
+           COALESCE(SUM(c.version), 0) as course_versions, MAX(c.updated_at) as courses_at
+    FROM enrollments e
+    JOIN courses c ON e.course_id = c.id
+"""
+
+VALIDATOR_QUERIES = {
+    'catalog': """
+        SELECT COUNT(*) as courses, COALESCE(SUM(version), 0) as versions, MAX(updated_at) as courses_at
+        FROM courses
+    """,
+    # A student's or teacher's rows, and the courses they join
+    'student': ENROLLMENT_ROWS + " WHERE e.student_id = %s",
+    'teacher': ENROLLMENT_ROWS + " WHERE c.teacher_id = %s",
+    'admin': ENROLLMENT_ROWS,
+}
+
+
+def fetch_validators(cursor, scope, params=()):
+    cursor.execute(VALIDATOR_QUERIES[scope], params)
+    return tuple(cursor.fetchone().values())
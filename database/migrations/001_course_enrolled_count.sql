@@ -0,0 +1,8 @@
+-- Denormalized seat counter on courses (replaces the per-row COUNT(*) subquery)
+USE campushub;
+
+ALTER TABLE courses ADD COLUMN enrolled_count INT NOT NULL DEFAULT 0 AFTER max_students;
+
+UPDATE courses c SET enrolled_count = (
+    SELECT COUNT(*) FROM enrollments e WHERE e.course_id = c.id AND e.is_deleted = FALSE
+);
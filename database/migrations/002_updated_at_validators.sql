@@ -0,0 +1,14 @@
+-- Microsecond updated_at plus indexes so MAX(updated_at) is a cheap ETag validator
+USE campushub;
+
+ALTER TABLE users
+    MODIFY updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_updated (updated_at);
+
+ALTER TABLE courses
+    MODIFY updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_updated (updated_at);
+
+ALTER TABLE enrollments
+    MODIFY updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_updated (updated_at);
@@ -0,0 +1,20 @@
+-- Composite indexes for the filter + sort combinations the API runs
+-- (found with python -m tools.index_advisor against a generated campus)
+USE campushub;
+
+ALTER TABLE enrollments
+    ADD INDEX idx_student_live (student_id, is_deleted, enrollment_date), -- A student's enrollments, newest first
+    ADD INDEX idx_course_live (course_id, is_deleted),                    -- A teacher's enrollments via their courses
+    ADD INDEX idx_live_date (is_deleted, enrollment_date),                -- Admin list and export, newest first
+    ADD INDEX idx_student_updated (student_id, updated_at),               -- A student's ETag validator, MAX(updated_at)
+    DROP INDEX idx_student,                                               -- Left prefix of idx_student_live
+    DROP INDEX idx_course;                                                -- Left prefix of idx_course_live
+
+ALTER TABLE courses
+    ADD INDEX idx_active_code (is_active, course_code),                   -- Catalog pages
+    ADD INDEX idx_active_semester_code (is_active, semester, course_code),-- Catalog filtered by semester
+    ADD INDEX idx_teacher_active (teacher_id, is_active);                 -- Teacher dashboard
+
+ALTER TABLE users
+    ADD INDEX idx_created (created_at),                                   -- Admin user list, newest first
+    ADD INDEX idx_role_created (role, created_at);                        -- User list filtered by role
@@ -0,0 +1,13 @@
+-- Row versions for ETag validators: MAX(updated_at) does not follow commit
+-- order, so every API write also bumps the version of the rows it changes,
+-- which it already holds locked, and validators sum them per response scope
+USE campushub;
+
+ALTER TABLE courses
+    ADD COLUMN version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    ADD INDEX idx_versions (version, updated_at);                         -- Catalog validator
+
+ALTER TABLE enrollments
+    ADD COLUMN version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    ADD INDEX idx_student_versions (student_id, updated_at, version),     -- A student's validator
+    DROP INDEX idx_student_updated;                                       -- Left prefix of idx_student_versions
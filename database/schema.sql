@@ -13,10 +13,13 @@ CREATE TABLE users (
     security_question VARCHAR(255),
     security_answer_hash VARCHAR(255),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Conditional GET validator
     is_active BOOLEAN DEFAULT TRUE,
     INDEX idx_email (email),
-    INDEX idx_username (username)
+    INDEX idx_username (username),
+    INDEX idx_updated (updated_at),
+    INDEX idx_created (created_at),
+    INDEX idx_role_created (role, created_at)
 );
 
 -- Courses Table
@@ -29,11 +32,18 @@ CREATE TABLE courses (
     teacher_id INT,
     semester VARCHAR(20),
     max_students INT DEFAULT 50,
+    enrolled_count INT NOT NULL DEFAULT 0, -- Live (non-deleted) enrollments, kept in sync by the API
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Conditional GET validator
     is_active BOOLEAN DEFAULT TRUE,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0, -- Bumped by every API write to the row (Conditional GET validator)
     FOREIGN KEY (teacher_id) REFERENCES users(id) ON DELETE SET NULL,
-    INDEX idx_course_code (course_code)
+    INDEX idx_course_code (course_code),
+    INDEX idx_updated (updated_at),
+    INDEX idx_active_code (is_active, course_code),
+    INDEX idx_active_semester_code (is_active, semester, course_code),
+    INDEX idx_teacher_active (teacher_id, is_active),
+    INDEX idx_versions (version, updated_at)
 );
 
 -- Enrollments Table
@@ -45,13 +55,17 @@ CREATE TABLE enrollments (
     status ENUM('enrolled', 'completed', 'dropped', 'pending') DEFAULT 'enrolled',
     grade VARCHAR(5),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Conditional GET validator
     is_deleted BOOLEAN DEFAULT FALSE,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0, -- Bumped by every API write to the row (Conditional GET validator)
     FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
     UNIQUE KEY unique_enrollment (student_id, course_id),
-    INDEX idx_student (student_id),
-    INDEX idx_course (course_id)
+    INDEX idx_updated (updated_at),
+    INDEX idx_student_versions (student_id, updated_at, version),
+    INDEX idx_student_live (student_id, is_deleted, enrollment_date),
+    INDEX idx_course_live (course_id, is_deleted),
+    INDEX idx_live_date (is_deleted, enrollment_date)
 );
 
 -- Audit Log Table
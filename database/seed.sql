@@ -66,6 +66,11 @@ INSERT INTO enrollments (student_id, course_id, status, grade, enrollment_date)
 -- Evan (ID 8) - New enrollment
 (8, 1, 'pending', NULL, '2024-09-01 12:00:00');
 
+-- Seat counters for the enrollments above
+UPDATE courses c SET enrolled_count = (
+    SELECT COUNT(*) FROM enrollments e WHERE e.course_id = c.id AND e.is_deleted = FALSE
+);
+
 -- --------------------------------------------------------
 -- 5. SEED AUDIT LOG
 -- Simulate some system activity